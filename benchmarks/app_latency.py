@@ -0,0 +1,258 @@
+# Headless script-run latency benchmarks for online_capstone.py.
+#
+# Drives the app through Streamlit's AppTest harness with connect_gsheets routed to the
+# in-memory fake in fake_gspread.py, and reports p50/p95/p99 (ms) for:
+#   cold_start          first run of a fresh process (script compile included)
+#   keystroke_day_N     editing a text field on day tab N (fragment rerun of that tab)
+#   language_switch     switching language through the sidebar selector
+#   submit_click        clicking submit (queue + rerun + download button)
+#   submit_download     clicking the download button (the deferred notes render)
+#   submit_delivered    click until the outbox worker has delivered the row to the fake sheet
+#
+# Usage:
+#   python -m benchmarks.app_latency --runs 30
+#   python -m benchmarks.app_latency --json results.json
+#   python -m benchmarks.app_latency --baseline results.json --max-regression 0.25
+#
+# Keystroke and language-switch numbers are script execution time (start to stop events),
+# with the compiled script cached as the real server does, so they exclude AppTest overhead.
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData, ScriptRequests
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.app_test as app_test_module
+import streamlit.testing.v1.local_script_runner as local_script_runner
+
+from benchmarks.fake_gspread import FakeBackend, install_fake_client
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "online_capstone.py")
+DAYS = (1, 2, 3, 4)
+SIDEBAR_VALUES = ("7", "10:30", "EV Range Explorer", "Bench Bot") # group, time slot, title, note taker
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return float("nan")
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    return {
+        "n": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "mean": statistics.mean(samples) if samples else float("nan"),
+    }
+
+
+class _Harness:
+    # Patches AppTest's runner so we can time script execution, share one bytecode cache
+    # and target a single fragment, the way a browser interaction does on the real server.
+    def __init__(self):
+        self.exec_ms = []
+        self.fragment_id = None
+        self.shared_cache = ScriptCache()
+        self.use_shared_cache = True
+        self._install()
+
+    def _install(self):
+        harness = self
+        original_init = local_script_runner.LocalScriptRunner.__init__
+        original_run = local_script_runner.LocalScriptRunner.run
+        cache_factory = lambda: harness.shared_cache if harness.use_shared_cache else ScriptCache()
+        app_test_module.ScriptCache = cache_factory
+        local_script_runner.ScriptCache = cache_factory
+
+        def __init__(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            started = {}
+
+            def on_event(sender, event, **event_kwargs):
+                if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                    started["at"] = time.perf_counter()
+                elif event in (ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS, ScriptRunnerEvent.FRAGMENT_STOPPED_WITH_SUCCESS) and "at" in started:
+                    harness.exec_ms.append((time.perf_counter() - started.pop("at")) * 1000)
+
+            self.on_event.connect(on_event, weak=False)
+
+        def run(self, widget_state=None, query_params=None, timeout=3, page_hash=""):
+            if harness.fragment_id is None:
+                return original_run(self, widget_state, query_params, timeout, page_hash)
+            # Replace the constructor's queued full-app rerun with a fragment-scoped one
+            self._requests = ScriptRequests()
+            self.request_rerun(RerunData(widget_states=widget_state, page_script_hash=page_hash, fragment_id_queue=[harness.fragment_id]))
+            try:
+                if not self._script_thread:
+                    self.start()
+                local_script_runner.require_widgets_deltas(self, timeout)
+            finally:
+                self.join()
+            return local_script_runner.parse_tree_from_messages(self.forward_msgs())
+
+        local_script_runner.LocalScriptRunner.__init__ = __init__
+        local_script_runner.LocalScriptRunner.run = run
+
+    def timed_run(self, at, fragment_id=None):
+        # Returns total script execution time (ms) of one interaction, including any st.rerun()
+        self.fragment_id = fragment_id
+        start = len(self.exec_ms)
+        try:
+            at.run()
+        finally:
+            self.fragment_id = None
+        if at.exception:
+            raise RuntimeError(f"App raised: {at.exception[0].message}")
+        return sum(self.exec_ms[start:])
+
+
+def new_session(harness):
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    harness.timed_run(at)
+    return at
+
+
+def fragment_ids_in_order(at):
+    # Registration order in main(): sidebar meeting info, then day tabs 1-4
+    storage = at._fragment_storage
+    return sorted(storage._fragments, key=lambda fragment_id: storage._registration_sequence_by_id.get(fragment_id, 0))
+
+
+def bench_cold_start(harness, runs):
+    samples = []
+    harness.use_shared_cache = False
+    try:
+        for _ in range(runs):
+            at = AppTest.from_file(APP_PATH, default_timeout=60)
+            start = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        harness.use_shared_cache = True
+    return samples
+
+
+def bench_keystrokes(harness, runs):
+    at = new_session(harness)
+    tab_fragments = fragment_ids_in_order(at)[1:5]
+    results = {}
+    for day, fragment_id in zip(DAYS, tab_fragments):
+        harness.timed_run(at) # Full run so the element tree holds every tab again
+        field_key = next(t.key for t in at.text_area if t.key and t.key.startswith(f"widget_day_{day}_"))
+        samples = []
+        for i in range(runs):
+            at.text_area(key=field_key).set_value(f"benchmark text {i} " * (i % 5 + 1))
+            samples.append(harness.timed_run(at, fragment_id))
+        results[f"keystroke_day_{day}"] = samples
+    return results
+
+
+def bench_language_switch(harness, runs):
+    at = new_session(harness)
+    samples = []
+    for i in range(runs):
+        at.sidebar.selectbox[0].select("日本語" if i % 2 == 0 else "English")
+        samples.append(harness.timed_run(at))
+    return samples
+
+
+def bench_submit(harness, backend, runs):
+    # The download button's file is rendered only when clicked, which AppTest cannot do; time that callback directly
+    from benchmarks.load_test import load_app
+
+    app = load_app()
+    click_samples, download_samples, delivered_samples = [], [], []
+    at = new_session(harness)
+    for text_input, value in zip(at.sidebar.text_input, SIDEBAR_VALUES):
+        text_input.set_value(value)
+    harness.timed_run(at)
+    for i in range(runs):
+        day = DAYS[i % len(DAYS)]
+        at.text_area(key=next(t.key for t in at.text_area if t.key and t.key.startswith(f"widget_day_{day}_"))).set_value(f"submission {i}")
+        harness.timed_run(at)
+        before = backend.calls.get("append_rows", 0) + backend.calls.get("batch_update", 0)
+        start = time.perf_counter()
+        at.button(key=f"submit_btn_day_{day}_tab").click()
+        click_samples.append(harness.timed_run(at))
+        if not at.get("download_button"):
+            raise RuntimeError("Download button missing after submit")
+        download_start = time.perf_counter()
+        notes_markdown = app.render_submitted_notes(at.session_state["submitted_notes"])
+        download_samples.append((time.perf_counter() - download_start) * 1000)
+        if f"submission {i}" not in notes_markdown:
+            raise RuntimeError("Downloaded notes are missing the submitted text")
+        while backend.calls.get("append_rows", 0) + backend.calls.get("batch_update", 0) <= before:
+            if time.perf_counter() - start > 60:
+                raise RuntimeError("Submission was not delivered within 60s")
+            time.sleep(0.005)
+        delivered_samples.append((time.perf_counter() - start) * 1000)
+    return click_samples, download_samples, delivered_samples
+
+
+def run_benchmarks(runs, latency, jitter, error_rate, seed):
+    backend = install_fake_client(FakeBackend(latency=latency, jitter=jitter, error_rate=error_rate, seed=seed))
+    harness = _Harness()
+    results = {"cold_start": bench_cold_start(harness, max(3, runs // 5))}
+    results.update(bench_keystrokes(harness, runs))
+    results["language_switch"] = bench_language_switch(harness, runs)
+    results["submit_click"], results["submit_download"], results["submit_delivered"] = bench_submit(harness, backend, runs)
+    return {name: summarize(samples) for name, samples in results.items()}
+
+
+def check_regressions(summary, baseline, max_regression):
+    failures = []
+    for name, stats in baseline.items():
+        if name in summary and summary[name]["p95"] > stats["p95"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {summary[name]['p95']:.1f}ms > baseline {stats['p95']:.1f}ms +{max_regression:.0%}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless script-run latency benchmarks for the capstone tracker")
+    parser.add_argument("--runs", type=int, default=30, help="samples per scenario")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake Sheets latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra random latency per call (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake Sheets calls that fail with 429")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--baseline", help="summary JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 increase over the baseline")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's outbox and drafts away from the real ones
+    bench_dir = tempfile.mkdtemp(prefix="capstone-bench-")
+    os.environ["CAPSTONE_OUTBOX_PATH"] = os.path.join(bench_dir, "outbox.sqlite3")
+    os.environ["CAPSTONE_DRAFTS_PATH"] = os.path.join(bench_dir, "drafts.sqlite3")
+    os.environ["CAPSTONE_MIRROR_PATH"] = os.path.join(bench_dir, "mirror.sqlite3")
+    os.environ.setdefault("CAPSTONE_LOG_LEVEL", "WARNING") # No per-submission log lines
+    summary = run_benchmarks(args.runs, args.latency, args.jitter, args.error_rate, args.seed)
+
+    print(f"{'scenario':<20}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<20}{stats['n']:>5}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(summary, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# In-memory stand-in for the slice of gspread the tracker uses, with configurable latency
+# and error injection. Install it with install_fake_client() before the app connects.
+import random
+import re
+import threading
+import time
+
+import gspread
+
+
+class _FakeResponse:
+    # gspread.exceptions.APIError reads the status code and JSON body off a requests.Response
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = message
+        self._body = {"error": {"code": status_code, "message": message, "status": "FAKE_ERROR"}}
+
+    def json(self):
+        return self._body
+
+
+class FakeBackend:
+    # Shared behaviour for every client/spreadsheet/worksheet created from one backend
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_code=429, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.spreadsheets = {}
+        self.calls = {}
+
+    def call(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            fail = self.error_rate and self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise gspread.exceptions.APIError(_FakeResponse(self.error_code, f"Injected error on {name}"))
+
+    def batch_update(self, spreadsheet_id, body):
+        # HTTPClient.batch_update: the spreadsheet-level requests the app sends (new header cells)
+        self.call("spreadsheet_batch_update")
+        with self.lock:
+            worksheets = {ws.id: ws for ws in self.spreadsheets[spreadsheet_id]._worksheets.values()}
+            for request in body.get("requests", []):
+                if "updateCells" in request:
+                    start = request["updateCells"]["start"]
+                    values = [[next(iter(cell.get("userEnteredValue", {"stringValue": ""}).values())) for cell in row.get("values", [])]
+                              for row in request["updateCells"].get("rows", [])]
+                    worksheets[start["sheetId"]]._write_range(gspread.utils.rowcol_to_a1(start.get("rowIndex", 0) + 1, start.get("columnIndex", 0) + 1), values)
+        return {"spreadsheetId": spreadsheet_id, "replies": [{} for _ in body.get("requests", [])]}
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls = {}
+
+
+class FakeWorksheet:
+    def __init__(self, backend, spreadsheet, title):
+        self._backend = backend
+        self.spreadsheet = spreadsheet
+        self.spreadsheet_id = spreadsheet.id
+        self.title = title
+        self.client = backend # All fake clients share one backend, like gspread's HTTPClient
+        self.id = abs(hash(title)) % 10**9
+        self.rows = []
+
+    @property
+    def row_count(self):
+        return max(1, len(self.rows))
+
+    @property
+    def col_count(self):
+        return max((len(row) for row in self.rows), default=1)
+
+    def row_values(self, row, **kwargs):
+        self._backend.call("row_values")
+        with self._backend.lock:
+            values = list(self.rows[row - 1]) if len(self.rows) >= row else []
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def get_all_values(self, **kwargs):
+        self._backend.call("get_all_values")
+        with self._backend.lock:
+            return [list(row) for row in self.rows]
+
+    def get(self, range_name=None, **kwargs):
+        self._backend.call("get")
+        with self._backend.lock:
+            return self._read_range(range_name)
+
+    def batch_get(self, ranges, **kwargs):
+        self._backend.call("batch_get")
+        with self._backend.lock:
+            return [self._read_range(range_name) for range_name in ranges]
+
+    def clear(self):
+        self._backend.call("clear")
+        with self._backend.lock:
+            self.rows = []
+
+    def update(self, values=None, range_name=None, **kwargs):
+        if isinstance(values, str): # Old gspread argument order: update(range_name, values)
+            values, range_name = range_name, values
+        self._backend.call("update")
+        with self._backend.lock:
+            self._write_range(range_name or "A1", values)
+
+    def batch_update(self, data, **kwargs):
+        self._backend.call("batch_update")
+        with self._backend.lock:
+            for item in data:
+                self._write_range(item["range"], item["values"])
+
+    def append_row(self, values, **kwargs):
+        return self.append_rows([values], **kwargs)
+
+    def append_rows(self, values, **kwargs):
+        self._backend.call("append_rows")
+        with self._backend.lock:
+            start = len(self.rows) + 1
+            self.rows.extend(list(row) for row in values)
+            end = len(self.rows)
+        return {"updates": {"updatedRange": f"{self.title}!A{start}:{gspread.utils.rowcol_to_a1(1, max(len(r) for r in values))[:-1]}{end}"}}
+
+    def add_cols(self, cols):
+        self._backend.call("add_cols")
+
+    def _read_range(self, range_name):
+        # Supports "A1", "A2:C", "C2:C10" and whole-sheet reads (None)
+        if not range_name:
+            return [list(row) for row in self.rows]
+        start_col, start_row, end_col, end_row = parse_a1_range(range_name.split("!")[-1])
+        end_row = end_row or len(self.rows)
+        end_col = end_col or max(start_col, self.col_count)
+        out = []
+        for row in self.rows[start_row - 1:end_row]:
+            cells = list(row[start_col - 1:end_col])
+            while cells and cells[-1] == "":
+                cells.pop()
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _write_range(self, range_name, values):
+        start_col, start_row, _, _ = parse_a1_range(range_name.split("!")[-1])
+        for r_offset, row_values in enumerate(values):
+            row_number = start_row + r_offset
+            while len(self.rows) < row_number:
+                self.rows.append([])
+            row = self.rows[row_number - 1]
+            needed = start_col - 1 + len(row_values)
+            if len(row) < needed:
+                row.extend([""] * (needed - len(row)))
+            row[start_col - 1:start_col - 1 + len(row_values)] = list(row_values)
+
+
+def parse_a1_range(a1):
+    # "B2:D" -> (2, 2, 4, None); "A5" -> (1, 5, None, 5)
+    match = re.fullmatch(r"([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?", a1)
+    if not match:
+        raise ValueError(f"Unsupported range {a1!r}")
+    start_col, start_row, end_col, end_row = match.groups()
+    to_col = lambda letters: sum((ord(ch) - 64) * 26 ** i for i, ch in enumerate(reversed(letters))) if letters else None
+    single = end_col is None and end_row is None
+    return (
+        to_col(start_col) or 1,
+        int(start_row) if start_row else 1,
+        to_col(start_col) if single else to_col(end_col),
+        (int(start_row) if start_row else None) if single else (int(end_row) if end_row else None),
+    )
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, key):
+        self._backend = backend
+        self.id = key
+        self._worksheets = {}
+
+    def worksheet(self, title):
+        self._backend.call("worksheet")
+        with self._backend.lock:
+            if title not in self._worksheets:
+                raise gspread.WorksheetNotFound(title)
+            return self._worksheets[title]
+
+    def worksheets(self):
+        self._backend.call("worksheets")
+        with self._backend.lock:
+            return list(self._worksheets.values())
+
+    def add_worksheet(self, title, rows, cols, **kwargs):
+        self._backend.call("add_worksheet")
+        with self._backend.lock:
+            worksheet = self._worksheets[title] = FakeWorksheet(self._backend, self, title)
+            return worksheet
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self._backend = backend
+        self.http_client = backend
+
+    def open_by_key(self, key):
+        self._backend.call("open_by_key")
+        with self._backend.lock:
+            if key not in self._backend.spreadsheets:
+                self._backend.spreadsheets[key] = FakeSpreadsheet(self._backend, key)
+            return self._backend.spreadsheets[key]
+
+
+FAKE_SECRETS = {
+    "gcp_service_account": {"type": "service_account", "client_email": "bench@example.invalid"},
+    "gcp_spreadsheet": {"key": "fake-spreadsheet"},
+}
+
+
+def install_secrets(secrets):
+    # Process-wide secrets, visible to background threads (the outbox worker) outside script runs
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+
+    fake_secrets = Secrets()
+    fake_secrets._secrets = dict(secrets)
+    st.secrets = fake_secrets
+
+
+def install_fake_client(backend, secrets=None):
+    # Routes connect_gsheets() to the fake backend
+    gspread.service_account_from_dict = lambda *args, **kwargs: FakeClient(backend)
+    install_secrets(secrets or FAKE_SECRETS)
+    return backend
@@ -0,0 +1,173 @@
+# Concurrent-load simulator for the submission path of online_capstone.py.
+#
+# Starts the local Sheets v4 stand-in (sheets_server.py), points the app's real
+# connect_gsheets() client at it, and runs N simulated student sessions in parallel threads.
+# Each session submits through the app's own code:
+#   --path direct   save_to_gsheets_new_row() on a client leased from the pool (CAPSTONE_GSHEETS_POOL_SIZE)
+#   --path outbox   enqueue_submission() and wait for the outbox worker to deliver it
+# For each concurrency level it reports throughput, latency percentiles, error rate,
+# API requests per submission, and rows lost or duplicated in the sheet.
+#
+# Usage:
+#   python -m benchmarks.load_test --concurrency 1,10,20,40 --submissions 3
+#   python -m benchmarks.load_test --path outbox --latency 0.2 --write-quota-per-minute 60
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+import gspread
+
+from benchmarks.app_latency import summarize
+from benchmarks.fake_gspread import FAKE_SECRETS, install_secrets
+from benchmarks.sheets_server import SheetsServer, SheetsState, local_client
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    # Imported in bare mode (no script run), so main() does not execute
+    load_dir = tempfile.mkdtemp(prefix="capstone-load-")
+    os.environ["CAPSTONE_OUTBOX_PATH"] = os.path.join(load_dir, "outbox.sqlite3")
+    os.environ["CAPSTONE_DRAFTS_PATH"] = os.path.join(load_dir, "drafts.sqlite3")
+    os.environ["CAPSTONE_MIRROR_PATH"] = os.path.join(load_dir, "mirror.sqlite3")
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    os.environ.setdefault("CAPSTONE_LOG_LEVEL", "WARNING") # No per-submission log lines
+    # Session threads have no ScriptRunContext; that is expected here
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    import online_capstone
+    return online_capstone
+
+
+def make_submission(app, session_number, token, day):
+    # Same columns, in the same order, as get_all_form_data()
+    data = {
+        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Language": "en",
+        "GroupNumber": str(session_number),
+        "MeetingTimeSlot": "10:30",
+        "MeetingDate": str(date.today()),
+        "ProjectTitle": f"Load test project {session_number}",
+        "CurrentResearchQuestion": "Does battery size predict EV range?",
+        "NoteTaker": token,
+        "MeetingDayFocus": app.get_translation("en", f"day_{day}_tab"),
+    }
+    for field in app.FORM_FIELDS:
+        data[field.id] = field.default if field.kind == "checkbox" else f"{token}: notes for {field.id} " * 3
+    return data
+
+
+def run_session(app, path, session_number, submissions, think_time, level, results, rng):
+    for k in range(submissions):
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+        token = f"L{level}-S{session_number}-K{k}"
+        data = make_submission(app, session_number, token, day=k % 4 + 1)
+        start = time.perf_counter()
+        if path == "direct":
+            ok = app.save_to_gsheets_new_row(data)
+        else:
+            submission_id = app.enqueue_submission(data)
+            ok = False
+            while submission_id is not None:
+                status = app.get_submission_status(submission_id)
+                if status and status["status"] in ("delivered", "failed"):
+                    ok = status["status"] == "delivered"
+                    break
+                time.sleep(0.01)
+        results.append({"token": token, "ok": ok, "ms": (time.perf_counter() - start) * 1000})
+
+
+def run_level(app, server, path, level, submissions, think_time, seed, quotas=None):
+    spreadsheet_id = f"load-{level}-{int(time.time() * 1000)}"
+    # The emulated quotas are also the app's budgets, as they would be set in secrets for a real project
+    install_secrets({**FAKE_SECRETS, "gcp_spreadsheet": {"key": spreadsheet_id, **(quotas or {})}})
+    server.state.reset_counters()
+    results = []
+    threads = [
+        threading.Thread(target=run_session, args=(app, path, s, submissions, think_time, level, results, random.Random(seed + s)), name=f"session-{s}")
+        for s in range(1, level + 1)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    rows = server.state.rows(spreadsheet_id, app.SUBMISSIONS_SHEET_NAME)
+    token_column = rows[0].index("NoteTaker") if rows and "NoteTaker" in rows[0] else None
+    counts = {}
+    for row in rows[1:]:
+        if token_column is not None and token_column < len(row):
+            counts[row[token_column]] = counts.get(row[token_column], 0) + 1
+    ok = [r for r in results if r["ok"]]
+    latency = summarize([r["ms"] for r in ok])
+    total_requests = sum(server.state.requests.values())
+    return {
+        "sessions": level,
+        "submissions": len(results),
+        "ok": len(ok),
+        "error_rate": 1 - len(ok) / len(results) if results else 0.0,
+        "throughput_per_s": len(ok) / elapsed if elapsed else 0.0,
+        "p50_ms": latency["p50"],
+        "p95_ms": latency["p95"],
+        "p99_ms": latency["p99"],
+        "api_requests_per_submission": total_requests / len(results) if results else 0.0,
+        "rejected_requests": sum(server.state.rejected.values()),
+        "lost_rows": sum(1 for r in ok if counts.get(r["token"], 0) == 0),
+        "duplicated_rows": sum(n - 1 for n in counts.values() if n > 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent submission load test against a local Sheets stand-in")
+    parser.add_argument("--concurrency", default="1,5,10,20,40", help="comma-separated session counts")
+    parser.add_argument("--submissions", type=int, default=3, help="submissions per session")
+    parser.add_argument("--path", choices=("direct", "outbox"), default="direct")
+    parser.add_argument("--think-time", type=float, default=0.5, help="max random pause between a session's submissions (s)")
+    parser.add_argument("--latency", type=float, default=0.1, help="stand-in server latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/5xx")
+    parser.add_argument("--write-quota-per-minute", type=int, default=0, help="emulate the per-minute write quota (0 = off)")
+    parser.add_argument("--read-quota-per-minute", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="write per-level results to this file")
+    args = parser.parse_args(argv)
+
+    state = SheetsState(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        write_quota_per_minute=args.write_quota_per_minute, read_quota_per_minute=args.read_quota_per_minute, seed=args.seed)
+    server = SheetsServer(state).start()
+    gspread.service_account_from_dict = lambda *a, **kw: local_client(server.base_url)
+    app = load_app()
+    quotas = {f"{kind}_quota_per_minute": quota for kind, quota in (("write", args.write_quota_per_minute), ("read", args.read_quota_per_minute)) if quota}
+
+    columns = ("sessions", "submissions", "ok", "error_rate", "throughput_per_s", "p50_ms", "p95_ms", "p99_ms",
+               "api_requests_per_submission", "rejected_requests", "lost_rows", "duplicated_rows")
+    print(" ".join(f"{c:>12}" for c in ("sessions", "subs", "ok", "err%", "subs/s", "p50 ms", "p95 ms", "p99 ms", "req/sub", "rejected", "lost", "dup")))
+    report = []
+    try:
+        for level in (int(n) for n in args.concurrency.split(",")):
+            result = run_level(app, server, args.path, level, args.submissions, args.think_time, args.seed, quotas)
+            report.append(result)
+            print(" ".join(
+                f"{result[c] * 100:>12.1f}" if c == "error_rate" else f"{result[c]:>12.1f}" if isinstance(result[c], float) else f"{result[c]:>12}"
+                for c in columns
+            ))
+    finally:
+        server.stop()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(r["lost_rows"] or r["duplicated_rows"] for r in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+# Local stand-in for the Google Sheets v4 REST endpoints the tracker uses:
+#   GET  /v4/spreadsheets/{id}                       open_by_key / worksheet() metadata
+#   POST /v4/spreadsheets/{id}:batchUpdate           addSheet, appendDimension, updateCells; others acknowledged
+#   GET  /v4/spreadsheets/{id}/values/{range}        row_values / get
+#   GET  /v4/spreadsheets/{id}/values:batchGet       batch_get
+#   PUT  /v4/spreadsheets/{id}/values/{range}        update
+#   POST /v4/spreadsheets/{id}/values/{range}:append append_row(s)
+#   POST /v4/spreadsheets/{id}/values/{range}:clear  clear
+#   POST /v4/spreadsheets/{id}/values:batchUpdate    batch_update
+#
+# Real gspread clients are pointed at it with local_client(); only the transport changes.
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import gspread
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks.fake_gspread import parse_a1_range
+
+SHEETS_API_ORIGIN = "https://sheets.googleapis.com"
+API_PREFIX = "/v4/spreadsheets/"
+
+
+class SheetsState:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, write_quota_per_minute=0, read_quota_per_minute=0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.write_quota_per_minute = write_quota_per_minute
+        self.read_quota_per_minute = read_quota_per_minute
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.spreadsheets = {}
+        self.requests = {}
+        self.rejected = {}
+        self._recent = {"read": deque(), "write": deque()}
+
+    def spreadsheet(self, spreadsheet_id):
+        # Created on first access, like a freshly shared empty spreadsheet
+        if spreadsheet_id not in self.spreadsheets:
+            self.spreadsheets[spreadsheet_id] = {"title": f"Stand-in {spreadsheet_id}", "sheets": {}, "next_sheet_id": 1}
+        return self.spreadsheets[spreadsheet_id]
+
+    def admit(self, kind, name):
+        # Returns an (status, message) error to send, or None; also applies the configured latency
+        with self.lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            error = None
+            quota = self.write_quota_per_minute if kind == "write" else self.read_quota_per_minute
+            now = time.monotonic()
+            recent = self._recent[kind]
+            while recent and recent[0] < now - 60:
+                recent.popleft()
+            if quota and len(recent) >= quota:
+                error = (429, f"Quota exceeded for quota metric '{kind.title()} requests' per minute")
+            elif self.error_rate and self.random.random() < self.error_rate:
+                error = (self.random.choice((429, 500, 503)), f"Injected error on {name}")
+            else:
+                recent.append(now)
+            if error:
+                self.rejected[name] = self.rejected.get(name, 0) + 1
+        if delay:
+            time.sleep(delay)
+        return error
+
+    def rows(self, spreadsheet_id, title):
+        with self.lock:
+            sheet = self.spreadsheets.get(spreadsheet_id, {}).get("sheets", {}).get(title)
+            return [list(row) for row in sheet["rows"]] if sheet else []
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = {}
+            self.rejected = {}
+
+
+def _cell(value):
+    # Roughly what USER_ENTERED stores and FORMATTED_VALUE returns
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return "" if value is None else str(value)
+
+
+def _split_range(range_name):
+    # "'All_Submissions_V2'!A1:1" -> ("All_Submissions_V2", "A1:1"); "'Sheet'" -> ("Sheet", "")
+    title, _, a1 = range_name.rpartition("!")
+    if not title:
+        title, a1 = a1, ""
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, a1
+
+
+def _a1(title, first_row, last_row, n_cols):
+    last_col = gspread.utils.rowcol_to_a1(1, max(1, n_cols))[:-1]
+    return f"'{title}'!A{first_row}:{last_col}{last_row}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+    state = None # Set by SheetsServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, message):
+        status_name = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED"}.get(status, "UNAVAILABLE")
+        self._send(status, {"error": {"code": status, "message": message, "status": status_name}})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        body = self._body() if method in ("POST", "PUT") else {}
+        if not url.path.startswith(API_PREFIX):
+            return self._error(404, f"Unknown path {url.path}")
+        rest = url.path[len(API_PREFIX):]
+        spreadsheet_id, _, tail = rest.partition("/")
+        try:
+            if not tail and spreadsheet_id.endswith(":batchUpdate") and method == "POST":
+                return self._handle("write", "spreadsheets.batchUpdate", self._batch_update_spreadsheet, spreadsheet_id[:-len(":batchUpdate")], body)
+            if not tail and method == "GET":
+                return self._handle("read", "spreadsheets.get", self._metadata, spreadsheet_id)
+            if tail == "values:batchGet" and method == "GET":
+                return self._handle("read", "values.batchGet", self._batch_get, spreadsheet_id, query.get("ranges", []))
+            if tail == "values:batchUpdate" and method == "POST":
+                return self._handle("write", "values.batchUpdate", self._batch_update_values, spreadsheet_id, body)
+            if tail.startswith("values/"):
+                range_name = unquote(tail[len("values/"):])
+                if range_name.endswith(":append") and method == "POST":
+                    return self._handle("write", "values.append", self._append, spreadsheet_id, range_name[:-len(":append")], body)
+                if range_name.endswith(":clear") and method == "POST":
+                    return self._handle("write", "values.clear", self._clear, spreadsheet_id, range_name[:-len(":clear")])
+                if method == "PUT":
+                    return self._handle("write", "values.update", self._update, spreadsheet_id, range_name, body)
+                if method == "GET":
+                    return self._handle("read", "values.get", self._get, spreadsheet_id, range_name)
+            return self._error(404, f"Unsupported {method} {url.path}")
+        except (KeyError, ValueError) as e:
+            return self._error(400, f"Bad request: {e}")
+
+    def _handle(self, kind, name, handler, *args):
+        error = self.state.admit(kind, name)
+        if error:
+            return self._error(*error)
+        with self.state.lock:
+            result = handler(*args)
+        if isinstance(result, tuple):
+            return self._error(*result)
+        return self._send(200, result)
+
+    def _sheet(self, spreadsheet_id, title):
+        sheet = self.state.spreadsheet(spreadsheet_id)["sheets"].get(title)
+        if sheet is None:
+            raise KeyError(f"Unable to parse range: {title}")
+        return sheet
+
+    def _metadata(self, spreadsheet_id):
+        spreadsheet = self.state.spreadsheet(spreadsheet_id)
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "properties": {"title": spreadsheet["title"], "locale": "en_US", "timeZone": "Etc/GMT"},
+            "sheets": [
+                {"properties": {
+                    "sheetId": sheet["sheetId"], "title": title, "index": index, "sheetType": "GRID",
+                    "gridProperties": {"rowCount": max(sheet["rowCount"], len(sheet["rows"])), "columnCount": sheet["columnCount"]},
+                }}
+                for index, (title, sheet) in enumerate(spreadsheet["sheets"].items())
+            ],
+        }
+
+    def _batch_update_spreadsheet(self, spreadsheet_id, body):
+        spreadsheet = self.state.spreadsheet(spreadsheet_id)
+        replies = []
+        for request in body.get("requests", []):
+            if "addSheet" in request:
+                properties = dict(request["addSheet"].get("properties", {}))
+                title = properties["title"]
+                if title in spreadsheet["sheets"]:
+                    return (400, f"A sheet with the name \"{title}\" already exists.")
+                grid = properties.get("gridProperties", {})
+                sheet = {"sheetId": spreadsheet["next_sheet_id"], "rows": [], "rowCount": int(grid.get("rowCount", 1000)), "columnCount": int(grid.get("columnCount", 26))}
+                spreadsheet["next_sheet_id"] += 1
+                spreadsheet["sheets"][title] = sheet
+                properties.update({"sheetId": sheet["sheetId"], "index": len(spreadsheet["sheets"]) - 1, "sheetType": "GRID",
+                                   "gridProperties": {"rowCount": sheet["rowCount"], "columnCount": sheet["columnCount"]}})
+                replies.append({"addSheet": {"properties": properties}})
+            elif "appendDimension" in request:
+                dimension = request["appendDimension"]
+                sheet = self._sheet_by_id(spreadsheet, dimension["sheetId"])
+                sheet["columnCount" if dimension["dimension"] == "COLUMNS" else "rowCount"] += int(dimension["length"])
+                replies.append({})
+            elif "updateCells" in request:
+                update = request["updateCells"]
+                sheet = self._sheet_by_id(spreadsheet, update["start"]["sheetId"])
+                title = next(t for t, s in spreadsheet["sheets"].items() if s is sheet)
+                start = update["start"]
+                values = [[next(iter(cell.get("userEnteredValue", {"stringValue": ""}).values())) for cell in row.get("values", [])] for row in update.get("rows", [])]
+                a1 = gspread.utils.rowcol_to_a1(start.get("rowIndex", 0) + 1, start.get("columnIndex", 0) + 1)
+                self._write(spreadsheet_id, f"'{title}'!{a1}", values)
+                replies.append({})
+            else:
+                replies.append({})
+        return {"spreadsheetId": spreadsheet_id, "replies": replies}
+
+    def _sheet_by_id(self, spreadsheet, sheet_id):
+        for sheet in spreadsheet["sheets"].values():
+            if sheet["sheetId"] == sheet_id:
+                return sheet
+        raise KeyError(f"No grid with id: {sheet_id}")
+
+    def _read(self, spreadsheet_id, range_name):
+        title, a1 = _split_range(range_name)
+        rows = self._sheet(spreadsheet_id, title)["rows"]
+        if a1:
+            start_col, start_row, end_col, end_row = parse_a1_range(a1)
+        else:
+            start_col, start_row, end_col, end_row = 1, 1, None, None
+        out = []
+        for row in rows[start_row - 1:end_row or len(rows)]:
+            cells = list(row[start_col - 1:end_col or len(row)])
+            while cells and cells[-1] == "":
+                cells.pop()
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        value_range = {"range": range_name, "majorDimension": "ROWS"}
+        if out:
+            value_range["values"] = out
+        return value_range
+
+    def _get(self, spreadsheet_id, range_name):
+        return self._read(spreadsheet_id, range_name)
+
+    def _batch_get(self, spreadsheet_id, ranges):
+        return {"spreadsheetId": spreadsheet_id, "valueRanges": [self._read(spreadsheet_id, r) for r in ranges]}
+
+    def _write(self, spreadsheet_id, range_name, values):
+        title, a1 = _split_range(range_name)
+        sheet = self._sheet(spreadsheet_id, title)
+        start_col, start_row, _, _ = parse_a1_range(a1 or "A1")
+        for offset, row_values in enumerate(values):
+            row_number = start_row + offset
+            while len(sheet["rows"]) < row_number:
+                sheet["rows"].append([])
+            row = sheet["rows"][row_number - 1]
+            needed = start_col - 1 + len(row_values)
+            if len(row) < needed:
+                row.extend([""] * (needed - len(row)))
+            row[start_col - 1:needed] = [_cell(v) for v in row_values]
+        n_cols = max((len(v) for v in values), default=0)
+        return {"spreadsheetId": spreadsheet_id, "updatedRange": _a1(title, start_row, start_row + len(values) - 1, start_col - 1 + n_cols),
+                "updatedRows": len(values), "updatedColumns": n_cols, "updatedCells": sum(len(v) for v in values)}
+
+    def _update(self, spreadsheet_id, range_name, body):
+        return self._write(spreadsheet_id, range_name, body.get("values", []))
+
+    def _batch_update_values(self, spreadsheet_id, body):
+        responses = [self._write(spreadsheet_id, item["range"], item.get("values", [])) for item in body.get("data", [])]
+        return {"spreadsheetId": spreadsheet_id, "totalUpdatedRows": sum(r["updatedRows"] for r in responses), "responses": responses}
+
+    def _append(self, spreadsheet_id, range_name, body):
+        title, _ = _split_range(range_name)
+        sheet = self._sheet(spreadsheet_id, title)
+        # The table ends at the last non-empty row; new rows go directly below it
+        last = len(sheet["rows"])
+        while last and not any(sheet["rows"][last - 1]):
+            last -= 1
+        del sheet["rows"][last:]
+        values = body.get("values", [])
+        update = self._write(spreadsheet_id, f"'{title}'!A{last + 1}", values)
+        return {"spreadsheetId": spreadsheet_id, "tableRange": _a1(title, 1, max(last, 1), 26), "updates": update}
+
+    def _clear(self, spreadsheet_id, range_name):
+        title, _ = _split_range(range_name)
+        self._sheet(spreadsheet_id, title)["rows"] = []
+        return {"spreadsheetId": spreadsheet_id, "clearedRange": f"'{title}'"}
+
+
+class SheetsServer:
+    def __init__(self, state=None, host="127.0.0.1", port=0):
+        self.state = state or SheetsState()
+        handler = type("BoundHandler", (_Handler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="sheets-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _RedirectAdapter(HTTPAdapter):
+    # Sends https://sheets.googleapis.com/... to the stand-in server, keeping path and query
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + request.url[len(SHEETS_API_ORIGIN):]
+        return super().send(request, **kwargs)
+
+
+def local_session(base_url, **adapter_kwargs):
+    session = requests.Session()
+    session.mount(SHEETS_API_ORIGIN, _RedirectAdapter(base_url, **adapter_kwargs))
+    return session
+
+
+def local_client(base_url, **adapter_kwargs):
+    # A real gspread.Client whose HTTP traffic goes to the stand-in server
+    return gspread.Client(auth=None, session=local_session(base_url, **adapter_kwargs))
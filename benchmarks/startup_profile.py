@@ -0,0 +1,143 @@
+# Start-up profile for online_capstone.py: what a fresh server process pays before its first student
+# can submit. Every measurement runs in a new interpreter, so nothing is imported or cached yet:
+#   import_<module>     cumulative import time from python -X importtime (streamlit, pandas, gspread, the app)
+#   first_run           first script run of the student form (AppTest), and the heavy modules it loaded
+#   first_submit_cold   first save_to_gsheets_new_row() with no warm-up: connect and open the sheet in the click
+#   first_submit_warm   the same once warm_up_connection() has run, as it does in the background on a server
+# Sheets calls go to the local stand-in (sheets_server.py), answering each request after --latency seconds.
+#
+# Usage:
+#   python -m benchmarks.startup_profile
+#   python -m benchmarks.startup_profile --repeat 5 --latency 0.15 --json startup.json
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "online_capstone.py")
+IMPORTED_MODULES = ("streamlit", "pandas", "gspread", "online_capstone")
+HEAVY_MODULES = ("pandas", "gspread", "pyarrow")
+
+
+def _child_env():
+    env = dict(os.environ)
+    scratch = tempfile.mkdtemp(prefix="capstone-startup-")
+    env["CAPSTONE_OUTBOX_PATH"] = os.path.join(scratch, "outbox.sqlite3")
+    env["CAPSTONE_DRAFTS_PATH"] = os.path.join(scratch, "drafts.sqlite3")
+    env["CAPSTONE_MIRROR_PATH"] = os.path.join(scratch, "mirror.sqlite3")
+    env.setdefault("CAPSTONE_LOG_LEVEL", "WARNING")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (REPO_ROOT, env.get("PYTHONPATH"))))
+    return env
+
+
+def import_time_ms(module):
+    # Cumulative ms for `module` in a fresh interpreter; -X importtime lines are "self | cumulative | name"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True, check=True)
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module and not parts[2].startswith("  "):
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def run_child(*args):
+    result = subprocess.run([sys.executable, "-m", "benchmarks.startup_profile", "--child", *args],
+                            cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def child_first_run():
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return {"first_run_ms": elapsed, "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules]}
+
+
+def child_first_submit(warm, latency):
+    import gspread
+    from benchmarks.fake_gspread import FAKE_SECRETS, install_secrets
+    from benchmarks.load_test import load_app, make_submission
+    from benchmarks.sheets_server import SheetsServer, SheetsState, local_client
+
+    server = SheetsServer(SheetsState(latency=latency)).start()
+    try:
+        gspread.service_account_from_dict = lambda *a, **kw: local_client(server.base_url)
+        app = load_app()
+        install_secrets(FAKE_SECRETS)
+        warmup_ms = None
+        if warm:
+            start = time.perf_counter()
+            app.warm_up_connection()
+            warmup_ms = (time.perf_counter() - start) * 1000
+        data = make_submission(app, 1, "startup", 1)
+        start = time.perf_counter()
+        if not app.save_to_gsheets_new_row(data):
+            raise RuntimeError("First submit failed")
+        submit_ms = (time.perf_counter() - start) * 1000
+        return {"submit_ms": submit_ms, "warmup_ms": warmup_ms, "profile": app.get_startup_profile()}
+    finally:
+        server.stop()
+
+
+def median(samples):
+    return statistics.median(samples) if samples else float("nan")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Start-up profile of the capstone tracker")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per measurement (median reported)")
+    parser.add_argument("--latency", type=float, default=0.1, help="stand-in Sheets latency per request (s)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child: # One measurement inside a fresh interpreter; prints a JSON line
+        mode = args.child[0]
+        result = child_first_run() if mode == "first-run" else child_first_submit(mode == "first-submit-warm", args.latency)
+        print(json.dumps(result))
+        return 0
+
+    report = {}
+    for module in IMPORTED_MODULES:
+        report[f"import_{module}_ms"] = median([import_time_ms(module) for _ in range(args.repeat)])
+    first_runs = [run_child("first-run") for _ in range(args.repeat)]
+    report["first_run_ms"] = median([r["first_run_ms"] for r in first_runs])
+    report["first_run_heavy_modules"] = first_runs[-1]["heavy_modules"]
+    latency_args = ("--latency", str(args.latency))
+    cold = [run_child("first-submit-cold", *latency_args) for _ in range(args.repeat)]
+    warm = [run_child("first-submit-warm", *latency_args) for _ in range(args.repeat)]
+    report["first_submit_cold_ms"] = median([r["submit_ms"] for r in cold])
+    report["first_submit_warm_ms"] = median([r["submit_ms"] for r in warm])
+    report["warmup_ms"] = median([r["warmup_ms"] for r in warm])
+    report["cold_phases_first_ms"] = cold[-1]["profile"]
+
+    for name, value in report.items():
+        if isinstance(value, float):
+            print(f"{name:<28}{value:>10.1f}")
+        elif isinstance(value, dict):
+            print(name)
+            for phase, ms in sorted(value.items(), key=lambda item: -item[1]):
+                print(f"  {phase:<26}{ms:>10.1f}")
+        else:
+            print(f"{name:<28}{', '.join(value) or '-':>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
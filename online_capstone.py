@@ -1,549 +1,2539 @@
-import streamlit as st
-import pandas as pd
-from datetime import datetime
-import os
-import csv
-import io
-import gspread
-import gspread_dataframe as gd
-
-# --- Translation Dictionaries (V9 - User Revised Questions for Day 1, 2, 3) ---
-TRANSLATIONS = {
-    "en": {
-        "app_title": "Capstone Meeting Tracker",
-        "language_select": "Select Language / 言語",
-        "sidebar_title": "Meeting Information",
-        "group_number": "Group Number", "group_number_help": "Which group is presenting?",
-        "time_slot": "Time Slot (e.g., 10:30)", "time_slot_help": "Enter the scheduled meeting time manually (e.g., 10:30, 14:00).",
-        "date": "Date", "date_help": "Date of the meeting.",
-        "project_title": "Project Title", "project_title_help": "Official name of your Automotive Data Pipeline project.",
-        "current_research_question": "Current Research Question(s)", "current_research_question_help": "What specific questions are you trying to answer? This might evolve each day!",
-        "note_taker": "Note Taker", "note_taker_help": "Who is responsible for documenting this meeting?",
-        "download_student_copy": "Click Here to Download Your Copy",
-        "submit_and_download": "Submit to Instructor & Download",
-        "submission_success": "Data submitted to Instructor (Google Sheets) successfully!",
-        "submission_gsheets_error": "Failed to submit to Google Sheets. Please contact instructor. Your data was NOT saved.",
-        "submission_error": "Error in form data. Please ensure required fields are filled.",
-        "file_will_be_named": "File will be named:",
-        "hint_visibility": "ℹ️ Need guidance? Hover over '❓' next to each field for stakeholder prompts!",
-        "important_label": "Important",
-        "footer_submission_reminder": "Please ensure your meeting notes are submitted by 5:30 PM today. Timely submissions are crucial for accurate feedback and effective project tracking.",
-
-        # Day 1
-        "day_1_tab": "🗓️ Day 1 – Kickoff & First Pitch",
-        "day_1_value_prop": "Value Proposition", "day_1_value_prop_help": "What insight will this bring? What success will it enable for me (the stakeholder)?", "day_1_value_prop_placeholder": "E.g., 'This project will show us which car features most impact EV range, helping us target our marketing...'",
-        "day_1_proposed_features_investigation": "Proposed Features/Investigation", "day_1_proposed_features_investigation_help": "What are the core features you plan to build or areas you will investigate initially?", "day_1_proposed_features_investigation_placeholder": "E.g., 'Investigate impact of X on Y, Develop data import for Z dataset, Core user authentication...'",
-        "day_1_team_roles": "Team Roles & Responsibilities", "day_1_team_roles_help": "Who is Product Owner? Scrum Master? Who does what?", "day_1_team_roles_placeholder": "E.g., 'A: PO, B: Scrum Master, C: Lead Dev (Python), D: DB & SQL Lead...'",
-        "day_1_action_items_day2": "Action Items for Day 2", "day_1_action_items_day2_help": "What must be achieved by tomorrow?", "day_1_action_items_day2_placeholder": "E.g., '1. Finalize DB Schema. 2. Implement Python import for 2 datasets. 3. Start cleaning functions.'",
-        "day_1_meeting_feedback": "Meeting Notes/Feedback", "day_1_meeting_feedback_help": "Key discussion points, decisions, stakeholder input, or instructor feedback from today's meeting.", "day_1_meeting_feedback_placeholder": "E.g., 'Stakeholder emphasized need for clear 'range' definition. Decided to use 'EPA Est. Range'. Instructor suggested focusing on research question X.'",
-
-        # Day 2
-        "day_2_tab": "🗓️ Day 2 – MVP Build Day",
-        "day_2_datasets_imported": "Datasets Imported (>=2)", "day_2_datasets_imported_help": "Which 2+ datasets are imported? Show proof if possible!", "day_2_datasets_imported_placeholder": "E.g., 'EV_Specs.csv and US_Population_2022.csv are now loading via Python scripts.'",
-        "day_2_data_transformations": "Data Transformations", "day_2_data_transformations_help": "Describe the data cleaning, preprocessing, or transformation steps applied. What challenges?", "day_2_data_transformations_placeholder": "E.g., 'Cleaned 'range' (handling 'N/A') and 'price' (removing '$'). Stuck on date formats. Transformed feature X using Y.'",
-        "day_2_sqlite_tables_queries": "SQLite Tables and Queries", "day_2_sqlite_tables_queries_help": "Describe the database tables created and any key SQL queries planned or executed. Any issues?", "day_2_sqlite_tables_queries_placeholder": "E.g., ''vehicles' & 'locations' tables created. Planning to JOIN them. Query for AVG range by state drafted.'",
-        "day_2_blockers_idle": "Blockers / Issues", "day_2_blockers_idle_help": "What's stopping progress?", "day_2_blockers_idle_placeholder": "E.g., 'Member D is blocked waiting for cleaned data. Need to prioritize cleaning script.'",
-        "day_2_backlog": "Backlog", "day_2_backlog_help": "What was planned for this iteration and what was achieved? Update on backlog items.", "day_2_backlog_placeholder": "E.g., 'Planned: DB Schema & Import. Achieved: Both. Cleaning is 50% done. Backlog updated.'",
-        "day_2_action_items_day3": "Action Items for Day 3", "day_2_action_items_day3_help": "Goals for tomorrow.", "day_2_action_items_day3_placeholder": "E.g., '1. Complete cleaning. 2. Populate DB. 3. Write first SQL query.'",
-        "day_2_meeting_feedback": "Meeting Notes/Feedback", "day_2_meeting_feedback_help": "Key discussion points, decisions, stakeholder input, or instructor feedback from today's meeting.", "day_2_meeting_feedback_placeholder": "E.g., 'Discussed data cleaning strategy. Stakeholder asked about logging. Instructor: ensure E2E pipeline runs soon.'",
-
-        # Day 3
-        "day_3_tab": "🗓️ Day 3 – Soft Feature Freeze",
-        "day_3_research_question_status": "Research Question Status", "day_3_research_question_status_help": "Update on your progress towards answering the main research question(s). Are your findings aligning?", "day_3_research_question_status_placeholder": "E.g., 'Initial analysis of dataset X suggests Y. This aligns with RQ1. Need further query Z for RQ2.'",
-        "day_3_features_reports": "Features and Reports", "day_3_features_reports_help": "Status of key features developed and reports generated. Is the pipeline fully operational (Import -> Clean -> DB -> SQL -> Report)?", "day_3_features_reports_placeholder": "E.g., 'Pipeline is operational! Report script generates findings for Q1. Feature X is complete.'",
-        "day_3_readme_documentation": "README and Documentations", "day_3_readme_documentation_help": "Is the README updated with necessary information (setup, schema, findings, query explanations)? Other documentation status. Can someone *not* on your team follow it?", "day_3_readme_documentation_placeholder": "E.g., 'README updated with schema and first query. Setup instructions are clear. Another group confirmed understanding.'",
-        "day_3_action_items_day4": "Action Items for Day 4", "day_3_action_items_day4_help": "Goals for tomorrow.", "day_3_action_items_day4_placeholder": "E.g., '1. Finalize report script. 2. Add 2nd SQL query. 3. Update README completely. 4. Code cleanup & comments.'",
-        "day_3_meeting_feedback": "Meeting Notes/Feedback", "day_3_meeting_feedback_help": "Key discussion points, decisions, stakeholder input, or instructor feedback from today's meeting.", "day_3_meeting_feedback_placeholder": "E.g., 'Reviewed Q1 results. Discussed report format. Stakeholder pushed for query complexity. Instructor: Impressive pipeline! Make insights clearer.'",
-
-        # Day 4 (Unchanged as per request to modify Day 1-3)
-        "day_4_tab": "🗓️ Day 4 – Final Prep & Feature Freeze",
-        "day_4_feature_status": "Feature Freeze Confirmed", "day_4_feature_status_help": "Confirm: Only bug fixes and polish now.", "day_4_feature_status_placeholder": "",
-        "day_4_sql_queries_report": "SQL Queries in Report", "day_4_sql_queries_report_help": "List the >=2 key queries and their purpose.", "day_4_sql_queries_report_placeholder": "E.g., '1. AVG_Range_by_State (JOIN, GROUP BY). 2. Top_5_EVs_by_Count (COUNT, ORDER BY, LIMIT).'",
-        "day_4_report_readability": "Report Readability/Relevance", "day_4_report_readability_help": "Is the report clear? Can I understand it?", "day_4_report_readability_placeholder": "E.g., 'Report includes intro, query explanations, results, and summary. Formatted with markdown.'",
-        "day_4_readme_checklist_title": "README Final Checklist", "day_4_readme_checklist_title_help": "Is the final documentation 100% complete?", "day_4_readme_checklist_title_placeholder": "",
-        "day_4_readme_theme_summary": "Theme Summary Included", "day_4_readme_theme_summary_help": "", "day_4_readme_theme_summary_placeholder": "",
-        "day_4_readme_setup_instructions": "Setup & Run Instructions Included", "day_4_readme_setup_instructions_help": "", "day_4_readme_setup_instructions_placeholder": "",
-        "day_4_readme_final_schema": "Final Schema Design Included", "day_4_readme_final_schema_help": "", "day_4_readme_final_schema_placeholder": "",
-        "day_4_readme_sql_queries_explanation": "SQL Queries & Output Explanation Included", "day_4_readme_sql_queries_explanation_help": "", "day_4_readme_sql_queries_explanation_placeholder": "",
-        "day_4_readme_summary_findings": "Summary of Findings Included", "day_4_readme_summary_findings_help": "", "day_4_readme_summary_findings_placeholder": "",
-        "day_4_code_quality": "Code Quality Check", "day_4_code_quality_help": "Is it modular, commented, readable?", "day_4_code_quality_placeholder": "E.g., 'Refactored into functions. Added docstrings. Ran linter. Followed PEP8.'",
-        "day_4_sprint_records": "Sprint Records Link/Location", "day_4_sprint_records_help": "Where can I see the journey?", "day_4_sprint_records_placeholder": "E.g., 'Jira board link / Confluence page with sprint summaries.'",
-        "day_4_output_insightfulness": "Output Insightfulness", "day_4_output_insightfulness_help": "Is this genuinely useful? What's the 'so what'?", "day_4_output_insightfulness_placeholder": "E.g., 'Our key finding is X, which suggests the business should focus on Y...'",
-        "day_4_presentation_confidence": "Non-Technical Presentation Readiness", "day_4_presentation_confidence_help": "Are you ready to present clearly to non-tech people?", "day_4_presentation_confidence_placeholder": "E.g., 'We have practiced the flow, focusing on the 'why' and the results, not just the code.'",
-        "day_4_final_questions_issues": "Final Questions / Issues", "day_4_final_questions_issues_help": "Any last-minute concerns?", "day_4_final_questions_issues_placeholder": "E.g., 'Concerned about running live - will use pre-generated report as backup.'",
-        "day_4_instructor_feedback": "Stakeholder Feedback", "day_4_instructor_feedback_help": "Final notes from the 'stakeholder'.", "day_4_instructor_feedback_placeholder": "E.g., 'Looks great! Ready for the presentation. Focus on clarity.'",
-    },
-    "ja": {
-        "app_title": "キャップストーン会議トラッカー",
-        "language_select": "言語を選択 / Select Language",
-        "sidebar_title": "会議情報",
-        "group_number": "グループ番号", "group_number_help": "どのグループが発表していますか？",
-        "time_slot": "時間枠 (例: 10:30)", "time_slot_help": "予定されている会議の時間を手動で入力してください (例: 10:30, 14:00)。",
-        "date": "日付", "date_help": "会議の日付です。",
-        "project_title": "プロジェクトタイトル", "project_title_help": "あなたの自動車データパイプラインプロジェクトの正式名称です。",
-        "current_research_question": "現在の研究課題", "current_research_question_help": "どのような具体的な質問に答えようとしていますか？ これは日々変化する可能性があります！",
-        "note_taker": "ノートテイカー", "note_taker_help": "この会議の記録担当者は誰ですか？",
-        "download_student_copy": "ここをクリックしてコピーをダウンロード",
-        "submit_and_download": "教員に提出＆ダウンロード",
-        "submission_success": "データが教員(Google Sheets)に正常に送信されました！",
-        "submission_gsheets_error": "Google Sheetsへの送信に失敗しました。教員に連絡してください。データは保存されていません。",
-        "submission_error": "フォームデータのエラー。必須項目がすべて入力されていることを確認してください。",
-        "file_will_be_named": "ファイル名:",
-        "hint_visibility": "ℹ️ ガイダンスが必要ですか？各項目隣の '❓' にカーソルを合わせると、ステークホルダーからのプロンプトが表示されます！",
-        "important_label": "重要",
-        "footer_submission_reminder": "本日の午後5時30分までに、必ず会議の記録を提出してください。正確なフィードバックと効果的なプロジェクト進捗管理のため、期限内の提出が不可欠です。",
-
-        # Day 1 (Japanese)
-        "day_1_tab": "🗓️ 1日目 – キックオフ＆最初のピッチ",
-        "day_1_value_prop": "価値提案", "day_1_value_prop_help": "これはどのような洞察をもたらしますか？私（ステークホルダー）にどのような成功をもたらしますか？", "day_1_value_prop_placeholder": "例: 「このプロジェクトは、どの車の機能がEV航続距離に最も影響するかを示し、マーケティングのターゲット設定に役立ちます...」",
-        "day_1_proposed_features_investigation": "提案機能/調査内容", "day_1_proposed_features_investigation_help": "初期に構築予定のコア機能や調査する分野は何ですか？", "day_1_proposed_features_investigation_placeholder": "例: 「XのYへの影響調査、Zデータセットのデータインポート開発、コアユーザー認証...」",
-        "day_1_team_roles": "チームの役割と責任", "day_1_team_roles_help": "POは誰ですか？SMは？誰が何をしますか？", "day_1_team_roles_placeholder": "例: 「A: PO, B: SM, C: リード開発(Python), D: DB & SQL担当...」",
-        "day_1_action_items_day2": "2日目のアクションアイテム", "day_1_action_items_day2_help": "明日までに何を達成する必要がありますか？", "day_1_action_items_day2_placeholder": "例: 「1. DBスキーマを最終化。2. 2つのデータセットのPythonインポートを実装。3. クリーニング関数を開始。」",
-        "day_1_meeting_feedback": "会議メモ/フィードバック", "day_1_meeting_feedback_help": "今日の会議での主要な議論点、決定事項、ステークホルダーからの意見、または教員からのフィードバック。", "day_1_meeting_feedback_placeholder": "例: 「ステークホルダーが明確な'航続距離'定義の必要性を強調。'EPA推定航続距離'を使用することに決定。教員は研究課題Xに焦点を当てるよう提案。」",
-
-        # Day 2 (Japanese)
-        "day_2_tab": "🗓️ 2日目 – MVPビルドデイ",
-        "day_2_datasets_imported": "インポート済みデータセット (>=2)", "day_2_datasets_imported_help": "どの2つ以上のデータセットがインポートされましたか？可能なら証拠を見せてください！", "day_2_datasets_imported_placeholder": "例: 「EV_Specs.csvとUS_Population_2022.csvがPythonスクリプトでロードされています。」",
-        "day_2_data_transformations": "データ変換", "day_2_data_transformations_help": "適用したデータクリーニング、前処理、または変換のステップを記述してください。課題は？", "day_2_data_transformations_placeholder": "例: 「'航続距離'（'N/A'処理）と'価格'（'$'削除）をクリーニング。日付形式で苦戦。特徴量XをYを用いて変換。」",
-        "day_2_sqlite_tables_queries": "SQLiteテーブルとクエリ", "day_2_sqlite_tables_queries_help": "作成したデータベーステーブルと、計画または実行した主要なSQLクエリを記述してください。問題は？", "day_2_sqlite_tables_queries_placeholder": "例: 「'vehicles'と'locations'テーブルを作成。それらをJOINする計画。州別の平均航続距離のクエリを作成済み。」",
-        "day_2_blockers_idle": "ブロッカー / 課題", "day_2_blockers_idle_help": "進捗を妨げているものは？", "day_2_blockers_idle_placeholder": "例: 「メンバーDはクリーニング済みデータを待っていてブロック中。クリーニングスクリプトを優先する必要がある。」",
-        "day_2_backlog": "バックログ", "day_2_backlog_help": "このイテレーションで何を計画し、何を達成しましたか？バックログ項目の更新。", "day_2_backlog_placeholder": "例: 「計画: DBスキーマとインポート。達成: 両方。クリーニングは50%完了。バックログ更新済み。」",
-        "day_2_action_items_day3": "3日目のアクションアイテム", "day_2_action_items_day3_help": "明日の目標。", "day_2_action_items_day3_placeholder": "例: 「1. クリーニング完了。2. DBにデータ投入。3. 最初のSQLクエリ作成。」",
-        "day_2_meeting_feedback": "会議メモ/フィードバック", "day_2_meeting_feedback_help": "今日の会議での主要な議論点、決定事項、ステークホルダーからの意見、または教員からのフィードバック。", "day_2_meeting_feedback_placeholder": "例: 「データクリーニング戦略を議論。ステークホルダーがログ記録について質問。教員: E2Eパイプラインを早く実行できるように。」",
-
-        # Day 3 (Japanese)
-        "day_3_tab": "🗓️ 3日目 – ソフト機能フリーズ",
-        "day_3_research_question_status": "研究課題の状況", "day_3_research_question_status_help": "主要な研究課題への回答に向けた進捗状況を更新してください。調査結果は整合していますか？", "day_3_research_question_status_placeholder": "例: 「データセットXの初期分析はYを示唆。これはRQ1と整合。RQ2のためにはさらなるクエリZが必要。」",
-        "day_3_features_reports": "機能とレポート", "day_3_features_reports_help": "開発した主要機能と生成されたレポートの状況。パイプラインは完全に稼働していますか（インポート→クリーン→DB→SQL→レポート）？", "day_3_features_reports_placeholder": "例: 「パイプラインは稼働中！レポートスクリプトはQ1の調査結果を生成。機能Xは完了。」",
-        "day_3_readme_documentation": "READMEとドキュメント", "day_3_readme_documentation_help": "READMEは必要な情報（セットアップ、スキーマ、調査結果、クエリ説明）で更新されていますか？その他のドキュメントの状況。チーム外の誰かがそれをフォローできますか？", "day_3_readme_documentation_placeholder": "例: 「READMEにスキーマと最初のクエリを更新。セットアップ手順は明確。別のグループが理解を確認。」",
-        "day_3_action_items_day4": "4日目のアクションアイテム", "day_3_action_items_day4_help": "明日の目標。", "day_3_action_items_day4_placeholder": "例: 「1. レポートスクリプト最終化。2. 2番目のSQLクエリ追加。3. README完全更新。4. コードクリーンアップ＆コメント。」",
-        "day_3_meeting_feedback": "会議メモ/フィードバック", "day_3_meeting_feedback_help": "今日の会議での主要な議論点、決定事項、ステークホルダーからの意見、または教員からのフィードバック。", "day_3_meeting_feedback_placeholder": "例: 「Q1の結果をレビュー。レポート形式を議論。ステークホルダーがクエリの複雑さを要求。教員: 素晴らしいパイプライン！洞察をより明確に。」",
-
-        # Day 4 (Japanese - Unchanged as per request to modify Day 1-3)
-        "day_4_tab": "🗓️ 4日目 – 最終準備＆機能フリーズ",
-        "day_4_feature_status": "機能フリーズ確認", "day_4_feature_status_help": "確認：今はバグ修正と磨き上げのみ。", "day_4_feature_status_placeholder": "",
-        "day_4_sql_queries_report": "レポート内のSQLクエリ", "day_4_sql_queries_report_help": "レポート内の2つ以上の主要なクエリとその目的をリストアップしてください。", "day_4_sql_queries_report_placeholder": "例: 「1. 州別平均航続距離 (JOIN, GROUP BY)。2. 台数別トップ5 EV (COUNT, ORDER BY, LIMIT)。」",
-        "day_4_report_readability": "レポートの可読性/関連性", "day_4_report_readability_help": "レポートは明確ですか？私が理解できますか？", "day_4_report_readability_placeholder": "例: 「レポートには序論、クエリ説明、結果、要約が含まれています。マークダウンでフォーマット済み。」",
-        "day_4_readme_checklist_title": "README 最終チェックリスト", "day_4_readme_checklist_title_help": "最終ドキュメントは100%完成していますか？", "day_4_readme_checklist_title_placeholder": "",
-        "day_4_readme_theme_summary": "テーマ概要を含む", "day_4_readme_theme_summary_help": "", "day_4_readme_theme_summary_placeholder": "",
-        "day_4_readme_setup_instructions": "セットアップと実行手順を含む", "day_4_readme_setup_instructions_help": "", "day_4_readme_setup_instructions_placeholder": "",
-        "day_4_readme_final_schema": "最終スキーマ設計を含む", "day_4_readme_final_schema_help": "", "day_4_readme_final_schema_placeholder": "",
-        "day_4_readme_sql_queries_explanation": "SQLクエリと出力の説明を含む", "day_4_readme_sql_queries_explanation_help": "", "day_4_readme_sql_queries_explanation_placeholder": "",
-        "day_4_readme_summary_findings": "調査結果の概要を含む", "day_4_readme_summary_findings_help": "", "day_4_readme_summary_findings_placeholder": "",
-        "day_4_code_quality": "コード品質チェック", "day_4_code_quality_help": "モジュール化され、コメントがあり、読みやすいですか？", "day_4_code_quality_placeholder": "例: 「関数にリファクタリング。ドックストリング追加。リンター実行。PEP8準拠。」",
-        "day_4_sprint_records": "スプリント記録リンク/場所", "day_4_sprint_records_help": "その道のりはどこで見られますか？", "day_4_sprint_records_placeholder": "例: 「Jiraボードリンク / スプリントサマリー付きConfluenceページ。」",
-        "day_4_output_insightfulness": "出力の洞察力", "day_4_output_insightfulness_help": "これは本当に役立ちますか？「だから何？」という点は？", "day_4_output_insightfulness_placeholder": "例: 「主要な発見はXであり、これはビジネスがYに集中すべきことを示唆しています...」",
-        "day_4_presentation_confidence": "非技術者向けプレゼン準備", "day_4_presentation_confidence_help": "これを非技術的な聴衆に明確に説明する準備はできていますか？", "day_4_presentation_confidence_placeholder": "例: 「コードだけでなく、『なぜ』と結果に焦点を当てて流れを練習しました。」",
-        "day_4_final_questions_issues": "最終的な質問 / 課題", "day_4_final_questions_issues_help": "最終プレゼンテーション前の最後の懸念事項はありますか？", "day_4_final_questions_issues_placeholder": "例: 「ライブ実行に懸念あり - バックアップとして事前生成レポートを使用します。」",
-        "day_4_instructor_feedback": "ステークホルダーからのフィードバック", "day_4_instructor_feedback_help": "「ステークホルダー」からの最終メモ。", "day_4_instructor_feedback_placeholder": "例: 「素晴らしい出来栄え！プレゼンテーションの準備は万端。明瞭さを重視してください。」",
-    }
-}
-
-# --- Helper Functions ---
-def get_translation(lang_code, key):
-    return TRANSLATIONS.get(lang_code, TRANSLATIONS["en"]).get(key, key)
-
-def get_help_text(lang_code, key):
-    help_key = f"{key}_help"
-    return TRANSLATIONS.get(lang_code, TRANSLATIONS["en"]).get(help_key, "")
-
-def get_placeholder_text(lang_code, key):
-    placeholder_key = f"{key}_placeholder"
-    return TRANSLATIONS.get(lang_code, TRANSLATIONS["en"]).get(placeholder_key, "")
-
-def initialize_session_state():
-    if "lang" not in st.session_state:
-        st.session_state.lang = "en"
-    base_keys = ["group_number", "time_slot", "project_title", "current_research_question", "note_taker"]
-    for key in base_keys:
-        if key not in st.session_state:
-            st.session_state[key] = ""
-    if "date" not in st.session_state:
-        st.session_state.date = datetime.now().date()
-
-    # Dynamically get all form field keys from the TRANSLATIONS dictionary
-    # These are keys that start with "day_" and do not end with common suffixes for non-input elements
-    all_day_form_keys = []
-    for lang_code in TRANSLATIONS: # Iterate through each language dictionary
-        for key in TRANSLATIONS[lang_code]:
-            if key.startswith("day_") and not key.endswith(("_help", "_tab", "_title", "_placeholder")):
-                all_day_form_keys.append(key)
-    all_day_form_keys = sorted(list(set(all_day_form_keys))) # Get unique keys and sort
-
-    for key in all_day_form_keys:
-        if key not in st.session_state:
-            if "status" in key or "readme_" in key or key == "day_4_feature_status": # Checkboxes
-                st.session_state[key] = False
-            else: # Text inputs/areas
-                st.session_state[key] = ""
-    if "submitted_and_download_ready" not in st.session_state:
-        st.session_state.submitted_and_download_ready = False
-    if "current_download_data" not in st.session_state:
-        st.session_state.current_download_data = {}
-
-def get_all_form_data():
-    data = {
-        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Language": st.session_state.lang,
-        "GroupNumber": st.session_state.get("group_number", ""),
-        "MeetingTimeSlot": str(st.session_state.get("time_slot", "")),
-        "MeetingDate": str(st.session_state.get("date", "")),
-        "ProjectTitle": st.session_state.get("project_title", ""),
-        "CurrentResearchQuestion": st.session_state.get("current_research_question", ""),
-        "NoteTaker": st.session_state.get("note_taker", ""),
-        "MeetingDayFocus": "" # Will be filled in render_buttons before saving
-    }
-    # Add all day-specific fields dynamically from session state based on TRANSLATIONS keys
-    all_day_keys_flat = []
-    for lang_code in TRANSLATIONS:
-        for k in TRANSLATIONS[lang_code]:
-            if k.startswith("day_") and not k.endswith(("_help", "_tab", "_title", "_placeholder")):
-                all_day_keys_flat.append(k)
-    all_day_keys_unique = sorted(list(set(all_day_keys_flat)))
-
-    for key in all_day_keys_unique:
-        data[key] = st.session_state.get(key, False if "status" in key or "readme_" in key else "") # Handle booleans for checkboxes
-    return data
-
-def get_student_download_content(active_day_key, lang):
-    content = f"# {get_translation(lang, 'app_title')}\n\n"
-    content += f"## {get_translation(lang, 'sidebar_title')}\n"
-    content += f"- **{get_translation(lang, 'group_number')}**: {st.session_state.get('group_number', '')}\n"
-    content += f"- **{get_translation(lang, 'time_slot')}**: {st.session_state.get('time_slot', '')}\n"
-    content += f"- **{get_translation(lang, 'date')}**: {st.session_state.get('date', '')}\n"
-    content += f"- **{get_translation(lang, 'project_title')}**: {st.session_state.get('project_title', '')}\n"
-    content += f"- **{get_translation(lang, 'note_taker')}**: {st.session_state.get('note_taker', '')}\n\n"
-    try:
-        day_prefix = active_day_key.split('_tab')[0] + "_" # e.g., "day_1_"
-    except Exception:
-        day_prefix = "day_1_" # Fallback
-    content += f"## {get_translation(lang, active_day_key)}\n"
-
-    # Filter keys more carefully: must exist in the CURRENT language's dictionary for that day
-    day_specific_keys = [
-        k for k in TRANSLATIONS[lang].keys()
-        if k.startswith(day_prefix) and
-           k != active_day_key and
-           not k.endswith(("_help", "_title", "_placeholder", "_tab"))
-    ]
-    # Also add the common "current_research_question" if it's not already listed by prefix
-    # However, it's handled separately below.
-
-    for key_id in day_specific_keys:
-        label = get_translation(lang, key_id)
-        value = st.session_state.get(key_id, "") # Get value from session state
-        if isinstance(st.session_state.get(key_id), bool): # Check original type from session_state for checkboxes
-            value = ("Yes" if value else "No") if lang == "en" else ("はい" if value else "いいえ")
-        content += f"### {label}\n{value}\n\n"
-
-    # Add Current Research Question separately as it's common to all tabs but tied to session state
-    content += f"### {get_translation(lang, 'current_research_question')}\n" # Label for the section
-    content += f"{st.session_state.get('current_research_question', '')}\n\n" # The actual content
-
-    return content
-
-@st.cache_resource # Cache the gspread connection
-def connect_gsheets():
-    try:
-        creds_dict = st.secrets["gcp_service_account"]
-        gc = gspread.service_account_from_dict(creds_dict)
-        return gc
-    except Exception as e:
-        st.error(f"GSheets Connect Error (check st.secrets configuration): {e}")
-        return None
-
-def save_to_gsheets_new_row(data_dict):
-    gc = connect_gsheets()
-    if not gc:
-        return False
-
-    SHEET_NAME = "All_Submissions_V2" # Consider a new sheet name if schema changes significantly
-    # Define the full list of headers based on get_all_form_data structure
-    expected_headers = list(data_dict.keys())
-
-    try:
-        spreadsheet_id = st.secrets["gcp_spreadsheet"]["key"]
-        sh = gc.open_by_key(spreadsheet_id)
-
-        try:
-            worksheet = sh.worksheet(SHEET_NAME)
-            header_row_values = worksheet.row_values(1) if worksheet.row_count > 0 else []
-            # If headers are missing, mismatched, or only placeholder headers exist, rewrite them
-            if not header_row_values or sorted(header_row_values) != sorted(expected_headers):
-                # Check if the sheet is practically empty or headers are truly different
-                if worksheet.row_count <= 1 or not header_row_values : # If empty or just a placeholder row
-                    worksheet.clear() # Clears all values but keeps the sheet
-                    worksheet.update([expected_headers]) # Write headers as the first row
-                    # st.toast(f"Headers updated/written in '{SHEET_NAME}'.") # Optional: for debugging
-                # If headers exist but don't match, and sheet has data, it's a more complex migration.
-                # For now, we assume new data will be appended, and columns might not align perfectly with old data.
-                # GSpread append_row handles this by adding new columns if necessary at the end of the sheet,
-                # or filling existing columns. This might lead to sparse rows if old data had more columns.
-        except gspread.WorksheetNotFound:
-            worksheet = sh.add_worksheet(title=SHEET_NAME, rows="1", cols=len(expected_headers))
-            worksheet.update([expected_headers]) # Write headers as the first row
-            # st.toast(f"Created new sheet '{SHEET_NAME}' and added headers.") # Optional: for debugging
-
-        # Prepare data row in the order of expected_headers
-        data_row = [data_dict.get(header, "") for header in expected_headers]
-        worksheet.append_row(data_row, value_input_option='USER_ENTERED')
-        return True
-    except gspread.exceptions.APIError as e:
-        st.error(f"GSheets API Error: {e}. Check Google Sheet Sharing settings or API quotas.")
-        return False
-    except Exception as e:
-        st.error(f"GSheets Write Error: {e}")
-        return False
-
-def render_day_inputs(lang, day_prefix):
-    # Get keys relevant for the current day and language from TRANSLATIONS
-    keys = [k for k in TRANSLATIONS[lang] if k.startswith(day_prefix) and not k.endswith(("_help", "_tab", "_title", "_placeholder"))]
-
-    for key in keys:
-        label = get_translation(lang, key)
-        help_text = get_help_text(lang, key)
-        placeholder = get_placeholder_text(lang, key)
-
-        # Skip any key that accidentally gets here if it's a title-like key (though filtered above)
-        if key == day_prefix + "title": continue
-
-        # Specific handling for Day 4 README checklist title (if it were part of this generic function)
-        if key == "day_4_readme_checklist_title": # This specific key is handled in main() for Day 4
-            st.markdown(f"**{label}**"); st.caption(f"*{help_text}*"); continue
-
-        # Determine widget type based on key name conventions or explicitly
-        if "feature_status" in key or "readme_" in key: # Checkboxes
-             # Ensure boolean default from session_state if key exists, otherwise False
-            default_value = st.session_state.get(key, False)
-            if not isinstance(default_value, bool): # Correct if somehow not a bool
-                default_value = False
-            st.session_state[key] = st.checkbox(label, value=default_value, help=help_text, key=f"widget_{key}")
-        elif "link" in key: # Text input for links
-            st.session_state[key] = st.text_input(label, value=st.session_state.get(key, ""), placeholder=placeholder, help=help_text, key=f"widget_{key}")
-        else: # Default to text_area for other fields
-            st.session_state[key] = st.text_area(label, value=st.session_state.get(key, ""), placeholder=placeholder, help=help_text, height=100, key=f"widget_{key}")
-
-
-def render_buttons(tab_key, lang):
-    group_num = st.session_state.get('group_number', 'GroupX')
-    date_str = str(st.session_state.get('date', 'Date'))
-
-    # Extract day number from tab_key (e.g., "day_1_tab" -> "1")
-    try:
-        day_num_str = tab_key.split('_')[1]
-    except IndexError:
-        day_num_str = "UnknownDay" # Fallback
-
-    download_filename = f"Capstone_Notes_Group{group_num}_Day{day_num_str}_{date_str}.md"
-    # download_placeholder = st.empty() # Not used here, button directly placed
-
-    if st.button(get_translation(lang, "submit_and_download"), key=f"submit_b_{tab_key}"):
-        st.session_state.submitted_and_download_ready = False # Reset flag
-        form_data = get_all_form_data()
-        form_data["MeetingDayFocus"] = get_translation(lang, tab_key) # Store the translated tab name as focus
-
-        # Basic validation for common fields
-        required_sidebar_fields = ["group_number", "time_slot", "project_title", "note_taker"]
-        missing_fields = [get_translation(lang, f) for f in required_sidebar_fields if not st.session_state.get(f)]
-        if missing_fields:
-            st.error(f"{get_translation(lang, 'submission_error')} {get_translation(lang, 'Please fill these common fields')}: {', '.join(missing_fields)}")
-            return # Stop submission
-
-        if save_to_gsheets_new_row(form_data):
-            st.success(get_translation(lang, "submission_success"))
-            st.session_state.current_download_data = {
-                "content": get_student_download_content(tab_key, lang), # Pass active tab_key
-                "filename": download_filename
-            }
-            st.session_state.submitted_and_download_ready = True
-            # Rerun to make download button available immediately below
-            st.rerun()
-        else:
-            st.error(get_translation(lang, "submission_gsheets_error"))
-            st.session_state.submitted_and_download_ready = False
-
-
-    if st.session_state.submitted_and_download_ready:
-        # Ensure the active tab for download matches the one submitted
-        # This check might be redundant if rerun clears other states, but good for safety
-        # For simplicity, we assume if submitted_and_download_ready is true, current_download_data is set.
-        st.download_button(
-            label=get_translation(lang, "download_student_copy"),
-            data=st.session_state.current_download_data.get("content", "Error: No content generated."),
-            file_name=st.session_state.current_download_data.get("filename", "error_filename.md"),
-            mime='text/markdown',
-            key=f"download_btn_active_{tab_key}" # Make key unique if needed, or general
-        )
-        # Optionally reset flag after download button is shown to prevent it from staying across tabs if not desired
-        # However, current logic with rerun might handle this. If download button persists unwantedly:
-        # st.session_state.submitted_and_download_ready = False
-
-
-def main():
-    initialize_session_state() # Initialize first
-    st.set_page_config(layout="wide", page_title=get_translation(st.session_state.lang, "app_title"))
-    st.title(get_translation(st.session_state.lang, "app_title"))
-
-    language_options = {"English": "en", "日本語": "ja"}
-    # Ensure current_lang_display is found, default to English if somehow lang is not in options
-    current_lang_key = st.session_state.get("lang", "en")
-    current_lang_display = [k for k, v in language_options.items() if v == current_lang_key]
-    current_lang_display = current_lang_display[0] if current_lang_display else "English"
-
-
-    selected_language_display = st.sidebar.selectbox(
-        get_translation(st.session_state.lang, "language_select"), # Label uses current lang
-        options=list(language_options.keys()),
-        index=list(language_options.keys()).index(current_lang_display)
-    )
-    new_lang = language_options[selected_language_display]
-
-    if new_lang != st.session_state.lang:
-        st.session_state.lang = new_lang
-        # Clear submission ready flag on language change to avoid showing download for wrong language/content
-        st.session_state.submitted_and_download_ready = False
-        st.session_state.current_download_data = {}
-        st.rerun()
-
-    lang = st.session_state.lang # Set lang after potential rerun
-
-    st.sidebar.header(get_translation(lang, "sidebar_title"))
-    st.session_state.group_number = st.sidebar.text_input(get_translation(lang, "group_number"), value=st.session_state.get("group_number",""), help=get_help_text(lang, "group_number"))
-    st.session_state.time_slot = st.sidebar.text_input(get_translation(lang, "time_slot"), value=st.session_state.get("time_slot",""), help=get_help_text(lang, "time_slot"))
-    st.session_state.date = st.sidebar.date_input(get_translation(lang, "date"), value=st.session_state.get("date", datetime.now().date()), help=get_help_text(lang, "date"))
-    st.session_state.project_title = st.sidebar.text_input(get_translation(lang, "project_title"), value=st.session_state.get("project_title",""), help=get_help_text(lang, "project_title"))
-    st.session_state.note_taker = st.sidebar.text_input(get_translation(lang, "note_taker"), value=st.session_state.get("note_taker",""), help=get_help_text(lang, "note_taker"))
-
-    # Define tab keys and their corresponding prefixes for filtering questions
-    tab_definitions = [
-        ("day_1_tab", "day_1_"),
-        ("day_2_tab", "day_2_"),
-        ("day_3_tab", "day_3_"),
-        ("day_4_tab", "day_4_")
-    ]
-
-    tab_titles = [get_translation(lang, tab_key) for tab_key, _ in tab_definitions]
-    created_tabs = st.tabs(tab_titles)
-
-    # Store which tab was last submitted to manage download button visibility correctly
-    if 'last_submitted_tab_key' not in st.session_state:
-        st.session_state.last_submitted_tab_key = None
-
-
-    for i, (tab_key, day_prefix) in enumerate(tab_definitions):
-        with created_tabs[i]:
-            st.header(get_translation(lang, tab_key)) # Display translated tab header
-            st.info(get_translation(lang, "hint_visibility"))
-
-            # Special handling for Day 4's unique structure (README checklist)
-            if tab_key == "day_4_tab":
-                # Render non-README fields for Day 4
-                day_4_non_readme_keys = [
-                    k for k in TRANSLATIONS[lang]
-                    if k.startswith(day_prefix) and
-                       not k.endswith(("_help", "_tab", "_title", "_placeholder")) and
-                       not k.startswith(day_prefix + "readme_") and # Exclude general readme title itself
-                       k != day_prefix + "readme_checklist_title" # Explicitly exclude this meta-key
-                ]
-                for key_d4 in day_4_non_readme_keys:
-                    label = get_translation(lang, key_d4)
-                    help_text = get_help_text(lang, key_d4)
-                    placeholder = get_placeholder_text(lang, key_d4)
-                    if "feature_status" in key_d4: # Checkbox
-                        default_val_d4_cb = st.session_state.get(key_d4, False)
-                        if not isinstance(default_val_d4_cb, bool): default_val_d4_cb = False
-                        st.session_state[key_d4] = st.checkbox(label, value=default_val_d4_cb, help=help_text, key=f"widget_{key_d4}")
-                    else: # Text Area
-                        st.session_state[key_d4] = st.text_area(label, value=st.session_state.get(key_d4, ""), placeholder=placeholder, help=help_text, height=100, key=f"widget_{key_d4}")
-
-                # Render Day 4 README Checklist Title
-                readme_title_key = day_prefix + "readme_checklist_title"
-                if readme_title_key in TRANSLATIONS[lang]:
-                    st.markdown(f"**{get_translation(lang, readme_title_key)}**")
-                    st.caption(f"*{get_help_text(lang, readme_title_key)}*")
-
-                # Render Day 4 README checklist items (checkboxes)
-                day_4_readme_item_keys = [
-                    k for k in TRANSLATIONS[lang]
-                    if k.startswith(day_prefix + "readme_") and
-                       not k.endswith(("_help", "_title", "_placeholder")) and # Standard exclusions
-                       k != readme_title_key # Exclude the title itself from being a checkbox
-                ]
-                for key_d4_readme in day_4_readme_item_keys:
-                    default_val_d4_cb_readme = st.session_state.get(key_d4_readme, False)
-                    if not isinstance(default_val_d4_cb_readme, bool): default_val_d4_cb_readme = False
-                    st.session_state[key_d4_readme] = st.checkbox(get_translation(lang, key_d4_readme), value=default_val_d4_cb_readme, help=get_help_text(lang, key_d4_readme), key=f"widget_{key_d4_readme}")
-            else:
-                # Generic rendering for Day 1, 2, 3
-                render_day_inputs(lang, day_prefix)
-
-            st.markdown("---")
-            # Current Research Question - Common to all tabs
-            # The label for the text_area itself is a bit redundant due to the subheader, so can be collapsed
-            st.subheader(get_translation(lang, "current_research_question"))
-            st.session_state.current_research_question = st.text_area(
-                label=get_translation(lang, "current_research_question"), # Technically the label for the box
-                value=st.session_state.get("current_research_question", ""),
-                help=get_help_text(lang, "current_research_question"),
-                placeholder=get_placeholder_text(lang, "current_research_question") or "Enter your research questions here...", # Fallback placeholder
-                key=f"research_q_input_{day_prefix}", # Unique key for the text_area widget on each tab
-                label_visibility="collapsed" # Hide the direct label as subheader is used
-            )
-            st.markdown("---")
-
-            # --- Submit and Download Buttons Logic ---
-            group_num = st.session_state.get('group_number', 'GroupX')
-            date_str = str(st.session_state.get('date', datetime.now().strftime('%Y-%m-%d')))
-            try:
-                day_num_str = tab_key.split('_')[1]
-            except IndexError:
-                day_num_str = "CurrentDay"
-
-            download_filename = f"Capstone_Notes_Group{group_num}_Day{day_num_str}_{date_str}.md"
-
-            # Submit Button
-            if st.button(get_translation(lang, "submit_and_download"), key=f"submit_btn_{tab_key}"):
-                st.session_state.submitted_and_download_ready = False # Reset for this submission attempt
-                st.session_state.last_submitted_tab_key = tab_key # Mark this tab as the source of submission
-
-                form_data = get_all_form_data()
-                form_data["MeetingDayFocus"] = get_translation(lang, tab_key) # Set focus to current tab's name
-
-                required_sidebar_fields = ["group_number", "time_slot", "project_title", "note_taker"]
-                missing_fields = [get_translation(lang, f) for f in required_sidebar_fields if not st.session_state.get(f)]
-
-                if missing_fields:
-                    missing_fields_str = ", ".join(missing_fields)
-                    # Try to get a translated "Please fill common fields" or use a default
-                    common_fields_prompt_key = "please_fill_common_fields" # Add this key to TRANSLATIONS if needed
-                    common_fields_prompt = get_translation(lang, common_fields_prompt_key)
-                    if common_fields_prompt == common_fields_prompt_key: # If no translation, use English
-                        common_fields_prompt = "Please fill these common fields"
-                    st.error(f"{get_translation(lang, 'submission_error')} {common_fields_prompt}: {missing_fields_str}")
-                elif save_to_gsheets_new_row(form_data):
-                    st.success(get_translation(lang, "submission_success"))
-                    st.session_state.current_download_data = {
-                        "content": get_student_download_content(tab_key, lang),
-                        "filename": download_filename
-                    }
-                    st.session_state.submitted_and_download_ready = True
-                    # No rerun here, let download button appear on the same interaction
-                else:
-                    st.error(get_translation(lang, "submission_gsheets_error"))
-                    st.session_state.submitted_and_download_ready = False # Explicitly set on failure
-
-            # Download Button - Show only if submission was successful AND this is the tab that was submitted
-            if st.session_state.get("submitted_and_download_ready") and st.session_state.get("last_submitted_tab_key") == tab_key:
-                st.download_button(
-                    label=get_translation(lang, "download_student_copy"),
-                    data=st.session_state.current_download_data.get("content", "Error: No content generated."),
-                    file_name=st.session_state.current_download_data.get("filename", "error_filename.md"),
-                    mime='text/markdown',
-                    key=f"download_btn_for_{tab_key}" # Unique key for download button
-                )
-
-    st.markdown("---")
-    st.markdown(f"**{get_translation(lang, 'important_label')}:** {get_translation(lang, 'footer_submission_reminder')}")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import streamlit as st
+from datetime import date, datetime, timedelta
+from collections import OrderedDict, deque, namedtuple
+from types import MappingProxyType
+from contextlib import contextmanager
+import os
+import atexit
+import copy
+import csv
+import functools
+import hashlib
+import heapq
+import hmac
+import importlib
+import json
+import logging
+import random
+import re
+import secrets
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+_script_started = time.perf_counter()
+
+logger = logging.getLogger("capstone_tracker")
+if not logger.handlers: # The script re-executes on every rerun; configure the handler once per process
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_log_handler)
+    logger.setLevel(os.environ.get("CAPSTONE_LOG_LEVEL", "INFO"))
+
+# --- Translations ---
+# One catalog per language in locales/<code>.json; locales/languages.json names each language and its
+# fallback languages. The English catalog is the base: it holds every message and defines the form itself,
+# while other catalogs may leave messages out. A catalog is read the first time its language is used and
+# compiled into a tuple of interned strings indexed by message id, with its fallback chain already applied,
+# so every lookup is a single index and adding a language costs nothing until someone selects it.
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+BASE_LANGUAGE = "en"
+Catalog = namedtuple("Catalog", ["lang", "messages", "fields_by_day"])
+
+def _read_locale_file(file_name):
+    with open(os.path.join(LOCALES_DIR, file_name), encoding="utf-8") as f:
+        return json.load(f)
+
+def _fallback_chain(languages, lang_code):
+    # lang_code, its fallbacks breadth-first, then the base language
+    chain, queue = [], [lang_code]
+    while queue:
+        code = queue.pop(0)
+        if code in languages and code not in chain:
+            chain.append(code)
+            queue.extend(languages[code].get("fallback", ()))
+    if BASE_LANGUAGE not in chain:
+        chain.append(BASE_LANGUAGE)
+    return tuple(chain)
+
+@st.cache_resource # Read once per process; reruns reuse it
+def get_language_registry():
+    languages = _read_locale_file("languages.json")
+    base_keys = list(_read_locale_file(f"{BASE_LANGUAGE}.json"))
+    message_ids = {sys.intern(key): message_id for message_id, key in enumerate(base_keys)}
+    empty_id = len(base_keys) # Extra "" message: the id of a help text or placeholder the base catalog lacks
+    return {
+        "lock": threading.Lock(),
+        "names": MappingProxyType({code: info.get("name", code) for code, info in languages.items()}),
+        "chains": MappingProxyType({code: _fallback_chain(languages, code) for code in languages}),
+        "message_ids": MappingProxyType(message_ids),
+        "help_ids": MappingProxyType({key: message_ids.get(f"{key}_help", empty_id) for key in message_ids}),
+        "placeholder_ids": MappingProxyType({key: message_ids.get(f"{key}_placeholder", empty_id) for key in message_ids}),
+        "empty_id": empty_id,
+        "catalogs": {},
+    }
+
+_language_registry = get_language_registry()
+LANGUAGE_NAMES = _language_registry["names"] # {code: display name}, without reading any catalog
+MESSAGE_IDS = _language_registry["message_ids"]
+HELP_MESSAGE_IDS = _language_registry["help_ids"]
+PLACEHOLDER_MESSAGE_IDS = _language_registry["placeholder_ids"]
+EMPTY_MESSAGE_ID = _language_registry["empty_id"]
+_compiled_catalogs = _language_registry["catalogs"] # {code: Catalog}, filled by get_catalog()
+
+# --- Compiled Form Schema ---
+# Built once per process from the base catalog's keys; labels are message ids into each language's catalog.
+FormField = namedtuple("FormField", ["id", "index", "day", "kind", "default", "label_id", "help_id", "placeholder_id"])
+
+FIELD_KEY_SUFFIXES = ("_help", "_tab", "_title", "_placeholder")
+README_CHECKLIST_TITLE_KEY = "day_4_readme_checklist_title"
+
+def _field_kind(key):
+    # Same naming conventions the widgets have always been chosen by
+    if "feature_status" in key or "readme_" in key:
+        return "checkbox"
+    if "link" in key:
+        return "text_input"
+    return "text_area"
+
+def _fields_by_day(fields_by_id, ordered_ids):
+    fields_by_day = {}
+    for key in ordered_ids:
+        field = fields_by_id[key]
+        fields_by_day.setdefault(field.day, []).append(field)
+    return MappingProxyType({day: tuple(day_fields) for day, day_fields in fields_by_day.items()})
+
+@st.cache_resource # Compiled once per process
+def _compile_form_schema():
+    ordered_ids = [key for key in MESSAGE_IDS if key.startswith("day_") and not key.endswith(FIELD_KEY_SUFFIXES)]
+    fields_by_id = {}
+    # Sorted order matches the sheet column order get_all_form_data has always produced;
+    # index is the field's slot in each session's form_values
+    for index, key in enumerate(sorted(ordered_ids)):
+        kind = _field_kind(key)
+        fields_by_id[key] = FormField(
+            id=key,
+            index=index,
+            day=int(key.split("_")[1]),
+            kind=kind,
+            default=False if kind == "checkbox" else "",
+            label_id=MESSAGE_IDS[key],
+            help_id=HELP_MESSAGE_IDS[key],
+            placeholder_id=PLACEHOLDER_MESSAGE_IDS[key],
+        )
+    fields = tuple(fields_by_id[key] for key in sorted(fields_by_id))
+    return fields, MappingProxyType(fields_by_id), _fields_by_day(fields_by_id, ordered_ids)
+
+FORM_FIELDS, FORM_FIELDS_BY_ID, FORM_FIELDS_BY_DAY = _compile_form_schema()
+FORM_FIELD_IDS = tuple(field.id for field in FORM_FIELDS)
+FORM_FIELD_DEFAULTS = tuple(field.default for field in FORM_FIELDS)
+
+def _compile_catalog(lang_code, chain):
+    catalogs = [_read_locale_file(f"{code}.json") for code in chain]
+    messages = [sys.intern(next((catalog[key] for catalog in catalogs if key in catalog), key)) for key in MESSAGE_IDS]
+    messages.append("") # EMPTY_MESSAGE_ID
+    # Fields in this catalog's own order; any it leaves out follow in base order
+    own_order = [key for key in catalogs[0] if key in FORM_FIELDS_BY_ID]
+    ordered_ids = own_order + [key for key in FORM_FIELDS_BY_ID if key not in set(own_order)]
+    return Catalog(lang_code, tuple(messages), _fields_by_day(FORM_FIELDS_BY_ID, ordered_ids))
+
+def get_catalog(lang_code):
+    # Compiled catalog for a language (the base language's for unknown codes), compiled on first use
+    registry = _language_registry # A cache_resource call per lookup would cost more than the lookup itself
+    catalog = registry["catalogs"].get(lang_code)
+    if catalog is None:
+        if lang_code not in registry["chains"]:
+            return get_catalog(BASE_LANGUAGE)
+        with registry["lock"]:
+            catalog = registry["catalogs"].get(lang_code)
+            if catalog is None:
+                catalog = registry["catalogs"][lang_code] = _compile_catalog(lang_code, registry["chains"][lang_code])
+    return catalog
+
+@st.cache_resource # Reads each catalog's tab titles only; no catalog stays loaded for this
+def get_day_by_tab_title():
+    # MeetingDayFocus holds the translated tab title; map every language's title back to its day number
+    day_by_title = {}
+    for lang_code in LANGUAGE_NAMES:
+        catalog = _read_locale_file(f"{lang_code}.json")
+        for day in FORM_FIELDS_BY_DAY:
+            if f"day_{day}_tab" in catalog:
+                day_by_title[catalog[f"day_{day}_tab"]] = day
+    return MappingProxyType(day_by_title)
+
+# Sheet columns in the order get_all_form_data() produces them
+SUBMISSION_BASE_HEADERS = ("Timestamp", "Language", "GroupNumber", "MeetingTimeSlot", "MeetingDate", "ProjectTitle", "CurrentResearchQuestion", "NoteTaker", "MeetingDayFocus")
+SUBMISSION_HEADERS = SUBMISSION_BASE_HEADERS + FORM_FIELD_IDS
+
+def get_day_fields(lang_code, day):
+    # Fields for one day in the language's own display order
+    return get_catalog(lang_code).fields_by_day.get(day, ())
+
+def day_from_key(key, default=1):
+    # "day_2_tab" / "day_2_" -> 2
+    try:
+        return int(key.split("_")[1])
+    except (IndexError, ValueError):
+        return default
+
+# --- Performance Instrumentation ---
+# Every timed phase feeds process-wide rolling windows (all sessions), shown by the diagnostics view
+# (?diagnostics=<[diagnostics] token, or the [instructor] token, from secrets>; off when neither is set) and
+# summarised in one log line per submission.
+TIMING_WINDOW_SIZE = 500 # Most recent samples kept per phase
+TIMING_HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+DIAGNOSTICS_QUERY_PARAM = "diagnostics"
+
+_timing_trace = threading.local()
+
+@st.cache_resource # Shared by every session and the outbox worker
+def get_timing_registry():
+    return {"lock": threading.Lock(), "phases": {}, "started_at": time.time()}
+
+def record_timing(phase, elapsed_ms):
+    registry = get_timing_registry()
+    with registry["lock"]:
+        stats = registry["phases"].get(phase)
+        if stats is None:
+            # first_ms is kept for the startup profile: it is the cold cost of the phase in this process
+            stats = registry["phases"][phase] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "first_ms": elapsed_ms, "recent": deque(maxlen=TIMING_WINDOW_SIZE)}
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["recent"].append(elapsed_ms)
+    phases = getattr(_timing_trace, "phases", None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + elapsed_ms
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally: # Also records phases cut short by st.rerun() or an error
+        record_timing(phase, (time.perf_counter() - start) * 1000)
+
+def timed_phase(phase):
+    # Decorator form of timed(); `phase` may be a function of the call's arguments
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(phase(*args, **kwargs) if callable(phase) else phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def timing_trace():
+    # Collects {phase: ms} for everything timed on this thread inside the block
+    previous = getattr(_timing_trace, "phases", None)
+    _timing_trace.phases = phases = {}
+    try:
+        yield phases
+    finally:
+        _timing_trace.phases = previous
+
+def log_submission_event(event, phases, **fields):
+    # One JSON line per submission (or delivered batch), easy to grep out of a live cohort's logs
+    record = {"event": event, **fields, "phases_ms": {phase: round(ms, 1) for phase, ms in phases.items()}}
+    logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def get_timing_summary():
+    # [{phase, count, p50_ms, ...}] over each phase's rolling window, plus window histogram counts
+    registry = get_timing_registry()
+    with registry["lock"]:
+        snapshot = {phase: (stats["count"], stats["total_ms"], stats["max_ms"], sorted(stats["recent"])) for phase, stats in registry["phases"].items()}
+    summary = []
+    for phase, (count, total_ms, max_ms, recent) in sorted(snapshot.items()):
+        histogram = [0] * (len(TIMING_HISTOGRAM_BUCKETS_MS) + 1)
+        for sample in recent:
+            histogram[next((i for i, bound in enumerate(TIMING_HISTOGRAM_BUCKETS_MS) if sample <= bound), len(TIMING_HISTOGRAM_BUCKETS_MS))] += 1
+        summary.append({
+            "phase": phase, "count": count, "mean_ms": total_ms / count,
+            "p50_ms": _percentile(recent, 50), "p95_ms": _percentile(recent, 95), "p99_ms": _percentile(recent, 99),
+            "max_ms": max_ms, "histogram": histogram,
+        })
+    return summary
+
+def query_param_unlocked(param, *secrets_sections):
+    # True if ?<param>= matches the token in the first of [<secrets_sections>] that has one; never without a token
+    value = st.query_params.get(param)
+    if not value:
+        return False
+    try:
+        expected = next((st.secrets[section]["token"] for section in secrets_sections if "token" in st.secrets.get(section, {})), None)
+    except Exception: # No secrets file
+        expected = None
+    # Constant-time compare; bytes, since compare_digest rejects non-ASCII str
+    return expected is not None and hmac.compare_digest(value.encode("utf-8"), str(expected).encode("utf-8"))
+
+def diagnostics_enabled():
+    # Instructor-only: its own token if configured, else the instructor's
+    return query_param_unlocked(DIAGNOSTICS_QUERY_PARAM, "diagnostics", "instructor")
+
+def render_diagnostics():
+    pd = lazy_import("pandas")
+    summary = get_timing_summary()
+    with st.expander("Diagnostics: phase timings (all sessions in this process)", expanded=True):
+        uptime_minutes = (time.time() - get_timing_registry()["started_at"]) / 60
+        st.caption(f"Rolling window of the last {TIMING_WINDOW_SIZE} samples per phase; process up {uptime_minutes:.0f} min.")
+        if not summary:
+            st.write("No timings recorded yet.")
+            return
+        bucket_labels = [f"<={bound}ms" for bound in TIMING_HISTOGRAM_BUCKETS_MS] + [f">{TIMING_HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        table = pd.DataFrame([{k: v for k, v in row.items() if k != "histogram"} for row in summary]).set_index("phase")
+        st.dataframe(table.round(1), width="stretch")
+        histograms = pd.DataFrame([row["histogram"] for row in summary], index=[row["phase"] for row in summary], columns=bucket_labels)
+        st.dataframe(histograms, width="stretch")
+        st.caption("Startup profile: first (cold) sample of each start-up phase in this process.")
+        st.dataframe(pd.Series(get_startup_profile(), name="first_ms").round(1), width="stretch")
+        st.caption("Sheets quota budgets (this process): tokens available now, requests queued, granted and answered 429.")
+        st.dataframe(pd.DataFrame(get_sheets_quota_summary()).set_index("budget").round(1), width="stretch")
+        memory = get_memory_summary()
+        st.caption(f"Session state: {memory['sessions']} sessions active in the last {SESSION_MEMORY_IDLE_SECONDS // 60} min, "
+                   f"{memory['total_bytes'] / 1024:.0f} KiB in total, {memory['mean_bytes'] / 1024:.1f} KiB mean, {memory['max_bytes'] / 1024:.1f} KiB max.")
+        session_bytes, by_key = measure_session_memory()
+        largest = sorted(by_key.items(), key=lambda item: -item[1])[:SESSION_MEMORY_TOP_KEYS]
+        st.caption(f"This session: {session_bytes / 1024:.1f} KiB; largest entries:")
+        st.dataframe(pd.Series(dict(largest), name="bytes"), width="stretch")
+
+# --- Session Memory Accounting ---
+# Every full run records the approximate size of its session's state (objects reachable from st.session_state,
+# each counted once) in a process-wide registry, for sizing instances. Sessions idle longer than
+# SESSION_MEMORY_IDLE_SECONDS drop out of the totals. Shown by the diagnostics view.
+SESSION_MEMORY_IDLE_SECONDS = 1800
+SESSION_MEMORY_TOP_KEYS = 10 # Largest session_state entries listed for the viewing session
+
+@st.cache_resource # Shared by every session in this process
+def get_session_memory_registry():
+    return {"lock": threading.Lock(), "sessions": {}}
+
+def _deep_sizeof(obj, seen):
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+def measure_session_memory():
+    # (total bytes, {key: bytes}) for this session; objects shared between keys count toward the first key only
+    seen = set()
+    by_key = {key: _deep_sizeof(key, seen) + _deep_sizeof(value, seen) for key, value in st.session_state.to_dict().items()}
+    return sum(by_key.values()), by_key
+
+@timed_phase("record_session_memory")
+def record_session_memory():
+    if "memory_id" not in st.session_state:
+        st.session_state.memory_id = os.urandom(8).hex()
+    total_bytes, by_key = measure_session_memory()
+    registry = get_session_memory_registry()
+    now = time.time()
+    with registry["lock"]:
+        registry["sessions"][st.session_state.memory_id] = (total_bytes, now)
+        for memory_id in [m for m, (_, seen_at) in registry["sessions"].items() if now - seen_at > SESSION_MEMORY_IDLE_SECONDS]:
+            del registry["sessions"][memory_id]
+    return total_bytes, by_key
+
+def get_memory_summary():
+    registry = get_session_memory_registry()
+    with registry["lock"]:
+        sizes = [total_bytes for total_bytes, _ in registry["sessions"].values()]
+    return {"sessions": len(sizes), "total_bytes": sum(sizes), "mean_bytes": sum(sizes) / len(sizes) if sizes else 0, "max_bytes": max(sizes, default=0)}
+
+# --- Startup ---
+# pandas and gspread each take longer to import than the student form takes to render, and the form needs
+# neither, so they are imported on first use (timed as import.<module>). The first script run also starts a
+# background warm-up that authenticates a pooled client and opens the submissions sheet, so the first submit
+# after a deploy finds a fresh token and a cached worksheet instead of doing both inside the click.
+STARTUP_PROFILE_PHASES = ("script.module", "run.full", "startup.warmup", "sheets.connect", "sheets.refresh_token",
+                          "sheets.open_by_key", "sheets.worksheet", "sheets.row_values", "save_to_gsheets_new_row", "flush_outbox_batch")
+
+def lazy_import(name):
+    if name in sys.modules:
+        return importlib.import_module(name) # Also waits for an import still running on another thread
+    with timed(f"import.{name}"):
+        return importlib.import_module(name)
+
+def get_startup_profile():
+    # {phase: ms} of each start-up phase's first sample: lazy imports, first script run, warm-up, first submit
+    registry = get_timing_registry()
+    with registry["lock"]:
+        return {
+            phase: stats["first_ms"] for phase, stats in registry["phases"].items()
+            if phase in STARTUP_PROFILE_PHASES or phase.startswith("import.")
+        }
+
+@st.cache_resource # Once per server process
+def start_connection_warmup():
+    warmup = threading.Thread(target=warm_up_connection, name="capstone-warmup", daemon=True)
+    warmup.start()
+    return warmup
+
+def warm_up_connection():
+    try:
+        with timed("startup.warmup"), leased_gsheets_client() as gc: # Checkout authenticates the client
+            if gc is None:
+                return
+            get_submissions_worksheet(gc, list(SUBMISSION_HEADERS))
+            if shard_settings()[0]:
+                get_shard_index(gc)
+    except Exception as e:
+        logger.warning("Connection warm-up failed; the first submit will connect instead: %s", e)
+        return
+    logger.info("Startup profile (ms): %s", json.dumps({phase: round(ms, 1) for phase, ms in get_startup_profile().items()}))
+
+# --- Helper Functions ---
+def get_messages(lang_code):
+    # Compiled messages of a language, indexed by message id (FormField.label_id etc.)
+    catalog = _compiled_catalogs.get(lang_code) or get_catalog(lang_code)
+    return catalog.messages
+
+def get_translation(lang_code, key):
+    message_id = MESSAGE_IDS.get(key)
+    return key if message_id is None else get_messages(lang_code)[message_id]
+
+def get_help_text(lang_code, key):
+    return get_messages(lang_code)[HELP_MESSAGE_IDS.get(key, EMPTY_MESSAGE_ID)]
+
+def get_placeholder_text(lang_code, key):
+    return get_messages(lang_code)[PLACEHOLDER_MESSAGE_IDS.get(key, EMPTY_MESSAGE_ID)]
+
+# --- Session Form State ---
+# A session keeps its day-field answers in one list, st.session_state.form_values, indexed by FormField.index,
+# rather than a session_state entry per field next to each widget's own. After a submit it keeps only
+# SubmittedNotes, the submitted values the student copy shows; the copy is rendered when the download is clicked.
+SubmittedNotes = namedtuple("SubmittedNotes", ["tab_key", "lang", "filename", "submission_id", "content_key", "values"])
+NOTES_BASE_HEADERS = ("GroupNumber", "MeetingTimeSlot", "MeetingDate", "ProjectTitle", "NoteTaker", "CurrentResearchQuestion")
+
+def notes_headers(day):
+    # The submission columns get_notes_markdown() reads for one day
+    return NOTES_BASE_HEADERS + tuple(field.id for field in FORM_FIELDS if field.day == day)
+
+@timed_phase("initialize_session_state")
+def initialize_session_state():
+    new_session = "lang" not in st.session_state
+    if "lang" not in st.session_state:
+        st.session_state.lang = "en"
+    base_keys = ["group_number", "time_slot", "project_title", "current_research_question", "note_taker"]
+    for key in base_keys:
+        if key not in st.session_state:
+            st.session_state[key] = ""
+    if "date" not in st.session_state:
+        st.session_state.date = datetime.now().date()
+
+    if "form_values" not in st.session_state:
+        st.session_state.form_values = list(FORM_FIELD_DEFAULTS)
+    if "submitted_notes" not in st.session_state:
+        st.session_state.submitted_notes = None
+    if new_session:
+        restore_draft()
+
+@timed_phase("get_all_form_data")
+def get_all_form_data():
+    data = {
+        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Language": st.session_state.lang,
+        "GroupNumber": st.session_state.get("group_number", ""),
+        "MeetingTimeSlot": str(st.session_state.get("time_slot", "")),
+        "MeetingDate": str(st.session_state.get("date", "")),
+        "ProjectTitle": st.session_state.get("project_title", ""),
+        "CurrentResearchQuestion": st.session_state.get("current_research_question", ""),
+        "NoteTaker": st.session_state.get("note_taker", ""),
+        "MeetingDayFocus": "" # Will be filled in by submit_day_notes before saving
+    }
+    # Add all day-specific fields in the compiled (sorted) column order
+    data.update(zip(FORM_FIELD_IDS, st.session_state.form_values))
+    return data
+
+# --- Notes Templates ---
+# The student copy of a day's notes is a fixed Markdown layout per (language, day): only the submitted values
+# change. Each layout is compiled once into a NotesTemplate whose parts alternate static text and value slots,
+# so rendering drops the row's values into the slots and makes a single join. A language's templates are
+# compiled together the first time it is used (the base language's at start-up). Student copies are also kept
+# in a small LRU under their submission's idempotency key, a hash of the submitted fields, so repeated
+# download clicks render once; exports render each row once anyway and skip it.
+NotesTemplate = namedtuple("NotesTemplate", ["key", "parts", "headers", "checkbox_slots", "checkbox_text"])
+NOTES_SIDEBAR_ITEMS = (("group_number", "GroupNumber"), ("time_slot", "MeetingTimeSlot"), ("date", "MeetingDate"),
+                       ("project_title", "ProjectTitle"), ("note_taker", "NoteTaker"))
+NOTES_RENDER_CACHE_ENTRIES = 256
+
+def _compile_notes_template(catalog, day):
+    def label(key):
+        return catalog.messages[MESSAGE_IDS[key]] if key in MESSAGE_IDS else key
+
+    # Static strings and (header, is checkbox) slots, in document order
+    pieces = [f"# {label('app_title')}\n\n## {label('sidebar_title')}\n"]
+    for key, header in NOTES_SIDEBAR_ITEMS:
+        pieces += [f"- **{label(key)}**: ", (header, False), "\n"]
+    pieces.append(f"\n## {label(f'day_{day}_tab')}\n")
+    for field in catalog.fields_by_day.get(day, ()):
+        pieces += [f"### {catalog.messages[field.label_id]}\n", (field.id, field.kind == "checkbox"), "\n\n"]
+    # The research question closes every day's notes
+    pieces += [f"### {label('current_research_question')}\n", ("CurrentResearchQuestion", False), "\n\n"]
+
+    parts, headers, checkbox_slots = [""], [], []
+    for piece in pieces:
+        if isinstance(piece, str):
+            parts[-1] += piece
+        else:
+            header, checkbox = piece
+            if checkbox:
+                checkbox_slots.append(len(headers))
+            headers.append(header)
+            parts += [None, ""] # Slot i is parts[2 * i + 1]
+    return NotesTemplate((catalog.lang, day), tuple(parts), tuple(headers), tuple(checkbox_slots),
+                         (label("checkbox_no"), label("checkbox_yes")))
+
+@st.cache_resource # Shared by every session in this process
+def get_notes_templates():
+    registry = {"lock": threading.Lock(), "templates": {}, "rendered": OrderedDict()}
+    _compile_notes_templates(registry, BASE_LANGUAGE)
+    return registry
+
+def _compile_notes_templates(registry, lang_code, days=()):
+    catalog = get_catalog(lang_code)
+    templates = [_compile_notes_template(catalog, day) for day in {*FORM_FIELDS_BY_DAY, *days}]
+    with registry["lock"]:
+        registry["templates"].update((template.key, template) for template in templates)
+
+_notes_templates = get_notes_templates() # Bound once per run, like _language_registry; exports render thousands of notes
+
+def get_notes_template(lang_code, day):
+    lang_code = get_catalog(lang_code).lang # Unknown codes render in the base language
+    template = _notes_templates["templates"].get((lang_code, day))
+    if template is None: # First use of this language, or a day with no fields of its own
+        _compile_notes_templates(_notes_templates, lang_code, (day,))
+        template = _notes_templates["templates"][(lang_code, day)]
+    return template
+
+def _notes_slot_value(checkbox_text, value, checkbox):
+    if checkbox and isinstance(value, str): # Read back from the sheet as TRUE/FALSE
+        value = value.strip().upper() == "TRUE"
+    if isinstance(value, bool):
+        return checkbox_text[value]
+    return value if isinstance(value, str) else str(value)
+
+def render_notes_template(template, row, content_key=None):
+    # content_key: a hash of everything the row holds (such as its idempotency key) to memoize the result under
+    cache = _notes_templates["rendered"]
+    if content_key is not None:
+        with _notes_templates["lock"]:
+            rendered = cache.get((template.key, content_key))
+            if rendered is not None:
+                cache.move_to_end((template.key, content_key))
+                return rendered
+    get = row.get
+    values = [get(header, "") for header in template.headers]
+    for i in template.checkbox_slots:
+        values[i] = _notes_slot_value(template.checkbox_text, values[i], True)
+    parts = list(template.parts)
+    parts[1::2] = values
+    try:
+        rendered = "".join(parts)
+    except TypeError: # Numbers or booleans in text slots
+        parts[1::2] = [_notes_slot_value(template.checkbox_text, value, False) for value in values]
+        rendered = "".join(parts)
+    if content_key is not None:
+        with _notes_templates["lock"]:
+            cache[(template.key, content_key)] = rendered
+            if len(cache) > NOTES_RENDER_CACHE_ENTRIES:
+                cache.popitem(last=False)
+    return rendered
+
+def render_submitted_notes(notes):
+    # Download callback: runs on its own thread when the button is clicked, so it reads only `notes`
+    template = get_notes_template(notes.lang, day_from_key(notes.tab_key))
+    return render_notes_template(template, dict(zip(notes_headers(template.key[1]), notes.values)), notes.content_key)
+
+def get_notes_markdown(row, active_day_key, lang):
+    # Student copy of one day's notes, from a submission row (sheet header -> value) such as get_all_form_data()
+    return render_notes_template(get_notes_template(lang, day_from_key(active_day_key)), row) # e.g., "day_1_tab" -> 1
+
+def notes_filename(group_number, day, meeting_date):
+    return f"Capstone_Notes_Group{group_number}_Day{day}_{meeting_date}.md"
+
+def connect_gsheets():
+    # Creates a new authorized client; use leased_gsheets_client() rather than calling this directly
+    try:
+        creds_dict = st.secrets["gcp_service_account"]
+        with timed("sheets.connect"):
+            gc = lazy_import("gspread").service_account_from_dict(creds_dict)
+        return gc
+    except Exception as e:
+        st.error(f"GSheets Connect Error (check st.secrets configuration): {e}")
+        return None
+
+# --- Sheets Quota Scheduler ---
+# Every Sheets API request goes through sheets_call(), which first takes a token from the process's read or
+# write budget. Each budget is a token bucket sized so that no 60-second window goes over the per-minute quota
+# ([gcp_spreadsheet] read_quota_per_minute / write_quota_per_minute in secrets, Google's per-user default of 60
+# otherwise; with several server processes, give each its share). Queued requests are granted by priority:
+# submissions and the reads they need first, then dashboard reads, then exports. A 429 empties the bucket so
+# every queued request backs off, and the request is retried after a jittered delay. Writes are retried only
+# on 429, which means the request was rejected; after a 5xx it may have been applied. Reads also retry on 5xx.
+SHEETS_DEFAULT_QUOTA_PER_MINUTE = 60
+SHEETS_BURST_DIVISOR = 6 # Bucket capacity is quota // 6; the refill rate covers the rest of the minute
+SHEETS_PRIORITY_SUBMISSION, SHEETS_PRIORITY_DASHBOARD, SHEETS_PRIORITY_EXPORT = 0, 1, 2
+SHEETS_MAX_ATTEMPTS = 4
+SHEETS_BACKOFF_BASE_SECONDS = 1
+SHEETS_BACKOFF_CAP_SECONDS = 16
+SHEETS_MAX_QUEUE_WAIT_SECONDS = 120 # A request still queued after this fails with TimeoutError
+
+_sheets_priority = threading.local()
+_sheets_heartbeat = threading.local()
+
+@contextmanager
+def sheets_priority(priority):
+    # Sheets requests made on this thread inside the block queue at `priority` (lower goes first)
+    previous = getattr(_sheets_priority, "value", SHEETS_PRIORITY_SUBMISSION)
+    _sheets_priority.value = priority
+    try:
+        yield
+    finally:
+        _sheets_priority.value = previous
+
+@contextmanager
+def sheets_heartbeat(beat):
+    # beat() runs on this thread before each Sheets request inside the block queues for quota, and again
+    # before it is sent, so long waits can show they are still making progress
+    previous = getattr(_sheets_heartbeat, "beat", None)
+    _sheets_heartbeat.beat = beat
+    try:
+        yield
+    finally:
+        _sheets_heartbeat.beat = previous
+
+def _beat_sheets_heartbeat():
+    beat = getattr(_sheets_heartbeat, "beat", None)
+    if beat is not None:
+        beat()
+
+def _sheets_quota_settings():
+    try:
+        settings = st.secrets.get("gcp_spreadsheet", {})
+    except Exception: # No secrets file
+        settings = {}
+    return {kind: max(1, int(settings.get(f"{kind}_quota_per_minute", SHEETS_DEFAULT_QUOTA_PER_MINUTE))) for kind in ("read", "write")}
+
+@st.cache_resource # One budget per server process, shared by every session and the outbox worker
+def get_sheets_scheduler():
+    buckets = {}
+    for kind, quota in _sheets_quota_settings().items():
+        capacity = max(1, quota // SHEETS_BURST_DIVISOR)
+        buckets[kind] = {
+            "quota": quota, "capacity": capacity, "rate": max(1, quota - capacity) / 60, "tokens": float(capacity),
+            "updated_at": time.monotonic(), "queue": [], "granted": 0, "throttled": 0,
+        }
+    return {"condition": threading.Condition(), "buckets": buckets, "tickets": 0}
+
+def _refill_bucket(bucket, now):
+    bucket["tokens"] = min(bucket["capacity"], bucket["tokens"] + (now - bucket["updated_at"]) * bucket["rate"])
+    bucket["updated_at"] = now
+
+def acquire_sheets_quota(kind):
+    # Blocks until this thread's request may be sent: it is first in the `kind` queue and a token is available
+    scheduler = get_sheets_scheduler()
+    bucket = scheduler["buckets"][kind]
+    started = time.monotonic()
+    deadline = started + SHEETS_MAX_QUEUE_WAIT_SECONDS
+    with scheduler["condition"]:
+        scheduler["tickets"] += 1
+        ticket = (getattr(_sheets_priority, "value", SHEETS_PRIORITY_SUBMISSION), scheduler["tickets"])
+        heapq.heappush(bucket["queue"], ticket)
+        try:
+            while True:
+                now = time.monotonic()
+                _refill_bucket(bucket, now)
+                first = bucket["queue"][0] == ticket
+                if first and bucket["tokens"] >= 1:
+                    break
+                if now >= deadline:
+                    raise TimeoutError(f"Google Sheets {kind} quota: still queued after {SHEETS_MAX_QUEUE_WAIT_SECONDS}s")
+                # The first request sleeps until its token is due; the rest until the queue moves
+                timeout = (1 - bucket["tokens"]) / bucket["rate"] if first else deadline - now
+                scheduler["condition"].wait(min(timeout, deadline - now))
+        except BaseException:
+            bucket["queue"].remove(ticket)
+            heapq.heapify(bucket["queue"])
+            scheduler["condition"].notify_all()
+            raise
+        heapq.heappop(bucket["queue"])
+        bucket["tokens"] -= 1
+        bucket["granted"] += 1
+        scheduler["condition"].notify_all() # The next request may be first now
+    waited_ms = (time.monotonic() - started) * 1000
+    if waited_ms >= 1:
+        record_timing(f"sheets.quota_wait.{kind}", waited_ms)
+
+def _throttle_sheets_quota(kind):
+    # The API answered 429: spend the bucket so queued requests wait for fresh tokens
+    scheduler = get_sheets_scheduler()
+    with scheduler["condition"]:
+        bucket = scheduler["buckets"][kind]
+        _refill_bucket(bucket, time.monotonic())
+        bucket["tokens"] = min(bucket["tokens"], 0.0)
+        bucket["throttled"] += 1
+
+def _gsheets_error_code(exc):
+    if isinstance(exc, lazy_import("gspread").exceptions.APIError):
+        return getattr(exc, "code", None) or getattr(getattr(exc, "response", None), "status_code", 0)
+    return None
+
+def _is_retryable_gsheets_error(exc):
+    code = _gsheets_error_code(exc)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(exc, OSError) # Connection resets and timeouts from the HTTP layer
+
+def sheets_call(phase, kind, request, *args, **kwargs):
+    # request(*args, **kwargs) as one Sheets API call of `kind` ("read" or "write"), timed as `phase`. Raises
+    # the last gspread error once retries are used up, and TimeoutError if the quota queue never reached it.
+    for attempt in range(1, SHEETS_MAX_ATTEMPTS + 1):
+        _beat_sheets_heartbeat()
+        acquire_sheets_quota(kind)
+        _beat_sheets_heartbeat()
+        try:
+            with timed(phase):
+                return request(*args, **kwargs)
+        except Exception as e:
+            throttled = _gsheets_error_code(e) == 429
+            if throttled:
+                _throttle_sheets_quota(kind)
+            if attempt == SHEETS_MAX_ATTEMPTS or not (throttled or (kind == "read" and _is_retryable_gsheets_error(e))):
+                raise
+            delay = random.uniform(0, min(SHEETS_BACKOFF_CAP_SECONDS, SHEETS_BACKOFF_BASE_SECONDS * 2 ** attempt))
+            logger.info("%s failed (attempt %d), retrying in %.1fs: %s", phase, attempt, delay, e)
+            time.sleep(delay)
+
+def get_sheets_queue_status(kind, priority=SHEETS_PRIORITY_SUBMISSION):
+    # (requests queued ahead of a new one at `priority`, estimated seconds before it would be sent)
+    scheduler = get_sheets_scheduler()
+    with scheduler["condition"]:
+        bucket = scheduler["buckets"][kind]
+        _refill_bucket(bucket, time.monotonic())
+        ahead = sum(1 for queued_priority, _ in bucket["queue"] if queued_priority <= priority)
+        return ahead, max(0.0, (ahead + 1 - bucket["tokens"]) / bucket["rate"])
+
+def get_sheets_quota_summary():
+    scheduler = get_sheets_scheduler()
+    with scheduler["condition"]:
+        summary = []
+        for kind, bucket in scheduler["buckets"].items():
+            _refill_bucket(bucket, time.monotonic())
+            summary.append({"budget": kind, "quota_per_minute": bucket["quota"], "tokens": bucket["tokens"], "queued": len(bucket["queue"]),
+                            "granted": bucket["granted"], "throttled": bucket["throttled"]})
+        return summary
+
+# --- Sheets Client Pool ---
+# A gspread client is one requests session, and is not documented as thread-safe. Instead of sharing a
+# single client across all script threads, submissions lease one from a bounded pool. Each pooled client
+# keeps its own keep-alive connections, so concurrent submissions run in parallel on warm sockets.
+GSHEETS_POOL_SIZE = int(os.environ.get("CAPSTONE_GSHEETS_POOL_SIZE", "10"))
+GSHEETS_POOL_CHECKOUT_TIMEOUT_SECONDS = SHEETS_MAX_QUEUE_WAIT_SECONDS # Leased clients wait out the quota queue too
+
+@st.cache_resource # One pool per server process
+def get_gsheets_client_pool():
+    return {"condition": threading.Condition(), "idle": [], "open": 0, "size": GSHEETS_POOL_SIZE}
+
+def _ensure_fresh_credentials(gc):
+    # Health check on checkout: refresh the OAuth token before it expires rather than on a failed request.
+    # Raises google.auth RefreshError if the service account can no longer authenticate.
+    credentials = getattr(gc.http_client, "auth", None)
+    if credentials is None: # Clients built around a caller-supplied session manage their own auth
+        return
+    if not credentials.valid or credentials.expired: # expired already includes google-auth's clock-skew margin
+        with timed("sheets.refresh_token"):
+            credentials.refresh(lazy_import("google.auth.transport.requests").Request())
+
+def _discard_gsheets_client(pool, gc):
+    if gc is not None:
+        try:
+            gc.http_client.session.close()
+        except Exception:
+            pass
+    with pool["condition"]:
+        pool["open"] -= 1
+        pool["condition"].notify()
+
+def _should_discard_gsheets_client(exc):
+    # Broken connections and rejected credentials; quota and validation errors leave the client usable
+    code = _gsheets_error_code(exc)
+    if code is not None:
+        return code == 401
+    if isinstance(exc, TimeoutError): # Waited too long in the quota queue; the client itself is fine
+        return False
+    return isinstance(exc, OSError) or type(exc).__name__ == "RefreshError"
+
+@contextmanager
+def leased_gsheets_client(timeout=GSHEETS_POOL_CHECKOUT_TIMEOUT_SECONDS):
+    # Yields a pooled client (None if one can't be created), returning it to the pool afterwards.
+    # Raises TimeoutError if every client stays leased for `timeout` seconds.
+    pool = get_gsheets_client_pool()
+    deadline = time.time() + timeout
+    with timed("sheets.pool_wait"), pool["condition"]:
+        while not pool["idle"] and pool["open"] >= pool["size"]:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"No Google Sheets client became available within {timeout}s")
+            pool["condition"].wait(remaining)
+        if pool["idle"]:
+            gc = pool["idle"].pop() # Most recently used first: its connections are the warmest
+        else:
+            gc = None
+            pool["open"] += 1
+
+    try:
+        if gc is None:
+            gc = connect_gsheets()
+        if gc is not None:
+            _ensure_fresh_credentials(gc)
+    except Exception:
+        _discard_gsheets_client(pool, gc) # Re-authenticates from secrets on the next checkout
+        raise
+    if gc is None:
+        _discard_gsheets_client(pool, None)
+        yield None
+        return
+
+    try:
+        yield gc
+    except BaseException as e:
+        if _should_discard_gsheets_client(e):
+            _discard_gsheets_client(pool, gc)
+        else:
+            _checkin_gsheets_client(pool, gc)
+        raise
+    _checkin_gsheets_client(pool, gc)
+
+def _checkin_gsheets_client(pool, gc):
+    with pool["condition"]:
+        pool["idle"].append(gc)
+        pool["condition"].notify()
+
+SUBMISSIONS_SHEET_NAME = "All_Submissions_V2" # Consider a new sheet name if schema changes significantly
+WORKSHEET_CACHE_TTL_SECONDS = 600
+
+@st.cache_resource # Process-wide: spreadsheet/worksheet handles and verified header rows
+def get_worksheet_cache():
+    return {"lock": threading.Lock(), "entries": {}, "row_indexes": {}, "open_locks": {}}
+
+def invalidate_worksheet_cache(sheet_name=None):
+    cache = get_worksheet_cache()
+    with cache["lock"]:
+        for entries in (cache["entries"], cache["row_indexes"]): # open_locks are kept; they hold no state
+            for cache_key in [k for k in entries if sheet_name is None or k[1] == sheet_name]:
+                del entries[cache_key]
+
+# --- Submission Schema ---
+# Rows are written through a column map (header -> position in the live header row) rather than in the
+# form's own column order, so reordered or extra columns in the sheet never shift values under the wrong
+# header. Form fields the sheet lacks are added as new columns at the end; columns the form no longer has
+# are left blank. The map is cached with the worksheet handle, so a normal submit costs no header reads.
+ColumnMap = namedtuple("ColumnMap", ["version", "headers", "positions"])
+
+def build_column_map(header_row):
+    positions = {}
+    for position, header in enumerate(header_row):
+        if header and header not in positions: # First occurrence wins for duplicated headers
+            positions[header] = position
+    # The version identifies one exact header row, e.g. in the log line when columns are added
+    version = hashlib.sha1("\x1f".join(header_row).encode("utf-8")).hexdigest()[:10]
+    return ColumnMap(version, tuple(header_row), MappingProxyType(positions))
+
+def map_row(column_map, data_dict):
+    # Sheet row for a submission: each value at its header's position, blanks elsewhere
+    row = [""] * len(column_map.headers)
+    for header, value in data_dict.items():
+        position = column_map.positions.get(header)
+        if position is not None:
+            row[position] = value
+    return row
+
+def _add_missing_columns(worksheet, column_map, grid_columns, missing):
+    # Header cells for `missing` after the last header, growing the grid if needed: one batch_update call
+    start = len(column_map.headers)
+    requests = []
+    if grid_columns < start + len(missing):
+        requests.append({"appendDimension": {"sheetId": worksheet.id, "dimension": "COLUMNS", "length": start + len(missing) - grid_columns}})
+    requests.append({"updateCells": {
+        "start": {"sheetId": worksheet.id, "rowIndex": 0, "columnIndex": start},
+        "rows": [{"values": [{"userEnteredValue": {"stringValue": header}} for header in missing]}],
+        "fields": "userEnteredValue",
+    }})
+    sheets_call("sheets.batch_update", "write", worksheet.client.batch_update, worksheet.spreadsheet_id, {"requests": requests})
+    new_map = build_column_map(list(column_map.headers) + list(missing))
+    logger.info("Submissions sheet schema %s -> %s: added columns %s", column_map.version, new_map.version, ", ".join(missing))
+    return new_map, max(grid_columns, start + len(missing))
+
+def _entry_covers(entry, expected_headers):
+    return bool(entry) and entry["expires_at"] > time.time() and all(h in entry["column_map"].positions for h in expected_headers)
+
+def get_submissions_worksheet(gc, expected_headers, sheet_name=SUBMISSIONS_SHEET_NAME):
+    # Opens a submissions sheet (or shard) bound to gc, creating it or adding columns for any of expected_headers
+    # it lacks. get_column_map() then gives the positions to write at. Raises gspread errors.
+    spreadsheet_id = st.secrets["gcp_spreadsheet"]["key"]
+    cache = get_worksheet_cache()
+    cache_key = (spreadsheet_id, sheet_name)
+    with cache["lock"]:
+        entry = cache["entries"].get(cache_key)
+        open_lock = cache["open_locks"].setdefault(cache_key, threading.Lock())
+    if _entry_covers(entry, expected_headers):
+        return _bind_worksheet(entry["worksheet"], gc) # Steady state: no API calls
+
+    # One thread opens (and possibly creates or extends) the sheet; concurrent callers wait and reuse its result
+    with open_lock:
+        with cache["lock"]:
+            entry = cache["entries"].get(cache_key)
+        if _entry_covers(entry, expected_headers):
+            return _bind_worksheet(entry["worksheet"], gc)
+        if entry and entry["expires_at"] > time.time(): # Still fresh; only columns are missing
+            worksheet, column_map, grid_columns = _bind_worksheet(entry["worksheet"], gc), entry["column_map"], entry["grid_columns"]
+            expires_at = entry["expires_at"]
+        else:
+            worksheet, header_row_values = _open_submissions_worksheet(gc, spreadsheet_id, expected_headers, sheet_name)
+            column_map, grid_columns = build_column_map(header_row_values), worksheet.col_count
+            expires_at = time.time() + WORKSHEET_CACHE_TTL_SECONDS
+        missing = [h for h in expected_headers if h not in column_map.positions]
+        if missing:
+            column_map, grid_columns = _add_missing_columns(worksheet, column_map, grid_columns, missing)
+        with cache["lock"]:
+            cache["entries"][cache_key] = {
+                "spreadsheet": worksheet.spreadsheet,
+                "worksheet": worksheet,
+                "column_map": column_map,
+                "grid_columns": grid_columns,
+                "expires_at": expires_at,
+            }
+    return worksheet
+
+def open_worksheet_readonly(gc, sheet_name=SUBMISSIONS_SHEET_NAME):
+    # (worksheet bound to gc, its ColumnMap) for read paths (mirror, export, shard index); (None, None) if the sheet
+    # does not exist. Unlike get_submissions_worksheet() it never creates a sheet, clears it or adds columns.
+    # Raises gspread errors.
+    gspread = lazy_import("gspread")
+    spreadsheet_id = st.secrets["gcp_spreadsheet"]["key"]
+    cache = get_worksheet_cache()
+    cache_key = (spreadsheet_id, sheet_name)
+    with cache["lock"]:
+        entry = cache["entries"].get(cache_key)
+    if entry and entry["expires_at"] > time.time():
+        return _bind_worksheet(entry["worksheet"], gc), entry["column_map"]
+
+    sh = sheets_call("sheets.open_by_key", "read", gc.open_by_key, spreadsheet_id)
+    try:
+        worksheet = sheets_call("sheets.worksheet", "read", sh.worksheet, sheet_name)
+    except gspread.WorksheetNotFound:
+        return None, None
+    header_row_values = sheets_call("sheets.row_values", "read", worksheet.row_values, 1) if worksheet.row_count > 0 else []
+    column_map = build_column_map(header_row_values)
+    if header_row_values and worksheet.row_count > 1: # Cached only as a writer would keep it; see _open_submissions_worksheet
+        with cache["lock"]:
+            cache["entries"].setdefault(cache_key, {
+                "spreadsheet": worksheet.spreadsheet,
+                "worksheet": worksheet,
+                "column_map": column_map,
+                "grid_columns": worksheet.col_count,
+                "expires_at": time.time() + WORKSHEET_CACHE_TTL_SECONDS,
+            })
+    return worksheet, column_map
+
+def get_column_map(worksheet):
+    # Column map recorded when get_submissions_worksheet() opened this sheet (None if not cached)
+    cache = get_worksheet_cache()
+    with cache["lock"]:
+        entry = cache["entries"].get((worksheet.spreadsheet.id, worksheet.title))
+    return entry["column_map"] if entry else None
+
+def _bind_worksheet(worksheet, gc):
+    # A worksheet handle is just ids and properties plus the HTTP client it talks through;
+    # re-point the cached handle at the leased client without any network calls.
+    if worksheet.client is gc.http_client:
+        return worksheet
+    bound = copy.copy(worksheet)
+    bound.client = gc.http_client
+    return bound
+
+def _open_submissions_worksheet(gc, spreadsheet_id, expected_headers, sheet_name):
+    gspread = lazy_import("gspread")
+    sh = sheets_call("sheets.open_by_key", "read", gc.open_by_key, spreadsheet_id)
+
+    try:
+        worksheet = sheets_call("sheets.worksheet", "read", sh.worksheet, sheet_name)
+    except gspread.WorksheetNotFound:
+        try:
+            worksheet = sheets_call("sheets.add_worksheet", "write", sh.add_worksheet, title=sheet_name, rows="1", cols=len(expected_headers))
+        except gspread.exceptions.APIError:
+            # Another server process created it first ("already exists"); use theirs below
+            worksheet = sheets_call("sheets.worksheet", "read", sh.worksheet, sheet_name)
+        else:
+            sheets_call("sheets.update", "write", worksheet.update, [list(expected_headers)]) # Write headers as the first row
+            # st.toast(f"Created new sheet '{sheet_name}' and added headers.") # Optional: for debugging
+            return worksheet, list(expected_headers)
+
+    header_row_values = sheets_call("sheets.row_values", "read", worksheet.row_values, 1) if worksheet.row_count > 0 else []
+    # A sheet without headers, or a header-only placeholder sheet, gets the form's headers in form order.
+    # A sheet holding data keeps its header row; the column map adapts to it.
+    if not header_row_values or (worksheet.row_count <= 1 and header_row_values != list(expected_headers)):
+        sheets_call("sheets.clear", "write", worksheet.clear) # Clears all values but keeps the sheet
+        sheets_call("sheets.update", "write", worksheet.update, [list(expected_headers)]) # Write headers as the first row
+        header_row_values = list(expected_headers)
+        # st.toast(f"Headers updated/written in '{sheet_name}'.") # Optional: for debugging
+    return worksheet, header_row_values
+
+# --- Sharding ---
+# With [gcp_spreadsheet] shard_by = "week" (or "month") in secrets, each submission goes to a worksheet for the
+# period of its MeetingDate, e.g. All_Submissions_V2_2026-W42, created on first use. shard_group_size = 10 also
+# splits each period by GroupNumber (..._2026-W42_G11-20), so a cohort's groups share a shard. Shards are listed
+# in the Submission_Shards index sheet, and query_submissions() reads only the shards a query can match.
+# Rows without a usable MeetingDate, and everything written before sharding was enabled, stay in All_Submissions_V2.
+SHARD_INDEX_SHEET_NAME = "Submission_Shards"
+SHARD_INDEX_HEADERS = ("Shard", "PeriodStart", "PeriodEnd", "GroupFrom", "GroupTo", "CreatedAt")
+ShardInfo = namedtuple("ShardInfo", ["name", "period_start", "period_end", "group_from", "group_to"])
+
+def shard_settings():
+    # (shard_by, shard_group_size); shard_by is "" when sharding is off
+    settings = st.secrets.get("gcp_spreadsheet", {})
+    shard_by = str(settings.get("shard_by", "")).strip().lower()
+    return (shard_by if shard_by in ("week", "month") else ""), int(settings.get("shard_group_size", 0) or 0)
+
+def shard_for_submission(data_dict, shard_by, group_size):
+    # ShardInfo of the worksheet a submission belongs in, or None for the unsharded sheet
+    if not shard_by:
+        return None
+    try:
+        meeting_date = date.fromisoformat(str(data_dict.get("MeetingDate", "")).strip())
+    except ValueError:
+        return None
+    if shard_by == "week":
+        start = meeting_date - timedelta(days=meeting_date.weekday())
+        end = start + timedelta(days=6)
+        iso_year, iso_week, _ = meeting_date.isocalendar()
+        name = f"{SUBMISSIONS_SHEET_NAME}_{iso_year}-W{iso_week:02d}"
+    else:
+        start = meeting_date.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        name = f"{SUBMISSIONS_SHEET_NAME}_{start:%Y-%m}"
+    group_from = group_to = ""
+    if group_size > 0:
+        group = str(data_dict.get("GroupNumber", "")).strip()
+        if group.isdigit() and int(group) > 0:
+            group_from = (int(group) - 1) // group_size * group_size + 1
+            group_to = group_from + group_size - 1
+            name = f"{name}_G{group_from}-{group_to}"
+        else:
+            name = f"{name}_Gother" # Blank group range: may hold any group
+    return ShardInfo(name, start.isoformat(), end.isoformat(), group_from, group_to)
+
+def submission_sheet_name(data_dict):
+    shard = shard_for_submission(data_dict, *shard_settings())
+    return shard.name if shard else SUBMISSIONS_SHEET_NAME
+
+def select_shards(shards, date_from=None, date_to=None, groups=()):
+    # The shards that can hold rows dated within [date_from, date_to] (ISO dates, either end open) for any of `groups`
+    numbers = [int(group) for group in groups if str(group).isdigit()]
+    selected = []
+    for shard in shards:
+        if date_from and shard.period_end and shard.period_end < str(date_from):
+            continue
+        if date_to and shard.period_start and shard.period_start > str(date_to):
+            continue
+        if groups and shard.group_from != "" and not any(shard.group_from <= number <= shard.group_to for number in numbers):
+            continue
+        selected.append(shard)
+    return selected
+
+@st.cache_resource # Process-wide: the shard index, read once and extended as this process registers shards
+def get_shard_index_cache():
+    # "lock" guards the dict and is never held across a Sheets call; "register_lock" lets one new shard
+    # be appended at a time, so this process never lists a shard twice
+    return {"lock": threading.Lock(), "register_lock": threading.Lock(), "shards": None, "expires_at": 0.0}
+
+def _store_shard_index(cache, shards):
+    # Caller holds cache["lock"]. Keeps shards registered by this process while `shards` was being read.
+    cache["shards"] = {**(cache["shards"] or {}), **shards}
+    cache["expires_at"] = time.time() + WORKSHEET_CACHE_TTL_SECONDS
+
+def _read_shard_index(gc):
+    worksheet, column_map = open_worksheet_readonly(gc, SHARD_INDEX_SHEET_NAME)
+    shards = {}
+    if worksheet is None: # No shard registered yet
+        return shards
+    headers = list(column_map.headers)
+    for _, rows in iter_sheet_row_chunks(worksheet, len(headers)):
+        for values in rows:
+            row = dict(zip(headers, (str(value).strip() for value in values)))
+            name = row.get("Shard", "")
+            if name and name not in shards: # Two processes may both register a new shard; the first row wins
+                group_from, group_to = (int(row[h]) if row.get(h, "").isdigit() else "" for h in ("GroupFrom", "GroupTo"))
+                shards[name] = ShardInfo(name, row.get("PeriodStart", ""), row.get("PeriodEnd", ""), group_from, group_to)
+    return shards
+
+def get_shard_index(gc, refresh=False):
+    # {shard name: ShardInfo}; re-read after the worksheet TTL so shards created by other processes show up
+    cache = get_shard_index_cache()
+    with cache["lock"]:
+        if not (refresh or cache["shards"] is None or cache["expires_at"] <= time.time()):
+            return dict(cache["shards"])
+    shards = _read_shard_index(gc)
+    with cache["lock"]:
+        _store_shard_index(cache, shards)
+        return dict(cache["shards"])
+
+def register_shard(gc, shard):
+    # Adds a shard to the index sheet unless it is already listed; no API calls once this process has seen it
+    # Each Sheets call may wait on quota, so none runs under cache["lock"]: known shards and dashboard reads never wait
+    cache = get_shard_index_cache()
+    with cache["lock"]:
+        if cache["shards"] is not None and shard.name in cache["shards"]:
+            return
+    with cache["register_lock"]:
+        with cache["lock"]: # Checked again: registered or loaded while this thread waited
+            loaded = cache["shards"] is not None
+            if loaded and shard.name in cache["shards"]:
+                return
+        if not loaded:
+            shards = _read_shard_index(gc)
+            with cache["lock"]:
+                _store_shard_index(cache, shards)
+                if shard.name in cache["shards"]:
+                    return
+        worksheet = get_submissions_worksheet(gc, SHARD_INDEX_HEADERS, SHARD_INDEX_SHEET_NAME)
+        row = dict(zip(SHARD_INDEX_HEADERS, (*shard, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))))
+        sheets_call("sheets.append_rows", "write", worksheet.append_rows, [map_row(get_column_map(worksheet), row)], value_input_option='RAW')
+        with cache["lock"]:
+            cache["shards"][shard.name] = shard
+    logger.info("Registered submission shard %s", shard.name)
+
+def append_submission_rows(gc, data_dicts):
+    # Appends one or more submissions with one values_append call per target sheet. Raises gspread errors.
+    shard_by, group_size = shard_settings()
+    rows_by_shard = {}
+    for data_dict in data_dicts:
+        rows_by_shard.setdefault(shard_for_submission(data_dict, shard_by, group_size), []).append(data_dict)
+    for shard, shard_rows in rows_by_shard.items():
+        if shard is not None:
+            register_shard(gc, shard) # Listed before any rows land in it, so readers never miss a shard
+        _append_to_sheet(gc, shard.name if shard else SUBMISSIONS_SHEET_NAME, shard_rows)
+
+def _append_to_sheet(gc, sheet_name, data_dicts):
+    gspread = lazy_import("gspread")
+    # Every key of every submission needs a column (outbox rows queued by an older deploy may differ)
+    expected_headers = list(dict.fromkeys(header for data_dict in data_dicts for header in data_dict))
+    worksheet = get_submissions_worksheet(gc, expected_headers, sheet_name)
+    column_map = get_column_map(worksheet)
+    try:
+        if upsert_enabled():
+            placed_rows = upsert_submission_rows(worksheet, column_map, data_dicts)
+        else:
+            # Each value goes under its own header, wherever that column is in the sheet
+            data_rows = [map_row(column_map, data_dict) for data_dict in data_dicts]
+            response = sheets_call("sheets.append_rows", "write", worksheet.append_rows, data_rows, value_input_option='USER_ENTERED')
+            first_row = _first_appended_row(response)
+            placed_rows = [(first_row + offset if first_row else None, data_dict) for offset, data_dict in enumerate(data_dicts)]
+    except (gspread.WorksheetNotFound, gspread.exceptions.APIError) as e:
+        # A deleted/renamed sheet shows up as WorksheetNotFound or a 400/404 range error: look it up again next time.
+        # Quota and server errors keep the handle, column map and row index; the retry needs them most.
+        if isinstance(e, gspread.WorksheetNotFound) or _gsheets_error_code(e) in (400, 404):
+            invalidate_worksheet_cache(sheet_name)
+        raise
+    mirror_submission_rows(sheet_name, placed_rows)
+
+def iter_sheet_row_chunks(worksheet, width, first_row=2, chunk_rows=500):
+    # Yields (first_sheet_row, rows) for every `chunk_rows`-row window read, empty ones included. A window comes
+    # back short whenever its last rows are blank, so that does not mean the data ended: reads go on to the
+    # worksheet's row count, and past it while windows still hold rows (the cached count may predate appends).
+    last_column = lazy_import("gspread").utils.rowcol_to_a1(1, max(width, 1))[:-1]
+    while True:
+        rows = sheets_call("sheets.get", "read", worksheet.get, f"A{first_row}:{last_column}{first_row + chunk_rows - 1}")
+        yield first_row, rows
+        first_row += chunk_rows
+        if not any(rows) and first_row > worksheet.row_count: # gspread returns [[]] for an empty range
+            return
+
+# --- Upsert Mode ---
+# With [gcp_spreadsheet] upsert_submissions = true in secrets, a resubmission of the same
+# (GroupNumber, MeetingDate, day) overwrites its existing row instead of appending another one.
+SUBMISSION_KEY_HEADERS = ("GroupNumber", "MeetingDate", "MeetingDayFocus")
+
+def upsert_enabled():
+    return bool(st.secrets.get("gcp_spreadsheet", {}).get("upsert_submissions", False))
+
+def submission_key(values):
+    group_number, meeting_date, day_focus = (str(value).strip() for value in values)
+    return (group_number, meeting_date, get_day_by_tab_title().get(day_focus, day_focus))
+
+def submission_content_hash(data_dict):
+    # The Timestamp changes on every click, so it does not count as a content change
+    payload = {k: v for k, v in data_dict.items() if k != "Timestamp"}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+def get_submission_row_index(worksheet):
+    # {submission_key: [row_number, content_hash]}, built from one batch read of the key columns
+    cache = get_worksheet_cache()
+    cache_key = (worksheet.spreadsheet.id, worksheet.title)
+    with cache["lock"]:
+        row_index = cache["row_indexes"].get(cache_key)
+        if row_index is None:
+            row_index = cache["row_indexes"][cache_key] = {"lock": threading.Lock(), "rows": None, "expires_at": 0}
+        entry = cache["entries"].get(cache_key)
+    with row_index["lock"]:
+        # Rebuilt after the TTL so rows written by other server processes are picked up
+        if row_index["rows"] is None or row_index["expires_at"] <= time.time():
+            if entry:
+                positions = entry["column_map"].positions
+            else:
+                positions = build_column_map(sheets_call("sheets.row_values", "read", worksheet.row_values, 1)).positions
+            _load_submission_row_index(worksheet, positions, row_index)
+    return row_index
+
+def _load_submission_row_index(worksheet, positions, row_index):
+    # Caller holds row_index["lock"]
+    rows = {}
+    if all(h in positions for h in SUBMISSION_KEY_HEADERS):
+        rowcol_to_a1 = lazy_import("gspread").utils.rowcol_to_a1
+        columns = [rowcol_to_a1(1, positions[h] + 1)[:-1] for h in SUBMISSION_KEY_HEADERS]
+        key_columns = sheets_call("sheets.batch_get", "read", worksheet.batch_get, [f"{col}2:{col}" for col in columns])
+        for offset in range(max((len(column) for column in key_columns), default=0)):
+            values = [column[offset][0] if offset < len(column) and column[offset] else "" for column in key_columns]
+            if any(values):
+                rows[submission_key(values)] = [offset + 2, None] # Content unknown until we write it
+    row_index["rows"] = rows
+    row_index["expires_at"] = time.time() + WORKSHEET_CACHE_TTL_SECONDS
+
+def _row_keys_still_match(worksheet, positions, targets):
+    # {submission_key: sheet_row} -> whether each row still holds its key, from one read of the key cells.
+    # The index can be minutes old, and an instructor may have sorted, filtered or deleted rows since.
+    key_positions = [positions[h] for h in SUBMISSION_KEY_HEADERS]
+    first, last = min(key_positions), max(key_positions)
+    rowcol_to_a1 = lazy_import("gspread").utils.rowcol_to_a1
+    first_column, last_column = rowcol_to_a1(1, first + 1)[:-1], rowcol_to_a1(1, last + 1)[:-1]
+    results = sheets_call("sheets.batch_get", "read", worksheet.batch_get,
+                          [f"{first_column}{sheet_row}:{last_column}{sheet_row}" for sheet_row in targets.values()])
+    for key, cells in zip(targets, results):
+        values = list(cells[0]) if cells else []
+        values += [""] * (last - first + 1 - len(values))
+        if submission_key(values[position - first] for position in key_positions) != key:
+            return False
+    return True
+
+def _first_appended_row(response):
+    # "All_Submissions_V2!A12:AN14" -> 12
+    updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+    match = re.search(r"![A-Z]+(\d+)", updated_range)
+    return int(match.group(1)) if match else None
+
+def upsert_submission_rows(worksheet, column_map, data_dicts):
+    # Returns [(sheet_row, data_dict)] for the submissions now in the sheet (sheet_row None if it can't be told)
+    row_index = get_submission_row_index(worksheet)
+    pending = {} # Last write wins within a batch
+    for data_dict in data_dicts:
+        key = submission_key(data_dict.get(h, "") for h in SUBMISSION_KEY_HEADERS)
+        pending[key] = (map_row(column_map, data_dict), submission_content_hash(data_dict), data_dict)
+
+    with row_index["lock"]:
+        if row_index["rows"] is None: # Another thread's append lost track of its rows after we fetched the index
+            _load_submission_row_index(worksheet, column_map.positions, row_index)
+        rows = row_index["rows"]
+        targets = {key: rows[key][0] for key in pending if key in rows}
+        if targets and not _row_keys_still_match(worksheet, column_map.positions, targets):
+            logger.info("Rows of %s moved since the upsert index was read; rebuilding it", worksheet.title)
+            _load_submission_row_index(worksheet, column_map.positions, row_index)
+            rows = row_index["rows"]
+        updates, new_rows, placed_rows = [], [], []
+        for key, (data_row, content_hash, data_dict) in pending.items():
+            existing = rows.get(key)
+            if existing is None:
+                new_rows.append((key, data_row, content_hash))
+            else:
+                placed_rows.append((existing[0], data_dict))
+                if existing[1] != content_hash: # Unchanged payloads (e.g. double-clicks) are skipped
+                    updates.append((existing, data_row, content_hash))
+
+        if updates:
+            sheets_call(
+                "sheets.batch_update", "write", worksheet.batch_update,
+                [{"range": f"A{existing[0]}", "values": [data_row]} for existing, data_row, _ in updates],
+                value_input_option='USER_ENTERED',
+            )
+            for existing, _, content_hash in updates:
+                existing[1] = content_hash
+        if new_rows:
+            response = sheets_call("sheets.append_rows", "write", worksheet.append_rows, [data_row for _, data_row, _ in new_rows], value_input_option='USER_ENTERED')
+            first_row = _first_appended_row(response)
+            if first_row is None:
+                row_index["rows"] = None # Can't tell where the rows landed; rebuild on next use
+                return placed_rows + [(None, pending[key][2]) for key, _, _ in new_rows]
+            for offset, (key, _, content_hash) in enumerate(new_rows):
+                rows[key] = [first_row + offset, content_hash]
+                placed_rows.append((first_row + offset, pending[key][2]))
+    return placed_rows
+
+@timed_phase("save_to_gsheets_new_row")
+def save_to_gsheets_new_row(data_dict):
+    gspread = lazy_import("gspread")
+    try:
+        with leased_gsheets_client() as gc:
+            if not gc:
+                return False
+            append_submission_rows(gc, [data_dict])
+        return True
+    except gspread.exceptions.APIError as e:
+        st.error(f"GSheets API Error: {e}. Check Google Sheet Sharing settings or API quotas.")
+        return False
+    except Exception as e:
+        st.error(f"GSheets Write Error: {e}")
+        return False
+
+# --- Submission Mirror ---
+# Every row this process writes to Sheets is also kept in a local SQLite mirror. The mirror indexes group,
+# meeting date and day focus, and has an FTS5 index over the free-text day fields, so the instructor dashboard
+# and its search run locally. Sheets stays the system of record. reconcile_mirror() reads one column of a sheet
+# to find rows the mirror lacks (written by other processes, or before the mirror existed), fetches only those,
+# and drops rows that have since been cleared. A full reconcile re-reads every row to pick up upserts and
+# manual edits. A background job reconciles the main sheet and recent shards every MIRROR_RECONCILE_SECONDS.
+MIRROR_PATH = os.environ.get("CAPSTONE_MIRROR_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "submission_mirror.sqlite3"))
+MIRROR_TEXT_FIELDS = tuple(field.id for field in FORM_FIELDS if field.kind == "text_area")
+MIRROR_TEXT_ROWID_STRIDE = 1000 # submission_text rowids for submission n are n * 1000 + field index
+MIRROR_RECONCILE_SECONDS = 300
+MIRROR_FULL_RECONCILE_SECONDS = 900 # Dashboard queries re-read everything now and then to pick up upserts and manual edits
+MIRROR_FULL_CHUNK_ROWS = 500
+MIRROR_FETCH_RANGES = 100 # Row ranges per batch_get when pulling missing rows
+MIRROR_SEARCH_LIMIT = 50
+
+def _mirror_connect(path):
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def _init_mirror(path):
+    conn = _mirror_connect(path)
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY,
+                spreadsheet TEXT NOT NULL,
+                sheet TEXT NOT NULL,
+                sheet_row INTEGER NOT NULL,
+                group_number TEXT NOT NULL,
+                meeting_date TEXT NOT NULL,
+                meeting_day_focus TEXT NOT NULL,
+                day INTEGER NOT NULL, -- 0 if the day focus is no known tab title
+                data TEXT NOT NULL, -- JSON {header: value}, values as the sheet shows them
+                mirrored_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS submissions_position ON submissions (spreadsheet, sheet, sheet_row);
+            CREATE INDEX IF NOT EXISTS submissions_group ON submissions (group_number);
+            CREATE INDEX IF NOT EXISTS submissions_date ON submissions (meeting_date);
+            CREATE INDEX IF NOT EXISTS submissions_day_focus ON submissions (meeting_day_focus);
+            -- Trigrams match inside words, which Japanese notes (no spaces between words) need
+            CREATE VIRTUAL TABLE IF NOT EXISTS submission_text USING fts5(body, field UNINDEXED, tokenize = 'trigram');
+            CREATE TABLE IF NOT EXISTS mirror_sheets (
+                spreadsheet TEXT NOT NULL,
+                sheet TEXT NOT NULL,
+                reconciled_at REAL NOT NULL DEFAULT 0,
+                full_reconciled_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (spreadsheet, sheet)
+            ) WITHOUT ROWID;""")
+    finally:
+        conn.close()
+
+@st.cache_resource # One mirror and one reconcile job per server process
+def get_submission_mirror():
+    _init_mirror(MIRROR_PATH)
+    mirror = {"path": MIRROR_PATH, "lock": threading.Lock()}
+    job = threading.Thread(target=_mirror_reconcile_loop, args=(mirror,), name="capstone-mirror", daemon=True)
+    job.start()
+    return mirror
+
+@contextmanager
+def _mirror_transaction(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def _mirror_value(value):
+    # As the sheet shows a written value: checkboxes read back as TRUE/FALSE
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return "" if value is None else str(value)
+
+def _store_mirror_rows(conn, spreadsheet_id, sheet_name, placed_rows, started_at=None):
+    # Inserts or replaces [(sheet_row, {header: value})], FTS entries included. Rows the mirror recorded at or
+    # after started_at (written while a reconcile was reading the sheet) are left as they are.
+    day_by_title = get_day_by_tab_title()
+    now = time.time()
+    for sheet_row, data_dict in placed_rows:
+        values = {header: _mirror_value(value) for header, value in data_dict.items() if header}
+        day_focus = values.get("MeetingDayFocus", "").strip()
+        row = conn.execute(
+            """INSERT INTO submissions (spreadsheet, sheet, sheet_row, group_number, meeting_date, meeting_day_focus, day, data, mirrored_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (spreadsheet, sheet, sheet_row) DO UPDATE SET
+                   group_number = excluded.group_number, meeting_date = excluded.meeting_date, meeting_day_focus = excluded.meeting_day_focus,
+                   day = excluded.day, data = excluded.data, mirrored_at = excluded.mirrored_at
+               WHERE submissions.mirrored_at < ?
+               RETURNING id""",
+            (spreadsheet_id, sheet_name, sheet_row, values.get("GroupNumber", "").strip(), values.get("MeetingDate", "").strip(), day_focus,
+             day_by_title.get(day_focus, 0), json.dumps(values, ensure_ascii=False), now, started_at if started_at is not None else now),
+        ).fetchone()
+        if row is None:
+            continue
+        base = row[0] * MIRROR_TEXT_ROWID_STRIDE
+        conn.execute("DELETE FROM submission_text WHERE rowid BETWEEN ? AND ?", (base, base + MIRROR_TEXT_ROWID_STRIDE - 1))
+        conn.executemany("INSERT INTO submission_text (rowid, body, field) VALUES (?, ?, ?)",
+                         [(base + i, values[field_id], field_id) for i, field_id in enumerate(MIRROR_TEXT_FIELDS) if values.get(field_id, "").strip()])
+
+def _delete_mirror_rows(conn, spreadsheet_id, sheet_name, sheet_rows, started_at):
+    for sheet_row in sheet_rows:
+        row = conn.execute("DELETE FROM submissions WHERE spreadsheet = ? AND sheet = ? AND sheet_row = ? AND mirrored_at < ? RETURNING id",
+                           (spreadsheet_id, sheet_name, sheet_row, started_at)).fetchone()
+        if row is not None:
+            base = row[0] * MIRROR_TEXT_ROWID_STRIDE
+            conn.execute("DELETE FROM submission_text WHERE rowid BETWEEN ? AND ?", (base, base + MIRROR_TEXT_ROWID_STRIDE - 1))
+
+@timed_phase("mirror_submission_rows")
+def mirror_submission_rows(sheet_name, placed_rows):
+    # Records [(sheet_row, data_dict)] just written to sheet_name. Rows whose position is unknown are left for
+    # the next reconcile to pull. Never raises: the sheet write it follows has already succeeded.
+    placed_rows = [(sheet_row, data_dict) for sheet_row, data_dict in placed_rows if sheet_row is not None]
+    if not placed_rows:
+        return
+    try:
+        conn = _mirror_connect(get_submission_mirror()["path"])
+        try:
+            with _mirror_transaction(conn):
+                _store_mirror_rows(conn, st.secrets["gcp_spreadsheet"]["key"], sheet_name, placed_rows)
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Mirror write for %s failed; the next reconcile pulls the rows: %s", sheet_name, e)
+
+def _row_ranges(sheet_rows):
+    # [2, 3, 4, 9] -> [(2, 4), (9, 9)]
+    ranges = []
+    for sheet_row in sheet_rows:
+        if ranges and ranges[-1][1] == sheet_row - 1:
+            ranges[-1][1] = sheet_row
+        else:
+            ranges.append([sheet_row, sheet_row])
+    return ranges
+
+def _reconcile_sheet(gc, conn, spreadsheet_id, sheet_name, full):
+    # Returns the number of rows pulled from the sheet
+    started_at = time.time()
+    worksheet, column_map = open_worksheet_readonly(gc, sheet_name)
+    headers = list(column_map.headers) if worksheet else []
+    width = len(headers)
+    rowcol_to_a1 = lazy_import("gspread").utils.rowcol_to_a1
+    fetched, present = [], set()
+    # Only mirrored rows up to read_through can be found cleared; rows past it were never read
+    read_through = 1
+    if worksheet is None:
+        pass # Nothing has been written to this sheet yet
+    elif full:
+        for first_row, rows in iter_sheet_row_chunks(worksheet, width, 2, MIRROR_FULL_CHUNK_ROWS):
+            fetched.extend((first_row + offset, row) for offset, row in enumerate(rows))
+            read_through = first_row + MIRROR_FULL_CHUNK_ROWS - 1
+        present = {sheet_row for sheet_row, row in fetched if any(str(value).strip() for value in row)}
+    else:
+        # Every row the app writes has a Timestamp; one column read says which rows exist
+        column = rowcol_to_a1(1, headers.index("Timestamp") + 1 if "Timestamp" in headers else 1)[:-1]
+        cells = sheets_call("sheets.get", "read", worksheet.get, f"{column}2:{column}")
+        present = {offset + 2 for offset, cell in enumerate(cells) if cell and str(cell[0]).strip()}
+        read_through = len(cells) + 1 # The reply ends at the last Timestamp; rows after it are left to a full pass
+        mirrored = {sheet_row for (sheet_row,) in conn.execute(
+            "SELECT sheet_row FROM submissions WHERE spreadsheet = ? AND sheet = ?", (spreadsheet_id, sheet_name))}
+        ranges = _row_ranges(sorted(present - mirrored))
+        last_column = rowcol_to_a1(1, max(width, 1))[:-1]
+        for i in range(0, len(ranges), MIRROR_FETCH_RANGES):
+            chunk = ranges[i:i + MIRROR_FETCH_RANGES]
+            results = sheets_call("sheets.batch_get", "read", worksheet.batch_get, [f"A{first}:{last_column}{last}" for first, last in chunk])
+            for (first, _), rows in zip(chunk, results):
+                fetched.extend((first + offset, row) for offset, row in enumerate(rows))
+
+    with _mirror_transaction(conn):
+        stale = [sheet_row for (sheet_row,) in conn.execute(
+            "SELECT sheet_row FROM submissions WHERE spreadsheet = ? AND sheet = ? AND sheet_row <= ?", (spreadsheet_id, sheet_name, read_through))
+            if sheet_row not in present]
+        _delete_mirror_rows(conn, spreadsheet_id, sheet_name, stale, started_at)
+        _store_mirror_rows(conn, spreadsheet_id, sheet_name,
+                           [(sheet_row, dict(zip(headers, list(row) + [""] * (width - len(row))))) for sheet_row, row in fetched if sheet_row in present],
+                           started_at)
+        conn.execute(
+            """INSERT INTO mirror_sheets (spreadsheet, sheet, reconciled_at, full_reconciled_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT (spreadsheet, sheet) DO UPDATE SET reconciled_at = excluded.reconciled_at,
+                   full_reconciled_at = MAX(mirror_sheets.full_reconciled_at, excluded.full_reconciled_at)""",
+            (spreadsheet_id, sheet_name, started_at, started_at if full else 0),
+        )
+    return len(fetched)
+
+@timed_phase("reconcile_mirror")
+def reconcile_mirror(sheet_names=None, full=False, max_age=0, full_after=MIRROR_FULL_RECONCILE_SECONDS):
+    # Reconciles those of sheet_names (default: the main sheet and every shard) last reconciled max_age or more
+    # seconds ago; fully if `full` or if the last full pass is older than full_after (None: never).
+    # Returns the oldest reconcile time among them. Raises gspread errors (and ConnectionError without credentials).
+    spreadsheet_id = st.secrets["gcp_spreadsheet"]["key"]
+    mirror = get_submission_mirror()
+    with mirror["lock"]: # One reconcile at a time; sessions that waited here then find the sheets fresh
+        conn = _mirror_connect(mirror["path"])
+        try:
+            def reconciled():
+                return {sheet: (reconciled_at, full_at) for sheet, reconciled_at, full_at in conn.execute(
+                    "SELECT sheet, reconciled_at, full_reconciled_at FROM mirror_sheets WHERE spreadsheet = ?", (spreadsheet_id,))}
+
+            def due(sheet_name, state, now):
+                reconciled_at, full_at = state.get(sheet_name, (0.0, 0.0))
+                full_due = full or (full_after is not None and now - full_at >= full_after)
+                return full_due, full_due or now - reconciled_at >= max_age
+
+            state, now = reconciled(), time.time()
+            if sheet_names is None or any(due(name, state, now)[1] for name in sheet_names):
+                with leased_gsheets_client() as gc:
+                    if not gc:
+                        raise ConnectionError("Google Sheets client unavailable")
+                    if sheet_names is None:
+                        sheet_names = [SUBMISSIONS_SHEET_NAME] + (sorted(get_shard_index(gc, refresh=full)) if shard_settings()[0] else [])
+                    for sheet_name in sheet_names:
+                        full_due, reconcile_due = due(sheet_name, state, now)
+                        if reconcile_due:
+                            pulled = _reconcile_sheet(gc, conn, spreadsheet_id, sheet_name, full_due)
+                            logger.info("Mirror %s reconcile of %s pulled %d rows", "full" if full_due else "incremental", sheet_name, pulled)
+                state = reconciled()
+            return min(state.get(sheet_name, (0.0, 0.0))[0] for sheet_name in sheet_names)
+        finally:
+            conn.close()
+
+def _mirror_reconcile_loop(mirror):
+    # Keeps the main sheet and the shards of recent weeks current without waiting for an instructor to ask
+    while True:
+        time.sleep(MIRROR_RECONCILE_SECONDS)
+        try:
+            sheet_names = [SUBMISSIONS_SHEET_NAME]
+            if shard_settings()[0]:
+                with leased_gsheets_client() as gc:
+                    if not gc:
+                        continue
+                    shards = get_shard_index(gc)
+                recent = date.today() - timedelta(days=DASHBOARD_DEFAULT_RANGE_DAYS - 1)
+                sheet_names += sorted(shard.name for shard in select_shards(shards.values(), date_from=recent))
+            with sheets_priority(SHEETS_PRIORITY_EXPORT):
+                reconcile_mirror(sheet_names, max_age=MIRROR_RECONCILE_SECONDS, full_after=None)
+        except Exception as e: # Including no secrets; tried again next round
+            logger.warning("Mirror reconcile failed: %s", e)
+
+def _mirror_where(spreadsheet_id, sheet_names, date_from=None, date_to=None, groups=(), days=()):
+    # SQL condition and parameters on the indexed columns of `submissions`
+    clauses = ["s.spreadsheet = ?", f"s.sheet IN ({', '.join('?' * len(sheet_names))})"]
+    params = [spreadsheet_id, *sheet_names]
+    if date_from:
+        clauses.append("s.meeting_date >= ?")
+        params.append(str(date_from))
+    if date_to:
+        clauses.append("s.meeting_date <= ?")
+        params.append(str(date_to))
+    if groups:
+        clauses.append(f"s.group_number IN ({', '.join('?' * len(groups))})")
+        params.extend(groups)
+    if days:
+        clauses.append(f"s.day IN ({', '.join('?' * len(days))})")
+        params.extend(int(day) for day in days)
+    return " AND ".join(clauses), params
+
+@timed_phase("query_mirror")
+def query_mirror(sheet_names, date_from=None, date_to=None, groups=()):
+    # DataFrame of the mirrored submissions in sheet_names: SheetRow, the sheet's headers, Day and Shard
+    pd = lazy_import("pandas") # Only the instructor views need pandas
+    where, params = _mirror_where(st.secrets["gcp_spreadsheet"]["key"], sheet_names, date_from, date_to, groups)
+    conn = _mirror_connect(get_submission_mirror()["path"])
+    try:
+        rows = conn.execute(f"SELECT s.sheet, s.sheet_row, s.day, s.data FROM submissions s WHERE {where} ORDER BY s.sheet, s.sheet_row", params).fetchall()
+    finally:
+        conn.close()
+    records = [{"SheetRow": sheet_row, **json.loads(data), "Day": day, "Shard": sheet} for sheet, sheet_row, day, data in rows]
+    headers = list(dict.fromkeys([*SUBMISSION_HEADERS, *(header for record in records for header in record)]))
+    headers = [header for header in headers if header not in ("SheetRow", "Day", "Shard")]
+    frame = pd.DataFrame.from_records(records, columns=["SheetRow", *headers, "Day", "Shard"])
+    frame[headers] = frame[headers].fillna("").astype(str)
+    return frame
+
+def _fts_query(words):
+    # Each word as a quoted FTS5 string, so punctuation in the search box can't break the query syntax
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+@timed_phase("search_mirror")
+def search_mirror(text, sheet_names, date_from=None, date_to=None, groups=(), days=(), limit=MIRROR_SEARCH_LIMIT):
+    # Best matches of every word of `text` in the free-text day fields:
+    # [(group, date, day, field id, snippet, sheet, sheet row)]
+    words = text.split()
+    if not words:
+        return []
+    where, params = _mirror_where(st.secrets["gcp_spreadsheet"]["key"], sheet_names, date_from, date_to, groups, days)
+    indexed = [word for word in words if len(word) >= 3]
+    # Trigrams can't match words under three characters; those are checked row by row instead
+    for word in words:
+        if len(word) < 3:
+            where += r" AND t.body LIKE ? ESCAPE '\'"
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", word) + "%")
+    if indexed:
+        where = f"submission_text MATCH ? AND {where}"
+        params.insert(0, _fts_query(indexed))
+        excerpt, order = "snippet(submission_text, 0, '**', '**', '…', 24)", "t.rank"
+    else:
+        excerpt, order = "substr(t.body, 1, 160)", "s.meeting_date DESC"
+    conn = _mirror_connect(get_submission_mirror()["path"])
+    try:
+        return conn.execute(
+            f"""SELECT s.group_number, s.meeting_date, s.day, t.field, {excerpt}, s.sheet, s.sheet_row
+                FROM submission_text t JOIN submissions s ON s.id = t.rowid / {MIRROR_TEXT_ROWID_STRIDE}
+                WHERE {where} ORDER BY {order} LIMIT ?""",
+            [*params, limit],
+        ).fetchall()
+    finally:
+        conn.close()
+
+# --- Submission Outbox ---
+# Submissions are committed to a local SQLite outbox first so the submit button returns immediately.
+# A background worker drains the outbox into Google Sheets in batches (one values_append per batch).
+# Delivered rows are kept for OUTBOX_RETENTION_DAYS (for status checks and recovery), then deleted at startup
+# and once a day by the worker.
+OUTBOX_PATH = os.environ.get("CAPSTONE_OUTBOX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "submission_outbox.sqlite3"))
+OUTBOX_BATCH_SIZE = 25
+OUTBOX_BATCH_WINDOW_SECONDS = 0.5 # Let a burst of submissions collect into one batch
+OUTBOX_IDLE_POLL_SECONDS = 30
+# Rows stuck in 'sending' (e.g. a crashed process) are retried after this. A delivering worker refreshes its claim
+# before and after every quota wait, so this only has to outlast the longest single wait (pool or quota queue).
+OUTBOX_CLAIM_TIMEOUT_SECONDS = SHEETS_MAX_QUEUE_WAIT_SECONDS + 180
+OUTBOX_CLAIM_REFRESH_SECONDS = 15
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BACKOFF_BASE_SECONDS = 2
+OUTBOX_BACKOFF_CAP_SECONDS = 120
+OUTBOX_STATUS_POLL_SECONDS = 2
+OUTBOX_RETENTION_DAYS = 30
+OUTBOX_PRUNE_INTERVAL_SECONDS = 86400
+
+def _outbox_connect(path):
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL") # fsync on every commit
+    return conn
+
+def _init_outbox(path):
+    conn = _outbox_connect(path)
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending', -- pending | sending | delivered | failed
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                claimed_at REAL,
+                delivered_at REAL,
+                last_error TEXT NOT NULL DEFAULT ''
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        prune_outbox(conn)
+    finally:
+        conn.close()
+
+def prune_outbox(conn, now=None):
+    # Deletes delivered rows, payload and all, once they are older than the retention window; returns how many
+    cutoff = (time.time() if now is None else now) - OUTBOX_RETENTION_DAYS * 86400
+    return conn.execute("DELETE FROM outbox WHERE status = 'delivered' AND delivered_at < ?", (cutoff,)).rowcount
+
+@st.cache_resource # One outbox and one flush worker per server process
+def get_submission_outbox():
+    _init_outbox(OUTBOX_PATH)
+    outbox = {"path": OUTBOX_PATH, "wakeup": threading.Event()}
+    worker = threading.Thread(target=_outbox_worker_loop, args=(outbox,), name="capstone-outbox", daemon=True)
+    worker.start()
+    return outbox
+
+@timed_phase("enqueue_submission")
+def enqueue_submission(data_dict):
+    # Durably records a submission and returns its outbox id, or None if the local write failed
+    try:
+        outbox = get_submission_outbox()
+        conn = _outbox_connect(outbox["path"])
+        try:
+            cursor = conn.execute(
+                "INSERT INTO outbox (created_at, payload) VALUES (?, ?)",
+                (time.time(), json.dumps(data_dict, ensure_ascii=False, default=str)),
+            )
+            submission_id = cursor.lastrowid
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        logger.error("Outbox write failed: %s", e)
+        return None
+    outbox["wakeup"].set()
+    return submission_id
+
+def get_submission_status(submission_id):
+    conn = _outbox_connect(get_submission_outbox()["path"])
+    try:
+        row = conn.execute("SELECT status, attempts, last_error FROM outbox WHERE id = ?", (submission_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {"status": row[0], "attempts": row[1], "last_error": row[2]}
+
+def _claim_outbox_batch(conn, now):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            """SELECT id, payload, attempts, created_at FROM outbox
+               WHERE (status = 'pending' AND next_attempt_at <= ?)
+                  OR (status = 'sending' AND claimed_at < ?)
+               ORDER BY id LIMIT ?""",
+            (now, now - OUTBOX_CLAIM_TIMEOUT_SECONDS, OUTBOX_BATCH_SIZE),
+        ).fetchall()
+        conn.executemany("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?", [(now, row[0]) for row in rows])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+def flush_outbox_batch(path):
+    # Delivers up to OUTBOX_BATCH_SIZE due submissions. Returns how many were delivered.
+    conn = _outbox_connect(path)
+    try:
+        now = time.time()
+        rows = _claim_outbox_batch(conn, now)
+        if not rows:
+            return 0
+        # One delivery per target sheet, so a failing shard never makes rows already written elsewhere retry
+        rows_by_sheet = {}
+        for row in rows:
+            rows_by_sheet.setdefault(submission_sheet_name(json.loads(row[1])), []).append(row)
+        return sum(_deliver_outbox_rows(conn, sheet_rows, now) for sheet_rows in rows_by_sheet.values())
+    finally:
+        conn.close()
+
+def _outbox_claim_refresher(conn, ids):
+    # Heartbeat for sheets_heartbeat(): keeps the claim on rows being delivered fresh, so another process's
+    # worker does not take them for a crashed delivery and append them again
+    refreshed_at = [time.time()]
+
+    def refresh():
+        now = time.time()
+        if now - refreshed_at[0] < OUTBOX_CLAIM_REFRESH_SECONDS:
+            return
+        try:
+            conn.executemany("UPDATE outbox SET claimed_at = ? WHERE id = ? AND status = 'sending'", [(now, i) for i in ids])
+            refreshed_at[0] = now
+        except sqlite3.Error as e: # Tried again before the next request
+            logger.warning("Could not refresh the outbox claim: %s", e)
+    return refresh
+
+def _deliver_outbox_rows(conn, rows, now):
+    ids = [row[0] for row in rows]
+    try:
+        with timing_trace() as phases, timed("flush_outbox_batch"), sheets_heartbeat(_outbox_claim_refresher(conn, ids)), \
+                leased_gsheets_client() as gc:
+            if not gc:
+                raise ConnectionError("Google Sheets client unavailable")
+            append_submission_rows(gc, [json.loads(row[1]) for row in rows])
+    except Exception as e:
+        retryable = isinstance(e, ConnectionError) or _is_retryable_gsheets_error(e)
+        updates = []
+        for submission_id, _, attempts, _ in rows:
+            attempts += 1
+            if retryable and attempts < OUTBOX_MAX_ATTEMPTS:
+                delay = min(OUTBOX_BACKOFF_CAP_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * 2 ** attempts)
+                updates.append(("pending", attempts, now + delay * random.uniform(0.5, 1.0), str(e), submission_id))
+            else:
+                updates.append(("failed", attempts, now, str(e), submission_id))
+        conn.executemany(
+            "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            updates,
+        )
+        logger.warning("Outbox batch of %d failed (retryable=%s): %s", len(rows), retryable, e)
+        log_submission_event("submission_delivery", phases, outcome="retry" if retryable else "failed", submission_ids=ids,
+                             attempts=[row[2] + 1 for row in rows], error=str(e))
+        return 0
+    delivered_at = time.time()
+    conn.executemany(
+        "UPDATE outbox SET status = 'delivered', delivered_at = ?, last_error = '' WHERE id = ?",
+        [(delivered_at, submission_id) for submission_id in ids],
+    )
+    log_submission_event("submission_delivery", phases, outcome="delivered", submission_ids=ids,
+                         queued_ms=[round((delivered_at - row[3]) * 1000) for row in rows])
+    return len(ids)
+
+def _seconds_until_next_due(path):
+    conn = _outbox_connect(path)
+    try:
+        row = conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+    finally:
+        conn.close()
+    if row is None or row[0] is None:
+        return OUTBOX_IDLE_POLL_SECONDS
+    return min(OUTBOX_IDLE_POLL_SECONDS, max(0.0, row[0] - time.time()))
+
+def _outbox_worker_loop(outbox):
+    timeout = 0
+    pruned_at = time.monotonic() # _init_outbox() has just pruned
+    while True:
+        if outbox["wakeup"].wait(timeout=timeout):
+            outbox["wakeup"].clear()
+            time.sleep(OUTBOX_BATCH_WINDOW_SECONDS)
+        try:
+            while flush_outbox_batch(outbox["path"]):
+                pass
+            if time.monotonic() - pruned_at >= OUTBOX_PRUNE_INTERVAL_SECONDS:
+                conn = _outbox_connect(outbox["path"])
+                try:
+                    prune_outbox(conn)
+                finally:
+                    conn.close()
+                pruned_at = time.monotonic()
+            timeout = _seconds_until_next_due(outbox["path"])
+        except Exception as e: # Never let the worker die; the rows stay in the outbox
+            logger.exception("Outbox worker error: %s", e)
+            timeout = OUTBOX_BACKOFF_BASE_SECONDS
+
+# --- Draft Autosave ---
+# Form text is also kept as a local draft per browser, so a dropped connection or a server restart does not lose
+# it. Each session hashes its fields and queues only the ones that changed since its last snapshot; a writer
+# thread stores a draft once its edits pause for DRAFT_DEBOUNCE_SECONDS (or every DRAFT_MAX_DELAY_SECONDS while
+# typing goes on). A draft is named by a random token kept in the URL (?draft=), created on its first autosave,
+# so a reconnect can find it again; the group and date are stored with it but never look one up.
+DRAFTS_PATH = os.environ.get("CAPSTONE_DRAFTS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "submission_drafts.sqlite3"))
+DRAFT_DEBOUNCE_SECONDS = 3
+DRAFT_MAX_DELAY_SECONDS = 30
+DRAFT_RETENTION_DAYS = 30
+DRAFT_TOKEN_QUERY_PARAM = "draft"
+DRAFT_TOKEN_MAX_LENGTH = 64
+# Session-state key -> empty value; the group number and date are stored as the draft's own columns
+DRAFT_FIELD_DEFAULTS = MappingProxyType({
+    **{key: "" for key in ("time_slot", "project_title", "current_research_question", "note_taker")},
+    **{field.id: field.default for field in FORM_FIELDS},
+})
+
+def _draft_value_hash(value):
+    return hashlib.blake2b(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"), digest_size=8).digest()
+
+DRAFT_DEFAULT_HASHES = MappingProxyType({key: _draft_value_hash(default) for key, default in DRAFT_FIELD_DEFAULTS.items()})
+# The fields each fragment can change, so its own reruns hash only those
+DRAFT_SIDEBAR_FIELD_IDS = ("time_slot", "project_title", "note_taker")
+DRAFT_DAY_FIELD_IDS = MappingProxyType({
+    day: ("current_research_question", *(field.id for field in FORM_FIELDS if field.day == day))
+    for day in sorted({field.day for field in FORM_FIELDS})
+})
+
+_draft_full_run = threading.local()
+
+def _drafts_connect(path):
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+def _init_drafts(path):
+    conn = _drafts_connect(path)
+    try:
+        if "token" not in {row[1] for row in conn.execute("PRAGMA table_info(drafts)")}:
+            conn.execute("DROP TABLE IF EXISTS drafts") # Drafts keyed by (group, date) cannot be tied to a browser
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS drafts (
+                token TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT NOT NULL, -- JSON
+                group_number TEXT NOT NULL,
+                meeting_date TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (token, field)
+            ) WITHOUT ROWID""")
+        conn.execute("DELETE FROM drafts WHERE updated_at < ?", (time.time() - DRAFT_RETENTION_DAYS * 86400,))
+    finally:
+        conn.close()
+
+@st.cache_resource # One draft store and one writer thread per server process
+def get_draft_store():
+    _init_drafts(DRAFTS_PATH)
+    store = {"path": DRAFTS_PATH, "lock": threading.Lock(), "pending": {}, "wakeup": threading.Event()}
+    writer = threading.Thread(target=_draft_writer_loop, args=(store,), name="capstone-drafts", daemon=True)
+    writer.start()
+    atexit.register(flush_drafts, store, force=True) # Keep edits still inside the debounce window on shutdown
+    return store
+
+def queue_draft_changes(token, meta, changes):
+    # meta is the draft's (group number, date); a change to it alone is queued with no field changes
+    store = get_draft_store()
+    now = time.monotonic()
+    with store["lock"]:
+        pending = store["pending"].setdefault(token, {"fields": {}, "first_at": now, "last_at": now})
+        pending["fields"].update(changes)
+        pending["meta"] = meta
+        pending["last_at"] = now
+    store["wakeup"].set()
+
+def flush_drafts(store, force=False):
+    # Writes the drafts whose edits have settled (all of them with force). Returns seconds until the next is due.
+    now = time.monotonic()
+    with store["lock"]:
+        due = {
+            token: pending for token, pending in store["pending"].items()
+            if force or now - pending["last_at"] >= DRAFT_DEBOUNCE_SECONDS or now - pending["first_at"] >= DRAFT_MAX_DELAY_SECONDS
+        }
+        for token in due:
+            del store["pending"][token]
+    if due:
+        updated_at = time.time()
+        try:
+            conn = _drafts_connect(store["path"])
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    """INSERT INTO drafts (token, field, value, group_number, meeting_date, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (token, field) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at""",
+                    [(token, field_id, json.dumps(value, ensure_ascii=False, default=str), *pending["meta"], updated_at)
+                     for token, pending in due.items() for field_id, value in pending["fields"].items()],
+                )
+                conn.executemany( # The group or date may have changed since the other fields were written
+                    "UPDATE drafts SET group_number = ?, meeting_date = ?, updated_at = ? WHERE token = ?",
+                    [(*pending["meta"], updated_at, token) for token, pending in due.items()],
+                )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Draft write failed, will retry: %s", e)
+            with store["lock"]: # Put the changes back unless newer edits to the same fields arrived meanwhile
+                for token, pending in due.items():
+                    current = store["pending"].setdefault(token, {"fields": {}, "meta": pending["meta"], "first_at": pending["first_at"], "last_at": pending["last_at"]})
+                    current["fields"] = {**pending["fields"], **current["fields"]}
+            return DRAFT_DEBOUNCE_SECONDS
+    with store["lock"]:
+        return min(
+            (max(0.0, min(pending["last_at"] + DRAFT_DEBOUNCE_SECONDS, pending["first_at"] + DRAFT_MAX_DELAY_SECONDS) - now)
+             for pending in store["pending"].values()),
+            default=None,
+        )
+
+def _draft_writer_loop(store):
+    timeout = None
+    while True:
+        store["wakeup"].wait(timeout=timeout)
+        store["wakeup"].clear()
+        try:
+            timeout = flush_drafts(store)
+        except Exception as e: # Never let the writer die; pending changes stay queued
+            logger.exception("Draft writer error: %s", e)
+            timeout = DRAFT_DEBOUNCE_SECONDS
+
+def load_draft(token):
+    # ((group number, date), {field: value}) for one draft, including changes still waiting for the writer;
+    # (None, {}) if there is no such draft
+    store = get_draft_store()
+    conn = _drafts_connect(store["path"])
+    try:
+        rows = conn.execute("SELECT field, value, group_number, meeting_date FROM drafts WHERE token = ?", (token,)).fetchall()
+    finally:
+        conn.close()
+    fields = {field_id: json.loads(value) for field_id, value, _, _ in rows}
+    meta = (rows[0][2], rows[0][3]) if rows else None
+    with store["lock"]:
+        pending = store["pending"].get(token)
+        if pending is not None:
+            fields.update(pending["fields"])
+            meta = pending["meta"]
+    return meta, fields
+
+def restore_draft():
+    # A new browser session (first load or reconnect) picks up the draft whose token is in its URL
+    token = st.query_params.get(DRAFT_TOKEN_QUERY_PARAM, "").strip()
+    if not token or len(token) > DRAFT_TOKEN_MAX_LENGTH:
+        return
+    try:
+        meta, fields = load_draft(token)
+        parsed_date = date.fromisoformat(meta[1]) if meta is not None else None
+    except ValueError:
+        return
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Draft restore failed: %s", e)
+        return
+    if meta is None: # Expired or never written: keep the token, so this browser's next draft reuses it
+        st.session_state.draft_snapshot = {"token": token, "meta": None, "hashes": {}}
+        return
+    st.session_state.group_number = meta[0]
+    st.session_state.date = parsed_date
+    hashes = {}
+    form_values = st.session_state.form_values
+    for field_id, value in fields.items():
+        if field_id in DRAFT_FIELD_DEFAULTS:
+            field = FORM_FIELDS_BY_ID.get(field_id)
+            if field is not None:
+                form_values[field.index] = value
+            else:
+                st.session_state[field_id] = value
+            hashes[field_id] = _draft_value_hash(value)
+    st.session_state.draft_snapshot = {"token": token, "meta": meta, "hashes": hashes}
+
+@contextmanager
+def full_run_autosave():
+    # A full run autosaves every field once, after the block; fragments rendered inside it skip their own pass
+    _draft_full_run.active = True
+    try:
+        yield
+    finally:
+        _draft_full_run.active = False
+    autosave_draft()
+
+@timed_phase("autosave_draft")
+def autosave_draft(field_ids=None):
+    # Queues the fields whose hash changed since this session's last snapshot; never touches the disk itself.
+    # Fragment reruns pass their own field_ids; inside a full run they leave it to full_run_autosave()
+    if field_ids is not None and getattr(_draft_full_run, "active", False):
+        return
+    group_number = str(st.session_state.get("group_number", "")).strip()
+    if not group_number:
+        return
+    meta = (group_number, str(st.session_state.get("date", "")))
+    snapshot = st.session_state.get("draft_snapshot")
+    if snapshot is None:
+        snapshot = st.session_state.draft_snapshot = {"token": secrets.token_urlsafe(16), "meta": None, "hashes": {}}
+    if st.query_params.get(DRAFT_TOKEN_QUERY_PARAM) != snapshot["token"]:
+        st.query_params[DRAFT_TOKEN_QUERY_PARAM] = snapshot["token"]
+    if snapshot["meta"] is None:
+        field_ids = None # A new draft starts from every field
+    changes = {}
+    form_values = st.session_state.form_values
+    for field_id in DRAFT_FIELD_DEFAULTS if field_ids is None else field_ids:
+        field = FORM_FIELDS_BY_ID.get(field_id)
+        value = form_values[field.index] if field is not None else st.session_state.get(field_id, DRAFT_FIELD_DEFAULTS[field_id])
+        value_hash = _draft_value_hash(value)
+        if snapshot["hashes"].get(field_id, DRAFT_DEFAULT_HASHES[field_id]) != value_hash:
+            changes[field_id] = value
+            snapshot["hashes"][field_id] = value_hash
+    if changes or snapshot["meta"] != meta:
+        queue_draft_changes(snapshot["token"], meta, changes)
+        snapshot["meta"] = meta
+
+# --- Submit Pipeline ---
+# Every day tab submits through submit_day_notes(). An attempt's idempotency key is derived from the group,
+# date, day and a hash of the content. The process-wide in-flight registry runs the first attempt for a key
+# and hands its result to every concurrent or repeated attempt (double-clicks, reruns, a second browser tab),
+# so one payload is queued once. A failed attempt is forgotten at once, so the student can simply retry.
+SUBMIT_RESULT_TTL_SECONDS = 600 # Identical resubmits within this window reuse the first attempt's result
+SUBMIT_WAIT_TIMEOUT_SECONDS = 60 # Longest a duplicate attempt waits for the first one to finish
+REQUIRED_SIDEBAR_FIELDS = ("group_number", "time_slot", "project_title", "note_taker")
+
+SubmitResult = namedtuple("SubmitResult", ["outcome", "submission_id", "idempotency_key", "duplicate"])
+
+@st.cache_resource # Shared by every session in this process
+def get_inflight_submissions():
+    return {"lock": threading.Lock(), "entries": {}}
+
+def submission_idempotency_key(data_dict):
+    group_number, meeting_date, day = submission_key(data_dict.get(h, "") for h in SUBMISSION_KEY_HEADERS)
+    key_material = "\x1f".join((group_number, meeting_date, str(day), submission_content_hash(data_dict)))
+    return hashlib.sha256(key_material.encode("utf-8")).hexdigest()[:32]
+
+def _reusable_result(result):
+    # A queued submission the outbox later gave up on may be submitted again
+    if result.outcome == "queued":
+        status = get_submission_status(result.submission_id)
+        return status is not None and status["status"] != "failed"
+    return result.outcome == "saved"
+
+def run_idempotent_submit(idempotency_key, submit):
+    # Runs submit() -> SubmitResult once per key; concurrent and repeated calls get that result, marked duplicate
+    registry = get_inflight_submissions()
+    with registry["lock"]:
+        now = time.time()
+        for key in [k for k, e in registry["entries"].items() if e["done"].is_set() and e["expires_at"] <= now]:
+            del registry["entries"][key]
+        entry = registry["entries"].get(idempotency_key)
+        owner = entry is None
+        if owner:
+            entry = registry["entries"][idempotency_key] = {"done": threading.Event(), "result": None, "expires_at": float("inf")}
+    if not owner:
+        if entry["done"].wait(SUBMIT_WAIT_TIMEOUT_SECONDS) and entry["result"] is not None and _reusable_result(entry["result"]):
+            return entry["result"]._replace(duplicate=True)
+        if entry["done"].is_set(): # The first attempt failed or has gone stale; this one starts afresh
+            with registry["lock"]:
+                if registry["entries"].get(idempotency_key) is entry:
+                    del registry["entries"][idempotency_key]
+            return run_idempotent_submit(idempotency_key, submit)
+        return SubmitResult("failed", None, idempotency_key, True)
+
+    result = None
+    try:
+        result = submit()
+    finally: # Also reached when a rerun interrupts the attempt; waiters then see no result and retry
+        with registry["lock"]:
+            entry["result"] = result
+            entry["expires_at"] = time.time() + SUBMIT_RESULT_TTL_SECONDS
+            if result is None or result.outcome not in ("queued", "saved"):
+                registry["entries"].pop(idempotency_key, None)
+        entry["done"].set()
+    return result
+
+def _deliver_submission(form_data, idempotency_key):
+    # Durable local write first; the outbox worker delivers it to Google Sheets
+    submission_id = enqueue_submission(form_data)
+    if submission_id is not None:
+        return SubmitResult("queued", submission_id, idempotency_key, False)
+    if save_to_gsheets_new_row(form_data): # Direct write if the outbox is unavailable
+        return SubmitResult("saved", None, idempotency_key, False)
+    return SubmitResult("failed", None, idempotency_key, False)
+
+def submit_day_notes(lang, tab_key):
+    # The submit pipeline: validate, deduplicate, queue (or save), log. Shows errors itself; returns a SubmitResult.
+    with timing_trace() as submit_phases:
+        submit_started = time.perf_counter()
+        form_data = get_all_form_data()
+        form_data["MeetingDayFocus"] = get_translation(lang, tab_key) # Set focus to current tab's name
+
+        missing_fields = [get_translation(lang, f) for f in REQUIRED_SIDEBAR_FIELDS if not st.session_state.get(f)]
+        if missing_fields:
+            # Try to get a translated "Please fill common fields" or use a default
+            common_fields_prompt_key = "please_fill_common_fields" # Add this key to locales/*.json if needed
+            common_fields_prompt = get_translation(lang, common_fields_prompt_key)
+            if common_fields_prompt == common_fields_prompt_key: # If no translation, use English
+                common_fields_prompt = "Please fill these common fields"
+            st.error(f"{get_translation(lang, 'submission_error')} {common_fields_prompt}: {', '.join(missing_fields)}")
+            result = SubmitResult("missing_fields", None, None, False)
+        else:
+            idempotency_key = submission_idempotency_key(form_data)
+            result = run_idempotent_submit(idempotency_key, lambda: _deliver_submission(form_data, idempotency_key))
+            if result.outcome == "failed":
+                st.error(get_translation(lang, "submission_gsheets_error"))
+    log_submission_event("submission", submit_phases, outcome=result.outcome, group=form_data["GroupNumber"], day=day_from_key(tab_key),
+                         submission_id=result.submission_id, idempotency_key=result.idempotency_key, duplicate=result.duplicate,
+                         total_ms=round((time.perf_counter() - submit_started) * 1000, 1))
+    return result
+
+def get_last_submission_status():
+    notes = st.session_state.get("submitted_notes")
+    return get_submission_status(notes.submission_id) if notes is not None and notes.submission_id is not None else None
+
+def render_submission_status(lang, status):
+    if status is None:
+        return
+    if status["status"] == "delivered":
+        st.success(get_translation(lang, "submission_success"))
+    elif status["status"] == "failed":
+        st.error(f"{get_translation(lang, 'submission_gsheets_error')} ({status['last_error']})")
+    else:
+        if status["attempts"]:
+            st.warning(get_translation(lang, "submission_retrying"))
+        else:
+            st.info(get_translation(lang, "submission_queued"))
+        queued, wait_seconds = get_sheets_queue_status("write")
+        if wait_seconds >= 1:
+            st.caption(get_translation(lang, "sheets_queue_wait").format(queued=queued, seconds=wait_seconds))
+
+@st.fragment(run_every=OUTBOX_STATUS_POLL_SECONDS)
+@timed_phase("render.submission_status")
+def poll_submission_status(lang):
+    # Refreshes only the status message while delivery is pending; one full rerun once it settles
+    status = get_last_submission_status()
+    render_submission_status(lang, status)
+    if status is None or status["status"] in ("delivered", "failed"):
+        st.rerun()
+
+def render_field(field, lang):
+    messages = get_messages(lang)
+    label, help_text, placeholder = messages[field.label_id], messages[field.help_id], messages[field.placeholder_id]
+    key, values = field.id, st.session_state.form_values
+    if field.kind == "checkbox":
+        default_value = values[field.index]
+        if not isinstance(default_value, bool): # Correct if somehow not a bool
+            default_value = False
+        values[field.index] = st.checkbox(label, value=default_value, help=help_text, key=f"widget_{key}")
+    elif field.kind == "text_input": # Text input for links
+        values[field.index] = st.text_input(label, value=values[field.index], placeholder=placeholder, help=help_text, key=f"widget_{key}")
+    else: # Default to text_area for other fields
+        values[field.index] = st.text_area(label, value=values[field.index], placeholder=placeholder, help=help_text, height=100, key=f"widget_{key}")
+
+def render_day_inputs(lang, day_prefix):
+    for field in get_day_fields(lang, day_from_key(day_prefix)):
+        render_field(field, lang)
+
+
+@st.fragment
+@timed_phase("render.sidebar")
+def render_meeting_info(lang):
+    # Sidebar meeting info reruns on its own; the tabs read these values from session_state at submit time
+    st.header(get_translation(lang, "sidebar_title"))
+    st.session_state.group_number = st.text_input(get_translation(lang, "group_number"), value=st.session_state.get("group_number",""), help=get_help_text(lang, "group_number"))
+    st.session_state.time_slot = st.text_input(get_translation(lang, "time_slot"), value=st.session_state.get("time_slot",""), help=get_help_text(lang, "time_slot"))
+    st.session_state.date = st.date_input(get_translation(lang, "date"), value=st.session_state.get("date", datetime.now().date()), help=get_help_text(lang, "date"))
+    st.session_state.project_title = st.text_input(get_translation(lang, "project_title"), value=st.session_state.get("project_title",""), help=get_help_text(lang, "project_title"))
+    st.session_state.note_taker = st.text_input(get_translation(lang, "note_taker"), value=st.session_state.get("note_taker",""), help=get_help_text(lang, "note_taker"))
+    autosave_draft(DRAFT_SIDEBAR_FIELD_IDS)
+
+def _sync_research_question(widget_key):
+    st.session_state.current_research_question = st.session_state[widget_key]
+    st.session_state.research_question_changed = True
+
+@st.fragment
+@timed_phase(lambda lang, tab_key, day_prefix: f"render.{tab_key}")
+def render_day_tab(lang, tab_key, day_prefix):
+    st.header(get_translation(lang, tab_key)) # Display translated tab header
+    st.info(get_translation(lang, "hint_visibility"))
+
+    # Special handling for Day 4's unique structure (README checklist)
+    if tab_key == "day_4_tab":
+        # Render non-README fields for Day 4, then the README checklist under its title
+        day_4_fields = get_day_fields(lang, 4)
+        for field in day_4_fields:
+            if not field.id.startswith(day_prefix + "readme_"):
+                render_field(field, lang)
+
+        st.markdown(f"**{get_translation(lang, README_CHECKLIST_TITLE_KEY)}**")
+        st.caption(f"*{get_help_text(lang, README_CHECKLIST_TITLE_KEY)}*")
+
+        for field in day_4_fields:
+            if field.id.startswith(day_prefix + "readme_"):
+                render_field(field, lang)
+    else:
+        # Generic rendering for Day 1, 2, 3
+        render_day_inputs(lang, day_prefix)
+
+    st.markdown("---")
+    # Current Research Question - Common to all tabs
+    # The label for the text_area itself is a bit redundant due to the subheader, so can be collapsed
+    st.subheader(get_translation(lang, "current_research_question"))
+    research_q_key = f"research_q_input_{day_prefix}" # Unique key for the text_area widget on each tab
+    if st.session_state.get(research_q_key) != st.session_state.current_research_question:
+        st.session_state[research_q_key] = st.session_state.current_research_question # Pick up edits made on another tab
+    st.text_area(
+        label=get_translation(lang, "current_research_question"), # Technically the label for the box
+        help=get_help_text(lang, "current_research_question"),
+        placeholder=get_placeholder_text(lang, "current_research_question") or "Enter your research questions here...", # Fallback placeholder
+        key=research_q_key,
+        on_change=_sync_research_question, args=(research_q_key,),
+        label_visibility="collapsed" # Hide the direct label as subheader is used
+    )
+    if st.session_state.pop("research_question_changed", False):
+        st.rerun() # Shared across all tabs, so refresh the whole page
+    st.markdown("---")
+    autosave_draft(DRAFT_DAY_FIELD_IDS[day_from_key(day_prefix)])
+
+    # --- Submit and Download Buttons Logic ---
+    group_num = st.session_state.get('group_number', 'GroupX')
+    date_str = str(st.session_state.get('date', datetime.now().strftime('%Y-%m-%d')))
+    day_num_str = str(day_from_key(tab_key))
+    download_filename = notes_filename(group_num, day_num_str, date_str)
+
+    # Submit Button
+    if st.button(get_translation(lang, "submit_and_download"), key=f"submit_btn_{tab_key}"):
+        st.session_state.submitted_notes = None # Reset for this submission attempt
+        result = submit_day_notes(lang, tab_key)
+        if result.outcome in ("queued", "saved"):
+            row = get_all_form_data()
+            st.session_state.submitted_notes = SubmittedNotes(tab_key, lang, download_filename, result.submission_id, result.idempotency_key,
+                                                              tuple(row[header] for header in notes_headers(day_from_key(tab_key))))
+        if result.outcome == "saved":
+            st.success(get_translation(lang, "submission_success"))
+        elif result.outcome == "queued":
+            st.rerun() # Full rerun so every tab reflects the new submission
+
+    # Download Button - Show only if submission was successful AND this is the tab that was submitted
+    notes = st.session_state.submitted_notes
+    if notes is not None and notes.tab_key == tab_key:
+        st.download_button(
+            label=get_translation(lang, "download_student_copy"),
+            data=functools.partial(render_submitted_notes, notes), # Rendered only when clicked
+            file_name=notes.filename,
+            mime='text/markdown',
+            key=f"download_btn_for_{tab_key}" # Unique key for download button
+        )
+        # Delivery status of the queued submission; polls only while it is still pending
+        submission_status = get_last_submission_status()
+        if submission_status and submission_status["status"] in ("pending", "sending"):
+            poll_submission_status(lang)
+        else:
+            render_submission_status(lang, submission_status)
+
+# --- Bulk Export ---
+# Every group's notes for every day: a ZIP of the Markdown files students download, plus CSV and Parquet
+# snapshots of the sheet and any shards. Sheets are read in chunks and each chunk is written out before the
+# next is fetched, so memory use does not grow with the sheet. Also runnable as: python online_capstone.py export <dir>
+EXPORT_CHUNK_ROWS = 500
+EXPORT_FILE_NAMES = {"zip": "capstone_notes.zip", "csv": "All_Submissions_V2.csv", "parquet": "All_Submissions_V2.parquet"}
+
+def _safe_filename_part(value):
+    return re.sub(r"[^\w.-]+", "_", str(value).strip()) or "_"
+
+@timed_phase("export_submissions")
+def export_submissions(out_dir, lang=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Writes EXPORT_FILE_NAMES into out_dir and returns ({kind: path}, rows exported). Notes are rendered in
+    # the language each row was submitted in unless `lang` is given. Raises gspread errors.
+    pa = lazy_import("pyarrow") # Installed with streamlit; only the export needs it
+    pq = lazy_import("pyarrow.parquet")
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {kind: os.path.join(out_dir, name) for kind, name in EXPORT_FILE_NAMES.items()}
+    exported = 0
+    with sheets_priority(SHEETS_PRIORITY_EXPORT), leased_gsheets_client() as gc:
+        if not gc:
+            raise ConnectionError("Google Sheets client unavailable")
+        sheet_names = [SUBMISSIONS_SHEET_NAME]
+        if shard_settings()[0]:
+            sheet_names += sorted(get_shard_index(gc, refresh=True))
+        opened = [open_worksheet_readonly(gc, sheet_name) for sheet_name in sheet_names]
+        opened = [(worksheet, column_map) for worksheet, column_map in opened if worksheet is not None]
+        # Shards may have gained columns at different times; the export has every column of every sheet
+        headers = list(dict.fromkeys(header for _, column_map in opened for header in column_map.headers if header))
+        schema = pa.schema([(header, pa.string()) for header in headers])
+        used_names = {}
+        day_by_title = get_day_by_tab_title()
+        with zipfile.ZipFile(paths["zip"], "w", zipfile.ZIP_DEFLATED) as notes_zip, \
+                open(paths["csv"], "w", newline="", encoding="utf-8") as csv_file, \
+                pq.ParquetWriter(paths["parquet"], schema) as parquet_writer:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(headers)
+            for worksheet, column_map in opened:
+                width = len(column_map.headers)
+                positions = [column_map.positions[header] if header in column_map.positions else None for header in headers]
+                for _, rows in iter_sheet_row_chunks(worksheet, width, 2, chunk_rows):
+                    rows = [(list(row) + [""] * width)[:width] for row in rows if any(row)]
+                    rows = [["" if position is None else str(row[position]) for position in positions] for row in rows]
+                    if not rows:
+                        continue
+                    csv_writer.writerows(rows)
+                    parquet_writer.write_table(pa.Table.from_arrays([pa.array(column, pa.string()) for column in zip(*rows)], schema=schema))
+                    for values in rows:
+                        row = dict(zip(headers, values))
+                        day = day_by_title.get(row.get("MeetingDayFocus", "").strip())
+                        if day is None: # Not a day-tab submission; still in the CSV/Parquet
+                            continue
+                        row_lang = lang or (row.get("Language") if row.get("Language") in LANGUAGE_NAMES else BASE_LANGUAGE)
+                        name = notes_filename(*(_safe_filename_part(part) for part in (row.get("GroupNumber", ""), day, row.get("MeetingDate", ""))))
+                        used_names[name] = used_names.get(name, 0) + 1
+                        if used_names[name] > 1: # Resubmissions keep sheet order: _2, _3, ...
+                            name = f"{name[:-3]}_{used_names[name]}.md"
+                        notes_zip.writestr(name, get_notes_markdown(row, f"day_{day}_tab", row_lang))
+                    exported += len(rows)
+    return paths, exported
+
+# --- Instructor Dashboard ---
+# ?instructor=<[instructor] token from secrets> swaps the student form for a read-only view of every submission.
+# Queries run against the local submission mirror, reconciled with the sheets they cover before use.
+INSTRUCTOR_QUERY_PARAM = "instructor"
+DASHBOARD_REFRESH_SECONDS = 60 # Dashboard loads within this window make no API calls at all
+DASHBOARD_DEFAULT_RANGE_DAYS = 28 # Sharded sheets: dates loaded until the instructor picks a range
+DASHBOARD_EXPORT_PREFIX = "capstone-export-"
+DASHBOARD_EXPORT_MAX_AGE_SECONDS = 6 * 3600 # Export dirs older than this are removed, whether or not their session is still open
+
+def instructor_view_enabled():
+    return query_param_unlocked(INSTRUCTOR_QUERY_PARAM, "instructor")
+
+def sweep_export_dirs(max_age=DASHBOARD_EXPORT_MAX_AGE_SECONDS):
+    # A session that ends without exporting again leaves its last export behind; every new export clears the old ones
+    root = tempfile.gettempdir()
+    cutoff = time.time() - max_age
+    try:
+        names = [name for name in os.listdir(root) if name.startswith(DASHBOARD_EXPORT_PREFIX)]
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError: # Removed by another session meanwhile
+            pass
+
+def query_submissions(date_from=None, date_to=None, groups=(), max_age=DASHBOARD_REFRESH_SECONDS, full_reload=False):
+    # (DataFrame, oldest fetch time) of the submissions dated within [date_from, date_to] for `groups` (either end
+    # open, all groups when empty). With sharding on, only the shards that can hold such rows are reconciled, plus the
+    # unsharded sheet for undated and pre-sharding rows. Raises gspread errors (and ConnectionError without credentials).
+    sheet_names = [SUBMISSIONS_SHEET_NAME]
+    if shard_settings()[0]:
+        with leased_gsheets_client() as gc:
+            if not gc:
+                raise ConnectionError("Google Sheets client unavailable")
+            shards = get_shard_index(gc, refresh=full_reload)
+        sheet_names += sorted(shard.name for shard in select_shards(shards.values(), date_from, date_to, groups))
+    fetched_at = reconcile_mirror(sheet_names, full=full_reload, max_age=max_age)
+    return query_mirror(sheet_names, date_from, date_to, groups), fetched_at
+
+def filter_submissions(frame, groups=(), dates=(), days=()):
+    mask = lazy_import("pandas").Series(True, index=frame.index)
+    if groups:
+        mask &= frame["GroupNumber"].isin(groups)
+    if dates:
+        mask &= frame["MeetingDate"].isin(dates)
+    if days:
+        mask &= frame["Day"].isin(days)
+    return frame[mask]
+
+def missing_submission_matrix(frame, groups, days):
+    # groups x days submission counts; 0 means that group has nothing for that day
+    counts = frame.groupby(["GroupNumber", "Day"]).size().unstack(fill_value=0) if len(frame) else lazy_import("pandas").DataFrame()
+    return counts.reindex(index=list(groups), columns=list(days), fill_value=0)
+
+def _group_sort_key(group):
+    return (0, int(group), "") if group.isdigit() else (1, 0, group)
+
+@timed_phase("render.instructor_dashboard")
+def render_instructor_dashboard(lang):
+    st.header(get_translation(lang, "instructor_dashboard_title"))
+    fetch_col, reload_col = st.columns(2)
+    fetch_new = fetch_col.button(get_translation(lang, "instructor_fetch_new"))
+    reload_all = reload_col.button(get_translation(lang, "instructor_reload_all"))
+    date_from = date_to = None
+    if shard_settings()[0]: # Sharded: load only the shards covering the chosen dates
+        today = date.today()
+        date_range = st.date_input(get_translation(lang, "instructor_filter_range"),
+                                   value=(today - timedelta(days=DASHBOARD_DEFAULT_RANGE_DAYS - 1), today))
+        date_from, date_to = (tuple(date_range) + (None, None))[:2] # Only the start is set while a range is being picked
+    waiting = st.empty() # Shown while the reads queue behind submissions for quota
+    queued, wait_seconds = get_sheets_queue_status("read", SHEETS_PRIORITY_DASHBOARD)
+    if wait_seconds >= 1:
+        waiting.info(get_translation(lang, "sheets_queue_wait").format(queued=queued, seconds=wait_seconds))
+    try:
+        with sheets_priority(SHEETS_PRIORITY_DASHBOARD):
+            frame, fetched_at = query_submissions(date_from, date_to, max_age=0 if fetch_new else DASHBOARD_REFRESH_SECONDS, full_reload=reload_all)
+    except Exception as e:
+        waiting.empty()
+        st.error(f"{get_translation(lang, 'instructor_load_error')}: {e}")
+        return
+    waiting.empty()
+    st.caption(get_translation(lang, "instructor_loaded_caption").format(rows=len(frame), seconds=time.time() - fetched_at))
+
+    all_groups = sorted((g for g in frame["GroupNumber"].unique() if g), key=_group_sort_key)
+    all_days = sorted(FORM_FIELDS_BY_DAY)
+    group_col, date_col, day_col = st.columns(3)
+    groups = group_col.multiselect(get_translation(lang, "instructor_filter_groups"), all_groups)
+    dates = date_col.multiselect(get_translation(lang, "instructor_filter_dates"), sorted((d for d in frame["MeetingDate"].unique() if d), reverse=True))
+    days = day_col.multiselect(get_translation(lang, "instructor_filter_days"), all_days, format_func=lambda day: get_translation(lang, f"day_{day}_tab"))
+
+    st.subheader(get_translation(lang, "instructor_missing_title"))
+    matrix = missing_submission_matrix(filter_submissions(frame, groups, dates, days), groups or all_groups, days or all_days)
+    matrix = matrix.map(lambda count: "✗" if count == 0 else "✓" if count == 1 else f"✓ ×{count}")
+    matrix.columns = [get_translation(lang, f"day_{day}_tab") for day in matrix.columns]
+    st.dataframe(matrix, width="stretch")
+
+    st.subheader(get_translation(lang, "instructor_submissions_title"))
+    st.dataframe(filter_submissions(frame, groups, dates, days), width="stretch", hide_index=True)
+
+    search = st.text_input(get_translation(lang, "instructor_search"), placeholder=get_translation(lang, "instructor_search_placeholder"))
+    if search.strip():
+        matches = search_mirror(search, sorted(frame["Shard"].unique()), date_from, date_to, groups, days)
+        matches = [match for match in matches if not dates or match[1] in dates]
+        if not matches:
+            st.caption(get_translation(lang, "instructor_search_none"))
+        for group, meeting_date, day, field_id, excerpt, _, _ in matches:
+            day_title = get_translation(lang, f"day_{day}_tab") if day else "-"
+            st.markdown(f"**{group or '-'}** · {meeting_date or '-'} · {day_title} · {get_translation(lang, field_id)}")
+            st.caption(excerpt)
+
+    if st.button(get_translation(lang, "instructor_export")):
+        previous = st.session_state.pop("instructor_export", None)
+        if previous:
+            shutil.rmtree(previous["dir"], ignore_errors=True)
+        sweep_export_dirs()
+        export_dir = tempfile.mkdtemp(prefix=DASHBOARD_EXPORT_PREFIX)
+        try:
+            paths, exported = export_submissions(export_dir, lang=None)
+            st.session_state.instructor_export = {"dir": export_dir, "paths": paths, "rows": exported}
+        except Exception as e:
+            shutil.rmtree(export_dir, ignore_errors=True)
+            st.error(f"{get_translation(lang, 'instructor_export_error')}: {e}")
+    export = st.session_state.get("instructor_export")
+    if export and not all(os.path.exists(path) for path in export["paths"].values()): # Swept while the session sat idle
+        export = st.session_state.instructor_export = None
+    if export:
+        st.success(get_translation(lang, "instructor_export_done").format(rows=export["rows"]))
+        mimes = {"zip": "application/zip", "csv": "text/csv", "parquet": "application/octet-stream"}
+        for column, (kind, path) in zip(st.columns(len(export["paths"])), export["paths"].items()):
+            with open(path, "rb") as f:
+                column.download_button(get_translation(lang, f"instructor_download_{kind}"), data=f, file_name=os.path.basename(path), mime=mimes[kind], on_click="ignore")
+
+@timed_phase("run.full")
+def main():
+    start_connection_warmup() # Returns at once; only the first run of the process starts the thread
+    initialize_session_state() # Initialize first
+    st.set_page_config(layout="wide", page_title=get_translation(st.session_state.lang, "app_title"))
+    st.title(get_translation(st.session_state.lang, "app_title"))
+
+    language_options = {name: code for code, name in LANGUAGE_NAMES.items()}
+    # Ensure current_lang_display is found, default to English if somehow lang is not in options
+    current_lang_key = st.session_state.get("lang", "en")
+    current_lang_display = [k for k, v in language_options.items() if v == current_lang_key]
+    current_lang_display = current_lang_display[0] if current_lang_display else "English"
+
+
+    selected_language_display = st.sidebar.selectbox(
+        get_translation(st.session_state.lang, "language_select"), # Label uses current lang
+        options=list(language_options.keys()),
+        index=list(language_options.keys()).index(current_lang_display)
+    )
+    new_lang = language_options[selected_language_display]
+
+    if new_lang != st.session_state.lang:
+        st.session_state.lang = new_lang
+        # Clear submission ready flag on language change to avoid showing download for wrong language/content
+        st.session_state.submitted_notes = None
+        st.rerun()
+
+    lang = st.session_state.lang # Set lang after potential rerun
+
+    if instructor_view_enabled():
+        render_instructor_dashboard(lang) # Replaces the student form
+        if diagnostics_enabled():
+            render_diagnostics()
+        return
+
+    with full_run_autosave():
+        with st.sidebar:
+            render_meeting_info(lang)
+
+        # Define tab keys and their corresponding prefixes for filtering questions
+        tab_definitions = [
+            ("day_1_tab", "day_1_"),
+            ("day_2_tab", "day_2_"),
+            ("day_3_tab", "day_3_"),
+            ("day_4_tab", "day_4_")
+        ]
+
+        tab_titles = [get_translation(lang, tab_key) for tab_key, _ in tab_definitions]
+        created_tabs = st.tabs(tab_titles)
+
+        # Each tab is a fragment: typing in one day only reruns that tab
+        for i, (tab_key, day_prefix) in enumerate(tab_definitions):
+            with created_tabs[i]:
+                render_day_tab(lang, tab_key, day_prefix)
+
+    st.markdown("---")
+    st.markdown(f"**{get_translation(lang, 'important_label')}:** {get_translation(lang, 'footer_submission_reminder')}")
+
+    record_session_memory() # Full runs only; fragment reruns leave the recorded size as it was
+    if diagnostics_enabled():
+        render_diagnostics()
+
+record_timing("script.module", (time.perf_counter() - _script_started) * 1000) # Module body, re-run on every rerun
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "export": # python online_capstone.py export <out_dir> [lang]
+        paths, exported = export_submissions(sys.argv[2], lang=sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"Exported {exported} submissions: {', '.join(paths.values())}")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "reconcile": # python online_capstone.py reconcile [full]
+        reconcile_mirror(full=sys.argv[2:3] == ["full"])
+        print(f"Mirror reconciled: {MIRROR_PATH}")
+    else:
+        main()
\ No newline at end of file
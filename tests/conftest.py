@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def app():
+    # online_capstone imported in bare mode (no script run), with its local stores in a scratch directory
+    scratch = tempfile.mkdtemp(prefix="capstone-tests-")
+    for name in ("OUTBOX", "DRAFTS", "MIRROR"):
+        os.environ[f"CAPSTONE_{name}_PATH"] = os.path.join(scratch, f"{name.lower()}.sqlite3") # Never a developer's real stores
+    os.environ.setdefault("CAPSTONE_LOG_LEVEL", "WARNING")
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    import online_capstone
+    return online_capstone
+
+
+@pytest.fixture(scope="session")
+def backend(app):
+    # One fake Sheets backend for the whole run: pooled clients outlive a test
+    from benchmarks.fake_gspread import FakeBackend, install_fake_client
+    return install_fake_client(FakeBackend())
+
+
+@pytest.fixture
+def spreadsheet_settings(backend):
+    # Points the app at a fresh, empty spreadsheet; tests may add [gcp_spreadsheet] settings before first use
+    from benchmarks.fake_gspread import FAKE_SECRETS, install_secrets
+
+    settings = {"key": f"tests-{os.urandom(4).hex()}"}
+    install_secrets({**FAKE_SECRETS, "gcp_spreadsheet": settings})
+    return settings
@@ -0,0 +1,35 @@
+# Token-gated views (?instructor=, ?diagnostics=) through Streamlit's AppTest harness
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def _run(app, secrets, **query_params):
+    at = AppTest.from_file(app.__file__, default_timeout=30)
+    for section, values in secrets.items():
+        at.secrets[section] = values
+    for name, value in query_params.items():
+        at.query_params[name] = value
+    at.run()
+    assert not at.exception, at.exception
+    return at
+
+
+def _instructor_view(at):
+    return not at.sidebar.text_input # The dashboard replaces the student form and its sidebar
+
+
+@pytest.mark.parametrize("value, unlocked", [("s3cret", True), ("s3cre", False), ("s3cret ", False), ("秘密", False)])
+def test_instructor_token(app, backend, spreadsheet_settings, value, unlocked):
+    at = _run(app, {"instructor": {"token": "s3cret"}}, instructor=value)
+    assert _instructor_view(at) == unlocked
+
+
+@pytest.mark.parametrize("secrets, value, shown", [
+    ({}, "1", False), # No token configured: never on
+    ({"instructor": {"token": "t"}}, "t", True),
+    ({"diagnostics": {"token": "d"}, "instructor": {"token": "t"}}, "d", True),
+    ({"diagnostics": {"token": "d"}, "instructor": {"token": "t"}}, "t", False),
+])
+def test_diagnostics_token(app, backend, spreadsheet_settings, secrets, value, shown):
+    at = _run(app, secrets, diagnostics=value)
+    assert bool(at.expander) == shown
@@ -0,0 +1,35 @@
+# Draft autosave and restore through Streamlit's AppTest harness
+from streamlit.testing.v1 import AppTest
+
+
+def _session(app, **query_params):
+    at = AppTest.from_file(app.__file__, default_timeout=30)
+    for name, value in query_params.items():
+        at.query_params[name] = value
+    at.run()
+    assert not at.exception, at.exception
+    return at
+
+
+def _day_1_text_key(at):
+    return next(t.key for t in at.text_area if t.key and t.key.startswith("widget_day_1_"))
+
+
+def test_draft_restores_only_from_its_token(app, backend, spreadsheet_settings):
+    at = _session(app)
+    at.sidebar.text_input[0].set_value("7")
+    at.run()
+    key = _day_1_text_key(at)
+    at.text_area(key=key).set_value("unsubmitted notes")
+    at.run()
+    token = at.query_params[app.DRAFT_TOKEN_QUERY_PARAM]
+    token = token[0] if isinstance(token, list) else token
+    assert token and "group" not in at.query_params
+
+    guessed = _session(app, group="7", date=str(at.session_state["date"]))
+    assert guessed.sidebar.text_input[0].value == ""
+    assert guessed.text_area(key=key).value == ""
+
+    reconnected = _session(app, draft=token)
+    assert reconnected.sidebar.text_input[0].value == "7"
+    assert reconnected.text_area(key=key).value == "unsubmitted notes"
@@ -0,0 +1,95 @@
+# In-flight submit deduplication (run_idempotent_submit) over the outbox and the in-memory gspread stand-in
+import os
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def submission(app, backend, spreadsheet_settings):
+    # (form data, a fresh idempotency key) for one day-1 submission
+    from benchmarks.load_test import make_submission
+
+    form_data = make_submission(app, 1, f"dedup-{os.urandom(4).hex()}", 1)
+    return form_data, app.submission_idempotency_key(form_data)
+
+
+def _in_thread(target):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(target()))
+    thread.start()
+    return thread, results
+
+
+def _outbox_rows(app, form_data):
+    conn = app._outbox_connect(app.get_submission_outbox()["path"])
+    try:
+        return conn.execute("SELECT COUNT(*) FROM outbox WHERE payload LIKE ?", (f'%{form_data["NoteTaker"]}%',)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_duplicate_waits_for_first_result(app, submission):
+    form_data, key = submission
+    release, started, calls = threading.Event(), threading.Event(), []
+
+    def first():
+        calls.append("first")
+        started.set()
+        release.wait(10)
+        return app._deliver_submission(form_data, key)
+
+    def second():
+        calls.append("second")
+        return app._deliver_submission(form_data, key)
+
+    owner, owner_result = _in_thread(lambda: app.run_idempotent_submit(key, first))
+    assert started.wait(10)
+    waiter, waiter_result = _in_thread(lambda: app.run_idempotent_submit(key, second))
+    release.set()
+    owner.join(10)
+    waiter.join(10)
+
+    assert calls == ["first"]
+    assert owner_result[0].outcome == "queued" and not owner_result[0].duplicate
+    assert waiter_result[0] == owner_result[0]._replace(duplicate=True)
+    assert _outbox_rows(app, form_data) == 1
+
+
+def test_failing_owner_releases_key_to_waiter(app, submission):
+    form_data, key = submission
+    release, started = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(10)
+        raise RuntimeError("rerun interrupted the attempt")
+
+    def owner_run():
+        try:
+            return app.run_idempotent_submit(key, failing)
+        except RuntimeError as e:
+            return e
+
+    owner, owner_result = _in_thread(owner_run)
+    assert started.wait(10)
+    waiter, waiter_result = _in_thread(lambda: app.run_idempotent_submit(key, lambda: app._deliver_submission(form_data, key)))
+    release.set()
+    owner.join(10)
+    waiter.join(10)
+
+    assert isinstance(owner_result[0], RuntimeError)
+    assert waiter_result[0].outcome == "queued" and not waiter_result[0].duplicate
+    assert _outbox_rows(app, form_data) == 1
+
+
+def test_retry_after_failed_attempt_runs_again(app, submission):
+    form_data, key = submission
+    failed = app.run_idempotent_submit(key, lambda: app.SubmitResult("failed", None, key, False))
+    assert failed.outcome == "failed"
+    with app.get_inflight_submissions()["lock"]:
+        assert key not in app.get_inflight_submissions()["entries"]
+
+    retried = app.run_idempotent_submit(key, lambda: app._deliver_submission(form_data, key))
+    assert retried.outcome == "queued" and not retried.duplicate
+    assert app.run_idempotent_submit(key, lambda: pytest.fail("a queued key must not run again")).duplicate
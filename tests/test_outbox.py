@@ -0,0 +1,41 @@
+# Local submission outbox (SQLite) retention
+import time
+
+
+def test_prune_outbox_deletes_only_old_delivered_rows(app, tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    app._init_outbox(path)
+    now = time.time()
+    old = now - app.OUTBOX_RETENTION_DAYS * 86400 - 60
+    conn = app._outbox_connect(path)
+    try:
+        conn.executemany(
+            "INSERT INTO outbox (created_at, payload, status, delivered_at) VALUES (?, ?, ?, ?)",
+            [
+                (old, '{"n": 1}', "delivered", old),
+                (old, '{"n": 2}', "delivered", now - 60), # Queued long ago but delivered recently
+                (old, '{"n": 3}', "failed", None),
+                (old, '{"n": 4}', "pending", None),
+            ],
+        )
+        assert app.prune_outbox(conn, now) == 1
+        remaining = [payload for (payload,) in conn.execute("SELECT payload FROM outbox ORDER BY id")]
+    finally:
+        conn.close()
+    assert remaining == ['{"n": 2}', '{"n": 3}', '{"n": 4}']
+
+
+def test_init_outbox_prunes(app, tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    app._init_outbox(path)
+    conn = app._outbox_connect(path)
+    try:
+        conn.execute("INSERT INTO outbox (created_at, payload, status, delivered_at) VALUES (0, '{}', 'delivered', 0)")
+    finally:
+        conn.close()
+    app._init_outbox(path) # Server restart
+    conn = app._outbox_connect(path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM outbox").fetchone() == (0,)
+    finally:
+        conn.close()
@@ -0,0 +1,62 @@
+# Shard index registration against the in-memory gspread stand-in (benchmarks/fake_gspread.py)
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def shard_cache(app, spreadsheet_settings):
+    spreadsheet_settings["shard_by"] = "week"
+    app.get_shard_index_cache.clear()
+    yield app.get_shard_index_cache()
+    app.get_shard_index_cache.clear()
+
+
+def _shard(app, week):
+    return app.ShardInfo(f"Submissions_2026-W{week:02d}", "", "", "", "")
+
+
+def test_slow_registration_does_not_block_known_shards(app, backend, spreadsheet_settings, shard_cache, monkeypatch):
+    known, new = _shard(app, 1), _shard(app, 2)
+    with app.leased_gsheets_client() as gc:
+        app.register_shard(gc, known)
+
+    appending, release = threading.Event(), threading.Event()
+    sheets_call = app.sheets_call
+
+    def slow_append(phase, *args, **kwargs):
+        if phase == "sheets.append_rows":
+            appending.set()
+            release.wait(10) # A write stuck behind the quota queue
+        return sheets_call(phase, *args, **kwargs)
+
+    monkeypatch.setattr(app, "sheets_call", slow_append)
+
+    def register_new():
+        with app.leased_gsheets_client() as gc:
+            app.register_shard(gc, new)
+
+    registering = threading.Thread(target=register_new)
+    registering.start()
+    try:
+        assert appending.wait(10)
+        done = threading.Event()
+
+        def use_known():
+            with app.leased_gsheets_client() as gc:
+                app.register_shard(gc, known)
+                assert set(app.get_shard_index(gc)) == {known.name}
+            done.set()
+
+        threading.Thread(target=use_known).start()
+        assert done.wait(5), "known-shard lookups waited for another shard's registration"
+    finally:
+        release.set()
+        registering.join(10)
+
+    with app.leased_gsheets_client() as gc:
+        assert set(app.get_shard_index(gc, refresh=True)) == {known.name, new.name}
+        app.register_shard(gc, new)
+    index = backend.spreadsheets[spreadsheet_settings["key"]]._worksheets[app.SHARD_INDEX_SHEET_NAME]
+    assert [row[0] for row in index.rows[1:]] == [known.name, new.name] # Each listed once
+
@@ -0,0 +1,77 @@
+# Chunked sheet reads against the in-memory gspread stand-in (benchmarks/fake_gspread.py).
+# Run with: python -m pytest tests
+import csv
+import itertools
+
+import pytest
+
+
+@pytest.fixture
+def sheet(app, backend, spreadsheet_settings):
+    # A fresh fake spreadsheet whose submissions sheet has 600 rows under the header
+    from benchmarks.load_test import make_submission
+
+    with app.leased_gsheets_client() as gc:
+        worksheet = app.get_submissions_worksheet(gc, list(app.SUBMISSION_HEADERS))
+    headers = list(app.SUBMISSION_HEADERS)
+    worksheet.rows = [headers] + [
+        [str(make_submission(app, n, f"row-{n}", n % 4 + 1).get(header, "")) for header in headers] for n in range(2, 602)
+    ]
+    return backend, worksheet
+
+
+def test_blank_row_at_chunk_boundary_does_not_end_read(app, sheet):
+    _, worksheet = sheet
+    worksheet.rows[500] = [""] * len(worksheet.rows[0]) # Sheet row 501: the last row of the first 500-row window
+    read = [first_row + offset for first_row, rows in app.iter_sheet_row_chunks(worksheet, len(worksheet.rows[0]))
+            for offset, row in enumerate(rows) if any(row)]
+    assert read == [n for n in range(2, 602) if n != 501]
+
+
+def test_export_keeps_rows_after_blank_chunk_boundary(app, sheet, tmp_path):
+    _, worksheet = sheet
+    worksheet.rows[500] = [""] * len(worksheet.rows[0])
+    paths, exported = app.export_submissions(str(tmp_path), lang="en")
+    assert exported == 599
+    with open(paths["csv"], newline="", encoding="utf-8") as f:
+        note_takers = [row["NoteTaker"] for row in csv.DictReader(f)]
+    assert note_takers[-1] == "row-601"
+
+
+def test_full_mirror_reconcile_keeps_rows_after_blank_chunk_boundary(app, sheet):
+    _, worksheet = sheet
+    app.reconcile_mirror([app.SUBMISSIONS_SHEET_NAME], full=True)
+    assert len(app.query_mirror([app.SUBMISSIONS_SHEET_NAME])) == 600
+    worksheet.rows[500] = [""] * len(worksheet.rows[0])
+    app.reconcile_mirror([app.SUBMISSIONS_SHEET_NAME], full=True)
+    mirrored = app.query_mirror([app.SUBMISSIONS_SHEET_NAME])
+    assert sorted(mirrored["SheetRow"]) == [n for n in range(2, 602) if n != 501]
+
+
+def test_chunked_read_ends_through_real_gspread(app):
+    # gspread returns [[]] rather than [] for an empty range; the read must still end
+    from benchmarks.sheets_server import SheetsServer, local_client
+
+    server = SheetsServer().start()
+    try:
+        worksheet = local_client(server.base_url).open_by_key("tests-http").add_worksheet("Sheet", rows=1, cols=2)
+        worksheet.update([["A", "B"], ["1", "2"], ["3", "4"]])
+        worksheet = worksheet.spreadsheet.worksheet("Sheet") # Fresh properties: row_count 3
+        chunks = list(itertools.islice(app.iter_sheet_row_chunks(worksheet, 2, chunk_rows=2), 10))
+    finally:
+        server.stop()
+    assert [row for _, rows in chunks for row in rows if any(row)] == [["1", "2"], ["3", "4"]]
+    assert len(chunks) == 2
+
+
+def test_read_paths_never_write(app, backend, spreadsheet_settings, tmp_path):
+    # Export, mirror reconcile and the shard index only read, even from a spreadsheet with no sheets yet
+    spreadsheet_settings["shard_by"] = "week"
+    backend.reset_calls()
+    with app.leased_gsheets_client() as gc:
+        assert app.get_shard_index(gc, refresh=True) == {}
+    app.reconcile_mirror([app.SUBMISSIONS_SHEET_NAME], full=True)
+    _, exported = app.export_submissions(str(tmp_path))
+    assert exported == 0
+    writes = {"add_worksheet", "update", "batch_update", "clear", "append_rows", "add_cols", "spreadsheet_batch_update"}
+    assert not writes & set(backend.calls)
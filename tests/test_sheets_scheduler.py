@@ -0,0 +1,102 @@
+# Sheets quota scheduler: priority order within a budget, and which errors sheets_call() retries
+import threading
+import time
+
+import gspread
+import pytest
+
+from benchmarks.fake_gspread import _FakeResponse
+
+
+@pytest.fixture
+def scheduler(app, spreadsheet_settings, monkeypatch):
+    # A fresh per-process scheduler whose read budget holds one token and refills only every 12s,
+    # so queued reads are granted exactly when the test adds a token; the write budget is never short
+    spreadsheet_settings.update(read_quota_per_minute=6, write_quota_per_minute=6000)
+    app.get_sheets_scheduler.clear()
+    monkeypatch.setattr(app.random, "uniform", lambda low, high: 0.0) # No backoff sleeps
+    yield app.get_sheets_scheduler()
+    app.get_sheets_scheduler.clear()
+
+
+def _grant(scheduler, kind):
+    with scheduler["condition"]:
+        scheduler["buckets"][kind]["tokens"] += 1
+        scheduler["condition"].notify_all()
+
+
+def _wait_queued(scheduler, kind, count):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        with scheduler["condition"]:
+            if len(scheduler["buckets"][kind]["queue"]) == count:
+                return
+        time.sleep(0.005)
+    pytest.fail(f"{count} requests never queued")
+
+
+def test_submission_request_goes_ahead_of_earlier_dashboard_request(app, scheduler):
+    app.acquire_sheets_quota("read") # Spend the only token
+    granted = []
+
+    def request(priority, name):
+        with app.sheets_priority(priority):
+            app.acquire_sheets_quota("read")
+        granted.append(name)
+
+    threads = []
+    for count, (priority, name) in enumerate([(app.SHEETS_PRIORITY_EXPORT, "export"), (app.SHEETS_PRIORITY_DASHBOARD, "dashboard"),
+                                              (app.SHEETS_PRIORITY_SUBMISSION, "submission")], start=1):
+        threads.append(threading.Thread(target=request, args=(priority, name)))
+        threads[-1].start()
+        _wait_queued(scheduler, "read", count)
+    for remaining in (2, 1, 0):
+        _grant(scheduler, "read")
+        _wait_queued(scheduler, "read", remaining)
+    for thread in threads:
+        thread.join(10)
+    assert granted == ["submission", "dashboard", "export"]
+
+
+def _failing(codes, on_error=lambda: None):
+    # A request that raises an APIError for each code in turn, then succeeds; calls are counted
+    calls = []
+
+    def request():
+        calls.append(len(calls))
+        if len(calls) <= len(codes):
+            on_error()
+            raise gspread.exceptions.APIError(_FakeResponse(codes[len(calls) - 1], "injected"))
+        return "ok"
+    return request, calls
+
+
+def test_429_is_retried_and_spends_the_bucket(app, scheduler):
+    request, calls = _failing([429])
+    assert app.sheets_call("test.write", "write", request) == "ok"
+    assert len(calls) == 2
+    assert scheduler["buckets"]["write"]["throttled"] == 1
+
+
+@pytest.mark.parametrize("kind, code, retried", [
+    ("read", 503, True), # Reads are safe to repeat
+    ("write", 503, False), # The write may have been applied
+    ("read", 400, False),
+    ("write", 400, False),
+])
+def test_server_and_client_errors(app, scheduler, kind, code, retried):
+    request, calls = _failing([code], on_error=lambda: _grant(scheduler, "read")) # A read budget token for any retry
+    if retried:
+        assert app.sheets_call("test.call", kind, request) == "ok"
+        assert len(calls) == 2
+    else:
+        with pytest.raises(gspread.exceptions.APIError):
+            app.sheets_call("test.call", kind, request)
+        assert len(calls) == 1
+
+
+def test_429_retries_stop_after_max_attempts(app, scheduler):
+    request, calls = _failing([429] * app.SHEETS_MAX_ATTEMPTS)
+    with pytest.raises(gspread.exceptions.APIError):
+        app.sheets_call("test.write", "write", request)
+    assert len(calls) == app.SHEETS_MAX_ATTEMPTS
@@ -0,0 +1,39 @@
+# Upsert mode against the in-memory gspread stand-in (benchmarks/fake_gspread.py)
+
+
+def test_resubmission_after_sort_updates_its_own_row(app, backend, spreadsheet_settings):
+    from benchmarks.load_test import make_submission
+
+    spreadsheet_settings["upsert_submissions"] = True
+    with app.leased_gsheets_client() as gc:
+        app.append_submission_rows(gc, [make_submission(app, group, f"first-{group}", 1) for group in (1, 2, 3)])
+        worksheet = backend.spreadsheets[spreadsheet_settings["key"]]._worksheets[app.SUBMISSIONS_SHEET_NAME]
+        worksheet.rows[1:] = worksheet.rows[:0:-1] # An instructor sorts the sheet: groups 3, 2, 1
+        app.append_submission_rows(gc, [make_submission(app, 1, "second-1", 1)])
+
+    headers = worksheet.rows[0]
+    by_group = {row[headers.index("GroupNumber")]: row[headers.index("NoteTaker")] for row in worksheet.rows[1:]}
+    assert by_group == {"1": "second-1", "2": "first-2", "3": "first-3"}
+    assert len(worksheet.rows) == 4
+
+
+def test_upsert_rebuilds_index_reset_by_another_append(app, backend, spreadsheet_settings, monkeypatch):
+    # Another thread's append can drop the index between fetching it and taking its lock
+    from benchmarks.load_test import make_submission
+
+    spreadsheet_settings["upsert_submissions"] = True
+    with app.leased_gsheets_client() as gc:
+        app.append_submission_rows(gc, [make_submission(app, group, f"first-{group}", 1) for group in (1, 2)])
+        fetch_index = app.get_submission_row_index
+
+        def fetch_then_reset(worksheet):
+            row_index = fetch_index(worksheet)
+            row_index["rows"] = None
+            return row_index
+
+        monkeypatch.setattr(app, "get_submission_row_index", fetch_then_reset)
+        app.append_submission_rows(gc, [make_submission(app, 2, "second-2", 1)])
+
+    worksheet = backend.spreadsheets[spreadsheet_settings["key"]]._worksheets[app.SUBMISSIONS_SHEET_NAME]
+    headers = worksheet.rows[0]
+    assert [row[headers.index("NoteTaker")] for row in worksheet.rows[1:]] == ["first-1", "second-2"]